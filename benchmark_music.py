@@ -0,0 +1,126 @@
+"""
+Benchmark du pipeline audio de la musique : CPU consommé par flux selon le mode de lecture
+Compare, pour plusieurs lecteurs simultanés :
+  - pcm        : FFmpeg décode en PCM, le bot encode en Opus (ancien mode, FFmpegPCMAudio)
+  - opus       : flux Opus/WebM remultiplexé sans transcodage (FFmpegOpusAudio, codec copié)
+  - transcode  : source non Opus (AAC) encodée en Opus par FFmpeg (repli du mode opus)
+
+Usage: python benchmark_music.py [durée en secondes] [lecteurs simultanés ...]
+Exemple: python benchmark_music.py 60 1 4 8
+Nécessite ffmpeg dans le PATH ; l'encodage Opus du mode pcm utilise libopus via discord.py s'il est disponible.
+Les flux sont lus aussi vite que possible : le résultat est exprimé en % d'un cœur par flux en temps réel.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Trame Discord : 20 ms de PCM 48 kHz stéréo 16 bits
+FRAME_SIZE = 3840
+
+
+def load_encoder():
+    """Encodeur Opus de discord.py (None si discord.py ou libopus est absent)"""
+    try:
+        from discord.opus import Encoder
+        Encoder()  # Charge libopus (lève OpusNotLoaded si la bibliothèque est introuvable)
+        return Encoder
+    except Exception:
+        return None
+
+
+def make_samples(directory, duration):
+    """Fichiers de test : Opus dans WebM (cas YouTube courant) et AAC dans M4A"""
+    samples = {}
+    for name, codec, ext in (("opus", "libopus", "webm"), ("aac", "aac", "m4a")):
+        path = os.path.join(directory, f"sample.{ext}")
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error",
+             "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+             "-f", "lavfi", "-i", f"anoisesrc=duration={duration}:amplitude=0.05",
+             "-filter_complex", "amix=inputs=2", "-ac", "2", "-ar", "48000",
+             "-c:a", codec, "-b:a", "160k", path],
+            check=True
+        )
+        samples[name] = path
+    return samples
+
+
+def ffmpeg_args(mode, source):
+    """Mêmes arguments que discord.FFmpegPCMAudio / discord.FFmpegOpusAudio"""
+    if mode == "pcm":
+        return ["ffmpeg", "-i", source, "-vn", "-f", "s16le", "-ar", "48000", "-ac", "2",
+                "-loglevel", "warning", "pipe:1"]
+    codec = "copy" if mode == "opus" else "libopus"
+    return ["ffmpeg", "-i", source, "-vn", "-map_metadata", "-1", "-f", "opus", "-c:a", codec,
+            "-ar", "48000", "-ac", "2", "-b:a", "128k", "-loglevel", "warning", "pipe:1"]
+
+
+def play_stream(mode, source, encoder_class):
+    """Lit un flux complet comme le thread audio de discord.py (trames PCM encodées ou pages Ogg)"""
+    process = subprocess.Popen(ffmpeg_args(mode, source), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    encoder = encoder_class() if (mode == "pcm" and encoder_class) else None
+    while True:
+        chunk = process.stdout.read(FRAME_SIZE)
+        if not chunk:
+            break
+        if encoder is not None and len(chunk) == FRAME_SIZE:
+            encoder.encode(chunk, encoder.SAMPLES_PER_FRAME)
+    process.wait()
+
+
+def run_mode(mode, source, players, duration, encoder_class):
+    """CPU par flux en % d'un cœur (temps CPU / durée audio), côté FFmpeg et côté bot"""
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    self_before = time.process_time()
+    start = time.perf_counter()
+
+    threads = [threading.Thread(target=play_stream, args=(mode, source, encoder_class)) for _ in range(players)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall = time.perf_counter() - start
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    ffmpeg_cpu = (children_after.ru_utime - children_before.ru_utime) + (children_after.ru_stime - children_before.ru_stime)
+    bot_cpu = time.process_time() - self_before
+
+    audio_seconds = duration * players
+    return {
+        "ffmpeg": ffmpeg_cpu / audio_seconds * 100,
+        "bot": bot_cpu / audio_seconds * 100,
+        "wall": wall,
+    }
+
+
+def run(duration, player_counts):
+    encoder_class = load_encoder()
+    if encoder_class is None:
+        print("⚠️ discord.py/libopus indisponible : l'encodage Opus du mode pcm n'est pas mesuré (coût sous-estimé)\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        samples = make_samples(directory, duration)
+        cases = (("pcm", samples["opus"]), ("opus", samples["opus"]), ("transcode", samples["aac"]))
+
+        print(f"Audio de test : {duration} s par flux ; CPU en % d'un cœur par flux en temps réel")
+        print(f"{'lecteurs':>9}  {'mode':<10}{'ffmpeg %':>10}{'bot %':>8}{'total %':>9}{'durée (s)':>11}")
+        for players in player_counts:
+            results = {}
+            for mode, source in cases:
+                result = results[mode] = run_mode(mode, source, players, duration, encoder_class)
+                total = result["ffmpeg"] + result["bot"]
+                print(f"{players:>9}  {mode:<10}{result['ffmpeg']:>10.2f}{result['bot']:>8.2f}{total:>9.2f}{result['wall']:>11.2f}")
+            pcm = results["pcm"]["ffmpeg"] + results["pcm"]["bot"]
+            opus = results["opus"]["ffmpeg"] + results["opus"]["bot"]
+            if opus:
+                print(f"{'':>11}→ passthrough {pcm / opus:.1f}x moins coûteux que pcm")
+
+
+if __name__ == "__main__":
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    player_counts = [int(arg) for arg in sys.argv[2:]] or [1, 4, 8]
+    run(duration, player_counts)
@@ -0,0 +1,76 @@
+"""
+Benchmark des moteurs d'extraction des couleurs dominantes (commande bgcolor)
+Compare KMeans (scikit-learn) et la découpe médiane vectorisée : temps et erreur de quantification
+
+Usage: python benchmark_palette.py [image1 image2 ...]
+Sans argument, des images synthétiques (dégradés + bruit) sont générées.
+
+Résultats de référence (images synthétiques, 5 à 40 couleurs) : découpe médiane 9 à 290x plus rapide,
+MSE équivalente sur les aplats et les petites palettes (n=5), mais jusqu'à 13-15 % plus élevée que KMeans
+sur le dégradé (1810 contre 1600 à n=10, 442 contre 386 à n=40) et ~9 % sur le bruit à n=20.
+Des itérations de Lloyd supplémentaires ne ramènent pas l'écart sous ~6 % sur le dégradé (n=20 et 40)
+et multiplient le temps de calcul par 5 à 10 : l'affinage reste à deux passes.
+"""
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from utils.image_jobs import dominant_colors
+
+
+def synthetic_images():
+    """Images de test reproductibles : dégradé, aplats bruités, bruit pur"""
+    rng = np.random.default_rng(42)
+    x, y = np.meshgrid(np.linspace(0, 255, 200), np.linspace(0, 255, 200))
+    gradient = np.stack([x, y, 255 - x], axis=2)
+
+    flat = np.zeros((200, 200, 3))
+    for i, color in enumerate([(200, 30, 30), (30, 160, 60), (20, 40, 200), (240, 220, 50)]):
+        flat[:, i * 50:(i + 1) * 50] = color
+    flat += rng.normal(0, 12, flat.shape)
+
+    noise = rng.integers(0, 256, (200, 200, 3))
+
+    for name, array in (("dégradé", gradient), ("aplats bruités", flat), ("bruit", noise)):
+        yield name, np.clip(array, 0, 255).astype(np.uint8).reshape(-1, 3)
+
+
+def load_images(paths):
+    for path in paths:
+        image = Image.open(path).convert("RGB")
+        image.thumbnail((200, 200))
+        yield path, np.array(image).reshape(-1, 3)
+
+
+def quantization_error(pixels, colors):
+    """Erreur quadratique moyenne (RGB) entre chaque pixel et la couleur de palette la plus proche"""
+    pixels = pixels.astype(np.float64)
+    palette = np.asarray(colors, dtype=np.float64)
+    best = np.full(len(pixels), np.inf)
+    for color in palette:
+        best = np.minimum(best, ((pixels - color) ** 2).sum(axis=1))
+    return best.mean()
+
+
+def run(images, sizes=(5, 10, 20, 40)):
+    print(f"{'image':<18}{'n':>4}  {'kmeans (ms)':>12}{'median_cut (ms)':>17}{'accél.':>8}  {'MSE kmeans':>11}{'MSE mcut':>10}")
+    for name, pixels in images:
+        for num_colors in sizes:
+            timings, errors = {}, {}
+            for backend in ("kmeans", "median_cut"):
+                start = time.perf_counter()
+                colors, _ = dominant_colors(pixels, num_colors, backend)
+                timings[backend] = (time.perf_counter() - start) * 1000
+                errors[backend] = quantization_error(pixels, colors)
+            speedup = timings["kmeans"] / max(timings["median_cut"], 1e-6)
+            print(
+                f"{name[:17]:<18}{num_colors:>4}  {timings['kmeans']:>12.1f}{timings['median_cut']:>17.1f}"
+                f"{speedup:>7.0f}x  {errors['kmeans']:>11.1f}{errors['median_cut']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    run(list(load_images(paths)) if paths else list(synthetic_images()))
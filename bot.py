@@ -8,8 +8,10 @@ from utils.permission_manager import PermissionManager
 from utils.rules_manager import RulesManager
 from utils.warns_manager import WarnsManager
 from utils.database import db_manager
-from utils.migration import migration_manager
+from utils.http_client import http_client
+from utils.youtube_extractor import youtube_extractor
 from utils.access_manager import AccessManager
+from utils.guild_bootstrap import GuildBootstrap
 import logging
 import os
 
@@ -26,6 +28,14 @@ class MathysieBot(commands.Bot):
         self.perm_manager = PermissionManager("data/permissions.json")
         self.warns_manager = WarnsManager("data/warns.json")
         self.database_ready = False
+        self.bootstrap = GuildBootstrap(concurrency=Config.BOOTSTRAP_CONCURRENCY)
+        self._bootstrap_task = None
+        self.before_invoke(self.ensure_guild_ready)
+
+    async def ensure_guild_ready(self, ctx):
+        """Initialise en priorité la DB d'un serveur pas encore prêt avant d'exécuter une commande"""
+        if ctx.guild and not self.bootstrap.is_guild_ready(ctx.guild.id):
+            await self.bootstrap.ensure_guild_ready(ctx.guild)
 
     async def setup_hook(self):
         logger.info("🔄 Démarrage du bot...")
@@ -66,11 +76,8 @@ class MathysieBot(commands.Bot):
             await guild.leave()
             return
         
-        # Initialisation passive : enregistrer le serveur et créer sa DB automatiquement
-        await db_manager.register_guild(guild.id, guild.name)
-        
-        # Migrer les anciennes données si elles existent
-        await migration_manager.migrate_all_data(guild.id)
+        # Initialisation passive : enregistrer le serveur, créer sa DB et migrer les anciennes données
+        await self.bootstrap.ensure_guild_ready(guild)
         
         logger.info(f"✅ Serveur {guild.name} enregistré avec sa base de données dédiée")
 
@@ -211,14 +218,9 @@ class MathysieBot(commands.Bot):
         Config.initialize_colors()
         print(f"🎨 Loaded embed color: #{Config.DEFAULT_COLOR:06X}")
         
-        # Initialisation passive : enregistrer tous les serveurs actuels avec leurs DB
-        logger.info(f"🔄 Initialisation passive des bases de données pour {len(self.guilds)} serveurs")
-        for guild in self.guilds:
-            await db_manager.register_guild(guild.id, guild.name)
-            # Migrer les données existantes pour chaque serveur
-            await migration_manager.migrate_all_data(guild.id)
-        
-        logger.info(f"✅ Toutes les bases de données serveur sont prêtes")
+        # Initialisation passive en arrière-plan : les serveurs déjà prêts sont servis immédiatement
+        if self._bootstrap_task is None or self._bootstrap_task.done():
+            self._bootstrap_task = asyncio.create_task(self.bootstrap.run(self.guilds))
         
         # Vérifier que le module ColorAnalyzer est chargé
         color_cog = self.get_cog('ColorAnalyzer')
@@ -306,6 +308,20 @@ class MathysieBot(commands.Bot):
     async def on_disconnect(self):
         logger.warning("🔴 Bot déconnecté")
 
+    async def close(self):
+        """Arrêt propre : connexions SQLite persistantes, client HTTP partagé et pool d'extraction YouTube"""
+        await super().close()
+        stats = db_manager.get_pool_stats()
+        logger.info(f"📊 Pool SQLite: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} évictions")
+        await db_manager.close()
+        for host, host_stats in http_client.get_stats().items():
+            logger.info(
+                f"🌐 HTTP {host}: {host_stats['requests']} requêtes, {host_stats['errors']} erreurs, "
+                f"{host_stats['avg_ms']} ms en moyenne ({host_stats['max_ms']} ms max)"
+            )
+        await http_client.close()
+        youtube_extractor.shutdown()
+
 if __name__ == "__main__":
     try:
         # Vérifier que les dossiers nécessaires existent
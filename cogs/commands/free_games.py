@@ -1,8 +1,7 @@
 import discord
 from discord.ext import commands
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import aiohttp
+import asyncio
 from bs4 import BeautifulSoup
 import logging
 import json
@@ -10,6 +9,7 @@ from datetime import datetime
 import os
 
 from utils.embed_manager import EmbedManager
+from utils.http_client import http_client
 
 logger = logging.getLogger('bot')
 
@@ -28,6 +28,12 @@ class EpicGamesCog(commands.Cog):
         self.CACHE_FILE = os.path.join(self.DATA_FOLDER, "announced_games_cache.json")
         self.epic_games_url = "https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions?locale=fr&country=FR&allowCountries=FR"
         self.steam_url = "https://steamdb.info/upcoming/free/"
+        # Headers pour simuler un navigateur web
+        self.STEAM_HEADERS = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3'
+        }
         
         # Vérifier si le cache existe, sinon le créer
         if not os.path.exists(self.CACHE_FILE):
@@ -58,11 +64,11 @@ class EpicGamesCog(commands.Cog):
         except Exception as e:
             print(f"Erreur lors de la sauvegarde du cache: {e}")
 
-    def get_free_games(self):
+    async def get_free_games(self):
         try:
-            response = requests.get(self.epic_games_url)
-            if response.status_code != 200:
-                print(f"Erreur HTTP {response.status_code} lors de la requête vers Epic Games")
+            response = await http_client.get(self.epic_games_url)
+            if response.status != 200:
+                print(f"Erreur HTTP {response.status} lors de la requête vers Epic Games")
                 return [], []  # Retourne des listes vides au lieu de None
             
             data = response.json()
@@ -190,85 +196,78 @@ class EpicGamesCog(commands.Cog):
             print(f"Erreur lors de la récupération des jeux gratuits: {e}")
             return [], []  # Retourne des listes vides en cas d'erreur
 
-    def get_steam_free_games(self):
+    async def get_steam_free_games(self):
         """Récupère les jeux gratuits sur Steam en utilisant l'API officielle"""
         try:
-            # Headers pour simuler un navigateur web
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3'
-            }
-
             # Utiliser l'API de recherche Steam
             search_url = "https://store.steampowered.com/api/featuredcategories"
-            
-            session = requests.Session()
-            retries = Retry(total=3, backoff_factor=0.5)
-            session.mount('https://', HTTPAdapter(max_retries=retries))
-
-            response = session.get(search_url, headers=headers, timeout=15)
-            response.raise_for_status()
-
-            if response.status_code == 200:
-                data = response.json()
-                free_games = []
-                game_ids = []
 
-                # Parcourir les différentes catégories
-                for category in data.values():
-                    if isinstance(category, dict) and 'items' in category:
-                        for item in category['items']:
-                            try:
-                                # Vérifier si le jeu est gratuit
-                                if item.get('is_free') or (item.get('price') and item['price'].get('final') == 0):
-                                    app_id = str(item['id'])
-                                    title = item.get('name', 'Jeu sans titre')
-                                    url = f"https://store.steampowered.com/app/{app_id}"
-                                    image = item.get('header_image') or f"https://cdn.cloudflare.steamstatic.com/steam/apps/{app_id}/header.jpg"
+            response = await http_client.get(search_url, headers=self.STEAM_HEADERS)
+            if response.status != 200:
+                logger.error(f"❌ Erreur HTTP {response.status} lors de la requête vers Steam")
+                return [], []
 
-                                    # Obtenir plus de détails sur le jeu
-                                    details_url = f"https://store.steampowered.com/api/appdetails?appids={app_id}&cc=fr"
-                                    details_response = session.get(details_url, headers=headers)
-                                    
-                                    end_date = None
-                                    if details_response.status_code == 200:
-                                        details = details_response.json()
-                                        if details and details.get(app_id, {}).get('success'):
-                                            data = details[app_id]['data']
-                                            if data.get('price_overview', {}).get('final_formatted') == "Gratuit":
-                                                # Vérifier si c'est une offre limitée dans le temps
-                                                if data.get('release_date', {}).get('coming_soon'):
-                                                    end_date = data['release_date'].get('date')
-
-                                    if not end_date:
-                                        # Alternative : chercher sur la page du magasin
-                                        store_page = session.get(url, headers=headers)
-                                        if store_page.status_code == 200:
-                                            soup = BeautifulSoup(store_page.text, 'html.parser')
-                                            promo_div = soup.find('div', {'class': 'game_purchase_discount_countdown'})
-                                            if promo_div:
-                                                end_date = promo_div.text.strip()
-
-                                    free_games.append((app_id, title, url, image, end_date))
-                                    game_ids.append(app_id)
-                                    
-                            except Exception as e:
-                                logger.error(f"❌ Erreur lors du traitement du jeu Steam {item.get('name', 'inconnu')}: {e}")
-                                continue
+            data = response.json()
+            items = [
+                item
+                for category in data.values()
+                if isinstance(category, dict) and 'items' in category
+                for item in category['items']
+                # Vérifier si le jeu est gratuit
+                if item.get('is_free') or (item.get('price') and item['price'].get('final') == 0)
+            ]
 
-                return free_games, game_ids
+            # Détails récupérés en parallèle (le client HTTP limite les requêtes simultanées vers Steam)
+            results = await asyncio.gather(*(self.get_steam_game(item) for item in items))
 
-            logger.error(f"❌ Erreur HTTP {response.status_code} lors de la requête vers Steam")
-            return [], []
+            free_games = [game for game in results if game]
+            game_ids = [game[0] for game in free_games]
+            return free_games, game_ids
 
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"❌ Erreur lors de la requête Steam: {str(e)}")
             return [], []
         except Exception as e:
             logger.error(f"❌ Erreur inattendue lors de la récupération des jeux Steam: {str(e)}")
             return [], []
 
+    async def get_steam_game(self, item):
+        """Complète un jeu gratuit Steam avec sa date de fin d'offre"""
+        try:
+            app_id = str(item['id'])
+            title = item.get('name', 'Jeu sans titre')
+            url = f"https://store.steampowered.com/app/{app_id}"
+            image = item.get('header_image') or f"https://cdn.cloudflare.steamstatic.com/steam/apps/{app_id}/header.jpg"
+
+            # Obtenir plus de détails sur le jeu
+            details_url = f"https://store.steampowered.com/api/appdetails?appids={app_id}&cc=fr"
+            details_response = await http_client.get(details_url, headers=self.STEAM_HEADERS)
+
+            end_date = None
+            if details_response.status == 200:
+                details = details_response.json()
+                if details and details.get(app_id, {}).get('success'):
+                    data = details[app_id]['data']
+                    if data.get('price_overview', {}).get('final_formatted') == "Gratuit":
+                        # Vérifier si c'est une offre limitée dans le temps
+                        if data.get('release_date', {}).get('coming_soon'):
+                            end_date = data['release_date'].get('date')
+
+            if not end_date:
+                # Alternative : chercher sur la page du magasin
+                store_page = await http_client.get(url, headers=self.STEAM_HEADERS)
+                if store_page.status == 200:
+                    soup = BeautifulSoup(store_page.text(), 'html.parser')
+                    promo_div = soup.find('div', {'class': 'game_purchase_discount_countdown'})
+                    if promo_div:
+                        end_date = promo_div.text.strip()
+
+            return (app_id, title, url, image, end_date)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du traitement du jeu Steam {item.get('name', 'inconnu')}: {e}")
+            return None
+
     @commands.command(
         name="epicgames",
         help="Affiche les jeux gratuits Epic Games",
@@ -278,7 +277,7 @@ class EpicGamesCog(commands.Cog):
     async def epicgames_command(self, ctx):
         """Affiche les jeux gratuits disponibles actuellement sur Epic Games Store"""
         try:
-            games, _ = self.get_free_games()
+            games, _ = await self.get_free_games()
             if not games:
                 await ctx.send("Aucun jeu gratuit disponible sur Epic Games pour le moment.")
                 return
@@ -318,7 +317,7 @@ class EpicGamesCog(commands.Cog):
     async def steamgames_command(self, ctx):
         """Affiche les jeux gratuits temporaires sur Steam"""
         try:
-            games, _ = self.get_steam_free_games()
+            games, _ = await self.get_steam_free_games()
             if not games:
                 await ctx.send("Aucun jeu gratuit temporaire disponible sur Steam pour le moment.")
                 return
@@ -2,13 +2,15 @@ import random
 import asyncio
 import discord
 import io
-import aiohttp
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 from collections import Counter
 import numpy as np
-from sklearn.cluster import KMeans
 from discord.ext import commands
+from config import Config
 from utils.embed_manager import EmbedManager
+from utils import image_jobs
+from utils.media_pool import media_pool, MediaQueueFull, MediaUserLimit
+from utils.http_client import http_client
 
 
 class CommandesGénérales(commands.Cog):
@@ -23,6 +25,46 @@ class CommandesGénérales(commands.Cog):
             embed_type=embed_type
         )
 
+    async def run_media_job(self, ctx, func, *args):
+        """Exécute un traitement d'image dans le pool de processus avec retour visuel (None si refusé)"""
+        status_message = None
+
+        async def on_queued(position):
+            nonlocal status_message
+            status_message = await ctx.send(
+                f"⏳ Traitement en file d'attente (position {position})..."
+            )
+
+        async def on_start():
+            if status_message:
+                await status_message.edit(content="⚙️ Traitement en cours...")
+            await ctx.message.add_reaction("⚙️")
+
+        try:
+            return await media_pool.run(
+                ctx.author.id, func, *args, on_queued=on_queued, on_start=on_start
+            )
+        except MediaUserLimit:
+            await ctx.send("❌ Vous avez déjà un traitement d'image en cours, patientez.")
+            return None
+        except MediaQueueFull:
+            await ctx.send("❌ Trop de traitements d'images en attente, réessayez dans un instant.")
+            return None
+        finally:
+            if status_message:
+                try:
+                    await status_message.delete()
+                except discord.HTTPException:
+                    pass
+            try:
+                await ctx.message.remove_reaction("⚙️", ctx.bot.user)
+            except discord.HTTPException:
+                pass
+
+    def cog_unload(self):
+        """Arrête les processus de traitement d'images"""
+        media_pool.shutdown()
+
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
         if isinstance(error, commands.MissingPermissions):
@@ -205,32 +247,21 @@ class CommandesGénérales(commands.Cog):
 
         try:
             # Télécharger l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as resp:
-                    if resp.status != 200:
-                        await ctx.send("❌ Impossible de télécharger l'image.")
-                        return
-                    image_data = await resp.read()
-
-            # Ouvrir l'image avec PIL
-            image = Image.open(io.BytesIO(image_data))
-
-            # Convertir en RGB si nécessaire (pour JPG)
-            if format_type in ["jpg", "jpeg"] and image.mode in ["RGBA", "P"]:
-                background = Image.new("RGB", image.size, (255, 255, 255))
-                if image.mode == "P":
-                    image = image.convert("RGBA")
-                background.paste(
-                    image, mask=image.split()[-1] if image.mode == "RGBA" else None
-                )
-                image = background
+            response = await http_client.get(attachment.url)
+            if response.status != 200:
+                await ctx.send("❌ Impossible de télécharger l'image.")
+                return
+            image_data = response.body
 
-            # Sauvegarder dans le nouveau format
-            output = io.BytesIO()
+            # Convertir dans le pool de processus
             if format_type == "jpg":
                 format_type = "jpeg"
-            image.save(output, format=format_type.upper())
-            output.seek(0)
+            converted = await self.run_media_job(
+                ctx, image_jobs.convert_image, image_data, format_type
+            )
+            if converted is None:
+                return
+            output = io.BytesIO(converted)
 
             # Créer le nom du fichier de sortie
             original_name = attachment.filename.rsplit(".", 1)[0]
@@ -360,34 +391,23 @@ class CommandesGénérales(commands.Cog):
 
         try:
             # Télécharger l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as resp:
-                    if resp.status != 200:
-                        await ctx.send("❌ Impossible de télécharger l'image.")
-                        return
-                    image_data = await resp.read()
+            response = await http_client.get(attachment.url)
+            if response.status != 200:
+                await ctx.send("❌ Impossible de télécharger l'image.")
+                return
+            image_data = response.body
 
             original_size = len(image_data)
 
-            # Ouvrir l'image avec PIL
-            image = Image.open(io.BytesIO(image_data))
-
-            # Convertir en RGB si nécessaire
-            if image.mode in ["RGBA", "P"]:
-                background = Image.new("RGB", image.size, (255, 255, 255))
-                if image.mode == "P":
-                    image = image.convert("RGBA")
-                background.paste(
-                    image, mask=image.split()[-1] if image.mode == "RGBA" else None
-                )
-                image = background
-
-            # Compresser l'image
-            output = io.BytesIO()
-            image.save(output, format="JPEG", quality=quality, optimize=True)
-            output.seek(0)
+            # Compresser l'image dans le pool de processus
+            compressed = await self.run_media_job(
+                ctx, image_jobs.compress_image, image_data, quality
+            )
+            if compressed is None:
+                return
+            output = io.BytesIO(compressed)
 
-            compressed_size = len(output.getvalue())
+            compressed_size = len(compressed)
             compression_ratio = round((1 - compressed_size / original_size) * 100, 1)
 
             # Créer le nom du fichier de sortie
@@ -441,121 +461,25 @@ class CommandesGénérales(commands.Cog):
             await ctx.message.add_reaction("⏳")
 
             # Télécharger l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as resp:
-                    if resp.status != 200:
-                        await ctx.send("❌ Impossible de télécharger l'image.")
-                        return
-                    image_data = await resp.read()
-
-            # Ouvrir l'image avec PIL
-            image = Image.open(io.BytesIO(image_data))
-            original_size = image.size
-
-            # Convertir en RGB
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            # Redimensionner pour accélérer l'analyse
-            image.thumbnail((200, 200))
-
-            # Convertir en array numpy
-            img_array = np.array(image)
-            img_array = img_array.reshape(-1, 3)
-
-            # Utiliser KMeans pour trouver les couleurs dominantes
-            kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=10)
-            kmeans.fit(img_array)
-
-            colors = kmeans.cluster_centers_.astype(int)
-
-            # Calculer les pourcentages de chaque couleur
-            labels = kmeans.labels_
-            unique_labels, counts = np.unique(labels, return_counts=True)
-            percentages = (counts / len(labels)) * 100
-
-            # Trier par pourcentage décroissant
-            sorted_indices = np.argsort(percentages)[::-1]
-            colors = colors[sorted_indices]
-            percentages = percentages[sorted_indices]
-
-            # Créer la palette PNG (toujours générée)
-            if num_colors <= 5:
-                # Palette horizontale pour 5 couleurs ou moins
-                palette_width = min(num_colors * 120, 600)
-                palette_height = 150
-                palette_img = Image.new(
-                    "RGB", (palette_width, palette_height), (40, 40, 40)
-                )
-                draw = ImageDraw.Draw(palette_img)
-
-                rect_width = (palette_width - 20) // num_colors
-                start_x = 10
-
-                for i, (color, percentage) in enumerate(zip(colors, percentages)):
-                    x = start_x + (i * rect_width)
-
-                    # Rectangle principal
-                    draw.rectangle([x, 20, x + rect_width - 10, 130], fill=tuple(color))
-
-                    # Bordure subtile
-                    draw.rectangle(
-                        [x, 20, x + rect_width - 10, 130],
-                        outline=(255, 255, 255),
-                        width=2,
-                    )
-            else:
-                # Palette en grille pour plus de 5 couleurs
-                cols_per_row = 5
-                rows = (num_colors + cols_per_row - 1) // cols_per_row
-                palette_width = cols_per_row * 120
-                palette_height = rows * 100 + 50
-
-                palette_img = Image.new(
-                    "RGB", (palette_width, palette_height), (30, 30, 30)
-                )
-                draw = ImageDraw.Draw(palette_img)
-
-                # Titre
-                try:
-                    title_font = ImageFont.truetype("arial.ttf", 20)
-                except:
-                    title_font = ImageFont.load_default()
-
-                draw.text(
-                    (palette_width // 2, 15),
-                    f"Palette de {num_colors} couleurs",
-                    fill=(255, 255, 255),
-                    font=title_font,
-                    anchor="mm",
-                )
-
-                # Dessiner les rectangles
-                for i, (color, percentage) in enumerate(zip(colors, percentages)):
-                    row = i // cols_per_row
-                    col = i % cols_per_row
-
-                    x = col * 120 + 10
-                    y = row * 100 + 60
-
-                    # Rectangle de couleur
-                    draw.rectangle([x, y, x + 100, y + 80], fill=tuple(color))
-                    draw.rectangle(
-                        [x, y, x + 100, y + 80], outline=(255, 255, 255), width=1
-                    )
-
-                    # Numéro
-                    draw.text(
-                        (x + 5, y + 5),
-                        str(i + 1),
-                        fill=(255, 255, 255),
-                        font=title_font,
-                    )
-
-            # Sauvegarder l'image de palette
-            palette_output = io.BytesIO()
-            palette_img.save(palette_output, format="PNG")
-            palette_output.seek(0)
+            response = await http_client.get(attachment.url)
+            if response.status != 200:
+                await ctx.send("❌ Impossible de télécharger l'image.")
+                return
+            image_data = response.body
+
+            # Extraction des couleurs et rendu de la palette dans le pool de processus
+            result = await self.run_media_job(
+                ctx,
+                image_jobs.extract_palette,
+                image_data,
+                num_colors,
+                Config.PALETTE_BACKEND,
+            )
+            if result is None:
+                await ctx.message.remove_reaction("⏳", ctx.bot.user)
+                return
+            colors, percentages, original_size, palette_png = result
+            palette_output = io.BytesIO(palette_png)
 
             # Créer le fichier texte détaillé (toujours généré)
             text_content = f"Analyse des couleurs dominantes\n"
@@ -688,27 +612,16 @@ class CommandesGénérales(commands.Cog):
             await ctx.message.add_reaction("⏳")
 
             # Télécharger l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as resp:
-                    if resp.status != 200:
-                        await ctx.send("❌ Impossible de télécharger l'image.")
-                        return
-                    image_data = await resp.read()
+            response = await http_client.get(attachment.url)
+            if response.status != 200:
+                await ctx.send("❌ Impossible de télécharger l'image.")
+                return
+            image_data = response.body
 
             original_size_bytes = len(image_data)
 
-            # Ouvrir l'image avec PIL
-            image = Image.open(io.BytesIO(image_data))
-            original_resolution = image.size
-
-            # Convertir en RGB si nécessaire
-            if image.mode in ["RGBA"]:
-                # Conserver la transparence pour PNG
-                pass
-            elif image.mode in ["P"]:
-                image = image.convert("RGBA")
-            elif image.mode not in ["RGB", "RGBA"]:
-                image = image.convert("RGB")
+            # Lecture de l'en-tête uniquement (rapide) pour valider la taille finale
+            original_resolution = Image.open(io.BytesIO(image_data)).size
 
             # Calculer la nouvelle taille
             new_width = int(original_resolution[0] * scale_factor)
@@ -716,57 +629,26 @@ class CommandesGénérales(commands.Cog):
 
             # Vérifier que la nouvelle résolution n'est pas trop grande
             if new_width * new_height > 16000000:  # ~16 mégapixels max
+                await ctx.message.remove_reaction("⏳", ctx.bot.user)
                 await ctx.send(
                     "❌ La résolution finale serait trop importante. Réduisez le facteur d'agrandissement."
                 )
                 return
 
-            # Améliorer l'image avec différentes techniques
-
-            # 1. Redimensionnement avec algorithme Lanczos (haute qualité)
-            enhanced_image = image.resize(
-                (new_width, new_height), Image.Resampling.LANCZOS
+            # Redimensionnement Lanczos, netteté et contraste dans le pool de processus
+            result = await self.run_media_job(
+                ctx,
+                image_jobs.enhance_image,
+                image_data,
+                scale_factor,
+                attachment.filename.lower().endswith((".jpg", ".jpeg")),
             )
-
-            # 2. Appliquer des filtres d'amélioration
-            from PIL import ImageEnhance, ImageFilter
-
-            # Améliorer la netteté
-            sharpness_enhancer = ImageEnhance.Sharpness(enhanced_image)
-            enhanced_image = sharpness_enhancer.enhance(
-                1.2
-            )  # Augmenter légèrement la netteté
-
-            # Améliorer le contraste légèrement
-            contrast_enhancer = ImageEnhance.Contrast(enhanced_image)
-            enhanced_image = contrast_enhancer.enhance(1.1)
-
-            # Appliquer un filtre de netteté supplémentaire pour les détails
-            if scale_factor >= 2.0:
-                enhanced_image = enhanced_image.filter(
-                    ImageFilter.UnsharpMask(radius=1, percent=120, threshold=3)
-                )
-
-            # Sauvegarder l'image améliorée
-            output = io.BytesIO()
-
-            # Choisir le format et la qualité de sortie
-            original_format = image.format or "PNG"
-            if (
-                original_format.upper() == "JPEG"
-                or attachment.filename.lower().endswith((".jpg", ".jpeg"))
-            ):
-                enhanced_image = enhanced_image.convert(
-                    "RGB"
-                )  # JPEG ne supporte pas la transparence
-                enhanced_image.save(output, format="JPEG", quality=95, optimize=True)
-                file_extension = "jpg"
-            else:
-                enhanced_image.save(output, format="PNG", optimize=True)
-                file_extension = "png"
-
-            output.seek(0)
-            enhanced_size_bytes = len(output.getvalue())
+            if result is None:
+                await ctx.message.remove_reaction("⏳", ctx.bot.user)
+                return
+            enhanced_data, file_extension, (new_width, new_height) = result
+            output = io.BytesIO(enhanced_data)
+            enhanced_size_bytes = len(enhanced_data)
 
             # Calculer les statistiques
             resolution_increase = (
@@ -2,8 +2,8 @@ import discord
 from discord.ext import commands
 import logging
 import os
-import json
 from dotenv import load_dotenv
+from utils.database import db_manager
 
 # Chargement des variables d'environnement
 load_dotenv()
@@ -14,7 +14,7 @@ class MCStatusCommands(commands.Cog):
         self.bot = bot
         # Supprimer la référence à STATUS_CHANNEL_ID car on va le lire depuis le JSON
         
-    async def save_config(self, server_address: str, channel_id: int, role_id: int = None):
+    async def save_config(self, guild_id: int, server_address: str, channel_id: int, role_id: int = None):
         # Séparer l'IP et le port
         if ':' in server_address:
             ip, port = server_address.split(':')
@@ -23,40 +23,28 @@ class MCStatusCommands(commands.Cog):
             port = "25565"
 
         try:
-            # Charger la configuration existante
-            with open('data/user_preferences.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-
-            # Mettre à jour la configuration
-            if 'minecraft' not in config:
-                config['minecraft'] = {}
-            
-            config['minecraft']['server'] = {
-                'ip': ip,
-                'port': port
-            }
-            config['minecraft']['discord'] = {
-                'statusChannelId': str(channel_id)
+            # Configuration propre à ce serveur Discord (colonnes mc_* de guild_config)
+            values = {
+                'mc_server_ip': ip,
+                'mc_server_port': int(port),
+                'mc_status_channel_id': channel_id
             }
-            
-            # Ajouter le rôle de notification s'il est spécifié
+            # Conserver le rôle de notification existant s'il n'est pas précisé
             if role_id is not None:
-                config['minecraft']['discord']['notificationRoleId'] = str(role_id)
-            elif 'notificationRoleId' not in config.get('minecraft', {}).get('discord', {}):
-                # Valeur par défaut si pas encore configurée
-                config['minecraft']['discord']['notificationRoleId'] = "0"
-                
-            config['minecraft']['lastUpdate'] = ''
-
-            # Sauvegarder la configuration
-            with open('data/user_preferences.json', 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4)
-
+                values['mc_notification_role_id'] = role_id
+            await db_manager.update_guild_config(guild_id, **values)
             return True
 
         except Exception as e:
             logger.error(f"❌ Erreur lors de la sauvegarde de la configuration: {e}")
             return False
+
+    def get_monitor(self, ctx):
+        """Suivi Minecraft du serveur Discord de la commande (None si non configuré)"""
+        tracker_cog = self.bot.get_cog('MCStatusTracker')
+        if not tracker_cog or not ctx.guild:
+            return None
+        return tracker_cog.get_monitor(ctx.guild.id)
         
     @commands.command(
         name="mcstatus",
@@ -66,14 +54,14 @@ class MCStatusCommands(commands.Cog):
     )
     async def mcstat(self, ctx):
         """Commande pour afficher le statut du serveur manuellement"""
-        # Récupérer le cog MCStatusTracker
-        tracker_cog = self.bot.get_cog('MCStatusTracker')
-        if not tracker_cog:
-            await ctx.send("❌ Le système de suivi n'est pas disponible.")
+        # Récupérer le suivi de ce serveur Discord
+        monitor = self.get_monitor(ctx)
+        if not monitor:
+            await ctx.send("❌ Aucun serveur Minecraft suivi ici. Utilisez `!mcsetup` pour en configurer un.")
             return
         
         loading_msg = await ctx.send("🔄 Vérification du statut du serveur...")
-        is_online, embed, _, _ = await tracker_cog.get_status_embed()
+        _, embed = await monitor.get_status_embed()
         await loading_msg.edit(content=None, embed=embed)
         logger.info(f"✅ Commande mcstatus exécutée par {ctx.author}")
     
@@ -86,35 +74,34 @@ class MCStatusCommands(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def mcrefresh(self, ctx):
         """Force l'actualisation du message de statut"""
-        tracker_cog = self.bot.get_cog('MCStatusTracker')
-        if not tracker_cog:
-            await ctx.send("❌ Le système de suivi n'est pas disponible.")
+        monitor = self.get_monitor(ctx)
+        if not monitor:
+            await ctx.send("❌ Aucun serveur Minecraft suivi ici. Utilisez `!mcsetup` pour en configurer un.")
             return
         
-        # Recharger la configuration pour avoir le bon salon
-        tracker_cog.load_config()
-        channel = self.bot.get_channel(tracker_cog.STATUS_CHANNEL_ID)
+        channel = monitor.channel
         
         if channel:
             await ctx.send("🔄 Actualisation du statut du serveur...")
-            is_online, embed, player_count, current_player_list = await tracker_cog.get_status_embed()
+            status, embed = await monitor.get_status_embed()
             
             # Nettoyer les anciens messages de statut
-            await tracker_cog.clean_status_messages(channel)
+            await monitor.clean_status_messages(channel)
             # Nettoyer aussi les notifications joueurs
-            await tracker_cog.clean_player_notify_messages(channel)
+            await monitor.clean_player_notify_messages(channel)
             
             # Créer un nouveau message de statut
-            tracker_cog.status_message = await channel.send(embed=embed)
+            monitor.status_message = await channel.send(embed=embed, view=monitor.make_view())
+            monitor.displayed_status = status
             
             # Mettre à jour les valeurs précédentes
-            tracker_cog.previous_server_status = is_online
-            tracker_cog.previous_player_count = player_count
-            tracker_cog.previous_player_list = current_player_list
+            monitor.previous_server_status = status.online
+            monitor.previous_player_count = status.players_online
+            monitor.previous_player_list = status.player_names
             
             await ctx.send("✅ Message de statut actualisé!")
         else:
-            await ctx.send(f"❌ Canal de statut non trouvé (ID: {tracker_cog.STATUS_CHANNEL_ID})")
+            await ctx.send(f"❌ Canal de statut non trouvé (ID: {monitor.STATUS_CHANNEL_ID})")
     
     @commands.command(
         name="mcsetup",
@@ -145,9 +132,9 @@ class MCStatusCommands(commands.Cog):
             
             # Valider l'ID du salon
             channel_id = int(channel_id.strip('<>#'))
-            channel = self.bot.get_channel(channel_id)
+            channel = ctx.guild.get_channel(channel_id)
             if not channel:
-                await ctx.send("❌ Salon introuvable!")
+                await ctx.send("❌ Salon introuvable sur ce serveur!")
                 return
             
             # Valider l'ID du rôle (si fourni)
@@ -162,7 +149,7 @@ class MCStatusCommands(commands.Cog):
                     role_mention = f"\nRôle de notification: {role.mention}"
                 
             # Sauvegarder la configuration
-            success = await self.save_config(server_address, channel_id, parsed_role_id)
+            success = await self.save_config(ctx.guild.id, server_address, channel_id, parsed_role_id)
             if not success:
                 await ctx.send("❌ Erreur lors de la sauvegarde de la configuration.")
                 return
@@ -170,7 +157,7 @@ class MCStatusCommands(commands.Cog):
             # Mettre à jour le tracker
             tracker_cog = self.bot.get_cog('MCStatusTracker')
             if tracker_cog:
-                tracker_cog.reload_config()
+                await tracker_cog.configure(ctx.guild.id)
                 
                 # Créer un embed pour la confirmation
                 embed = discord.Embed(
@@ -1,9 +1,11 @@
 import discord
 from discord.ext import commands, tasks
-import yt_dlp as youtube_dl
-import asyncio
 import logging
+from typing import Dict
+from config import Config
 from utils.embed_manager import EmbedManager
+from utils.music_player import GuildPlayer, Track
+from utils.youtube_extractor import youtube_extractor
 
 logger = logging.getLogger("bot")  # Configuration du logger
 
@@ -11,10 +13,31 @@ logger = logging.getLogger("bot")  # Configuration du logger
 class Commandes_musicales(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.current_track = None  # Variable pour suivre la musique en cours
-        self.queue = []  # File d'attente pour la lecture des pistes
+        self.players: Dict[int, GuildPlayer] = {}  # Un lecteur (et une file d'attente) par serveur
         self.inactivity_check.start()  # Lancer la vérification d'inactivité
 
+    async def cog_unload(self):
+        """Arrête la vérification d'inactivité et tous les lecteurs"""
+        self.inactivity_check.cancel()
+        for player in list(self.players.values()):
+            await player.close()
+
+    def get_player(self, ctx, voice_client) -> GuildPlayer:
+        """Lecteur du serveur (créé à la première piste)"""
+        player = self.players.get(ctx.guild.id)
+        if player is None or player.closed:
+            player = GuildPlayer(
+                ctx.guild.id, voice_client, ctx.channel, on_finished=self._forget_player
+            )
+            self.players[ctx.guild.id] = player
+        else:
+            player.voice_client = voice_client
+        return player
+
+    def _forget_player(self, player: GuildPlayer):
+        if self.players.get(player.guild_id) is player:
+            del self.players[player.guild_id]
+
     @tasks.loop(minutes=1)
     async def inactivity_check(self):
         """Vérifie l'inactivité des utilisateurs dans le salon vocal."""
@@ -25,7 +48,11 @@ class Commandes_musicales(commands.Cog):
                 if (
                     len(voice_client.channel.members) == 1
                 ):  # Vérifie si seul le bot est présent
-                    await voice_client.disconnect()
+                    player = self.players.get(guild.id)
+                    if player:
+                        await player.close()
+                    else:
+                        await voice_client.disconnect()
 
     def create_embed(self, title, description=None, embed_type="music"):
         """Crée un embed standard pour les réponses musicales."""
@@ -85,16 +112,22 @@ class Commandes_musicales(commands.Cog):
                 # Déplacer le bot si l'utilisateur est dans un autre canal vocal
                 await voice_client.move_to(voice_channel)
 
+            player = self.get_player(ctx, voice_client)
+
             # Vérifier si l'URL est une playlist
             if "playlist" in url:
-                await self.play_playlist(url, voice_client, ctx)
+                await self.play_playlist(url, player, ctx)
+                return
+
+            # La piste est résolue par le lecteur : la commande répond sans attendre l'extraction
+            position = player.enqueue(Track(url, requester=str(ctx.author)))
+            if position:
+                message = f"➕ Ajouté à la file d'attente (position {position}) : **{url}**"
             else:
-                await self.play_music(url, voice_client)
+                message = f"🎵 En train de jouer : **{url}**"
 
             # Sauvegarder le dernier message du bot contenant le lien
-            self.last_message = await self._send_response(
-                ctx, f"🎵 En train de jouer : **{url}**"
-            )
+            self.last_message = await self._send_response(ctx, message)
         except discord.ClientException as e:
             response_message = f"❌ Erreur de connexion au salon vocal : {e}"
             await self._send_response(ctx, response_message)
@@ -104,69 +137,19 @@ class Commandes_musicales(commands.Cog):
             )
             await self._send_response(ctx, response_message)
 
-    async def play_playlist(self, url, voice_client, ctx):
-        """Joue la playlist entière en enchaînant les vidéos."""
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "quiet": True,
-            "nocheckcertificate": True,
-            "extract_flat": True,  # Pour éviter de télécharger les vidéos, juste l'audio
-        }
-
-        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            playlist_title = info.get("title", "Playlist inconnue")
-            videos = info["entries"]
-
-            # Ajouter chaque vidéo à la queue
-            for video in videos:
-                self.queue.append(video["url"])
-
-            # Joue la première vidéo
-            await self.play_music(self.queue.pop(0), voice_client)
-
-            # Indiquer la playlist en cours
-            await self._send_response(
-                ctx,
-                f"🎶 Playlist en cours : {playlist_title}",
-                title="Lecture de Playlist",
-            )
+    async def play_playlist(self, url, player, ctx):
+        """Ajoute la playlist à la file du serveur : ses entrées sont lues par pages au fil de la lecture"""
+        playlist = await youtube_extractor.open_playlist(
+            url, page_size=Config.PLAYLIST_PAGE_SIZE, requester=str(ctx.author)
+        )
+        player.enqueue(playlist)
 
-    async def play_music(self, url, voice_client):
-        """Joue la musique via FFmpeg."""
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "opus",
-                    "preferredquality": "320",
-                }
-            ],
-            "quiet": True,
-            "nocheckcertificate": True,
-        }
-
-        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            audio_url = info["url"]
-
-            source = discord.FFmpegPCMAudio(audio_url, executable="ffmpeg")
-            if not voice_client.is_playing():
-                voice_client.play(
-                    source,
-                    after=lambda e: asyncio.run(self.handle_audio_end(e, voice_client)),
-                )
-
-    async def handle_audio_end(self, error, voice_client):
-        """Gestion de la fin de la musique."""
-        if error:
-            print(f"Erreur de lecture : {error}")
-        if self.queue:
-            next_track = self.queue.pop(0)
-            await self.play_music(next_track, voice_client)
-        else:
-            await voice_client.disconnect()
+        # Indiquer la playlist en cours
+        await self._send_response(
+            ctx,
+            f"🎶 Playlist en cours : {playlist.title}",
+            title="Lecture de Playlist",
+        )
 
     @commands.hybrid_command(
         name="stop", description="Arrête la musique et déconnecte le bot."
@@ -177,15 +160,24 @@ class Commandes_musicales(commands.Cog):
             await ctx.response.defer()
 
         voice_client = ctx.guild.voice_client
+        player = self.players.get(ctx.guild.id)
 
         if voice_client and voice_client.is_playing():
             # Récupérer l'URL ou le nom de la musique en cours
-            current_track = self.current_track or "inconnue"
-            voice_client.stop()
-            await voice_client.disconnect()
+            current_track = (
+                player.current.display_name if player and player.current else "inconnue"
+            )
+            if player:
+                await player.close()
+            else:
+                voice_client.stop()
+                await voice_client.disconnect()
             response_message = f"⏹️ La musique **{current_track}** a été arrêtée et le bot a quitté le salon vocal."
         elif voice_client:
-            await voice_client.disconnect()
+            if player:
+                await player.close()
+            else:
+                await voice_client.disconnect()
             response_message = "🔇 Le bot a quitté le salon vocal."
         else:
             response_message = "❌ Le bot n'est pas connecté à un salon vocal."
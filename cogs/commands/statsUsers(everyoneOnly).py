@@ -1,22 +1,15 @@
 import discord
 from discord.ext import commands
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import datetime
-import json
-import os
 from io import BytesIO
-from collections import defaultdict
 import logging
-from dotenv import load_dotenv
 from utils.error import ErrorHandler
 from utils.embed_manager import EmbedManager
-
-load_dotenv()  # Charge les variables d'environnement du fichier .env
-
-# Récupère la chaîne et transforme-la en liste
-filtered_words_str = os.getenv("FILTERED_GAME_WORDS", "")
-filtered_game_words = filtered_words_str.split(",") if filtered_words_str else []
+from utils.chart_renderer import chart_renderer
+from utils.leaderboard import leaderboards
+from utils.activity_history import activity_history
+from utils.game_names import game_names
+from utils.stats_store import stats_store
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -25,44 +18,22 @@ logging.basicConfig(level=logging.INFO)
 class StatsCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Assigner filtered_game_words à l'instance
-        self.filtered_game_words = filtered_game_words
-        self.load_stats()
+        # Compteurs partagés avec le listener (lus en mémoire, sans accès disque)
+        stats_store.load()
         self.stats_cache = {}
         self.last_update = 0
-
-    def load_stats(self):
-        try:
-            if os.path.exists("data/stats.json"):
-                with open("data/stats.json", "r", encoding="utf-8") as f:
-                    self.stats_data = json.load(f)
-            else:
-                self.stats_data = self.init_empty_stats()
-            logger.info("📈 Données statistiques chargées")
-        except json.JSONDecodeError:
-            logger.error("❌ Erreur de lecture du fichier stats.json")
-            self.stats_data = self.init_empty_stats()
-        except Exception as e:
-            logger.error(f"❌ Erreur chargement stats: {str(e)}")
-
-    def init_empty_stats(self):
-        """Initialise des statistiques vides"""
-        return {
-            "messages": {},
-            "voice_time": {},
-            "last_online": {},
-            "channels": {"text": {}, "voice": {}},
-            "emojis": {},
-            "reactions": {},
-            "hourly_activity": {str(i): 0 for i in range(24)},
-            "daily_activity": {str(i): 0 for i in range(7)},
-            "games": {},
-            "streaming": {},
-            "message_history": {},
-            "voice_history": {},
-            "commands_used": 0,
-            "last_update": "",
-        }
+        # Le processus de rendu des graphiques démarre avec le cog (backend Agg prêt)
+        chart_renderer.start()
+
+    def cog_unload(self):
+        stats = chart_renderer.get_stats()
+        for chart_type, timing in stats["timings"].items():
+            logger.info(
+                f"📊 Graphique '{chart_type}': {timing['renders']} rendus, "
+                f"moy. {timing['avg_ms']}ms, max {timing['max_ms']}ms"
+            )
+        logger.info(f"📊 Cache graphiques: {stats['hits']} hits, {stats['misses']} misses")
+        chart_renderer.shutdown()
 
     def is_rate_limited(self, user_id):
         now = datetime.datetime.now().timestamp()
@@ -74,93 +45,13 @@ class StatsCommands(commands.Cog):
 
     def should_filter_game(self, game_name):
         """Vérifie si le nom du jeu contient un des mots à filtrer"""
-        if not game_name:
-            return False
-
-        # Convertir le nom du jeu en minuscules pour une comparaison insensible à la casse
-        game_name_lower = game_name.lower()
-
-        # Vérifier si l'un des mots filtrés est présent dans le nom du jeu
-        for word in self.filtered_game_words:
-            if word.lower() in game_name_lower:
-                return True
-        return False
+        return game_names.is_filtered(game_name)
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
         """Gestion globale des erreurs"""
         await ErrorHandler.handle_command_error(ctx, error)
 
-    @commands.Cog.listener()
-    async def on_presence_update(self, before, after):
-        """Traque les activités de jeu des membres"""
-        try:
-            # Ignorer les bots
-            if after.bot:
-                return
-
-            # Vérifie les changements d'activité
-            before_game = next(
-                (
-                    activity
-                    for activity in before.activities
-                    if activity.type == discord.ActivityType.playing
-                ),
-                None,
-            )
-            after_game = next(
-                (
-                    activity
-                    for activity in after.activities
-                    if activity.type == discord.ActivityType.playing
-                ),
-                None,
-            )
-
-            # Si aucun changement pertinent, on sort
-            if before_game == after_game:
-                return
-
-            # Initialise la section games si nécessaire
-            if "games" not in self.stats_data:
-                self.stats_data["games"] = {}
-
-            # Si un jeu se termine
-            if before_game and not after_game:
-                game_name = before_game.name
-                # Vérifier si le jeu doit être filtré
-                if not self.should_filter_game(game_name):
-                    # Correction ici: s'assurer que la valeur est un entier avant d'incrémenter
-                    current_count = self.stats_data["games"].get(game_name, 0)
-                    # Vérifier si current_count est un dictionnaire
-                    if isinstance(current_count, dict):
-                        # Si c'est un dictionnaire, initialiser avec 1
-                        self.stats_data["games"][game_name] = 1
-                    else:
-                        # Sinon, incrémenter normalement
-                        self.stats_data["games"][game_name] = current_count + 1
-                    logger.info(f"🎮 {after.name} a terminé de jouer à {game_name}")
-
-            # Si un nouveau jeu commence
-            elif after_game and not before_game:
-                game_name = after_game.name
-                # Vérifier si le jeu doit être filtré
-                if not self.should_filter_game(game_name):
-                    # S'assurer qu'il existe une entrée pour ce jeu
-                    if game_name not in self.stats_data["games"]:
-                        self.stats_data["games"][game_name] = 0
-                    # Vérifier si la valeur est un dictionnaire
-                    elif isinstance(self.stats_data["games"][game_name], dict):
-                        self.stats_data["games"][game_name] = 0
-                    logger.info(f"🎮 {after.name} a commencé à jouer à {game_name}")
-
-            # Sauvegarde des données
-            with open("data/stats.json", "w", encoding="utf-8") as f:
-                json.dump(self.stats_data, f, indent=4)
-
-        except Exception as e:
-            logger.error(f"❌ Erreur tracking jeu: {str(e)}")
-
     def create_embed(self, title, description=None, embed_type="stats"):
         """Crée un embed standard pour les statistiques"""
         return EmbedManager.create_professional_embed(
@@ -181,127 +72,12 @@ class StatsCommands(commands.Cog):
         remaining_hours = hours % 24
         return f"{days}j {remaining_hours}h {remaining_mins}min"
 
-    def create_chart(self, data, title, ylabel, filename, kind="bar"):
-        """Crée un graphique avec gestion d'erreurs améliorée"""
-        try:
-            # Nettoyage complet des figures précédentes
-            plt.close("all")
-
-            # Vérification des données
-            if not data or not isinstance(data, dict):
-                logger.error("Données invalides pour le graphique")
-                return None
-
-            # Conversion et validation des données
-            labels = list(data.keys())
-            values = [
-                float(v) if isinstance(v, (int, str)) else v for v in data.values()
-            ]
-
-            if not labels or not values or len(labels) != len(values):
-                logger.error("Données incohérentes pour le graphique")
-                return None
-
-            # Création figure avec style explicite
-            fig = plt.figure(figsize=(10, 6), dpi=100, facecolor="#2F3136")
-            ax = fig.add_subplot(111)
-
-            # Application du style dark
-            plt.style.use("dark_background")
-            ax.set_facecolor("#2F3136")
-
-            if kind == "bar":
-                ax.bar(range(len(labels)), values, color="#2BA3B3", alpha=0.7)
-                plt.xticks(range(len(labels)), labels, rotation=45, ha="right")
-            elif kind == "line":
-                try:
-                    dates = []
-                    for label in labels:
-                        try:
-                            if isinstance(label, str):
-                                dates.append(
-                                    datetime.datetime.strptime(label, "%Y-%m-%d %H:00")
-                                )
-                            else:
-                                dates.append(label)
-                        except ValueError:
-                            dates.append(label)
-
-                    if all(isinstance(d, datetime.datetime) for d in dates):
-                        ax.plot(
-                            dates, values, marker="o", linestyle="-", color="#2BA3B3"
-                        )
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m"))
-                        ax.xaxis.set_major_locator(mdates.DayLocator(interval=2))
-                    else:
-                        ax.plot(
-                            range(len(labels)),
-                            values,
-                            marker="o",
-                            linestyle="-",
-                            color="#2BA3B3",
-                        )
-                        plt.xticks(range(len(labels)), labels, rotation=45, ha="right")
-                except Exception as e:
-                    logger.error(f"Erreur lors du tracé de ligne: {e}")
-                    ax.plot(
-                        range(len(labels)),
-                        values,
-                        marker="o",
-                        linestyle="-",
-                        color="#2BA3B3",
-                    )
-                    plt.xticks(range(len(labels)), labels, rotation=45, ha="right")
-
-            # Personnalisation du graphique
-            plt.title(title, pad=20, color="white")
-            plt.ylabel(ylabel, color="white")
-            plt.grid(True, linestyle="--", alpha=0.3)
-
-            # Ajustement des marges
-            plt.tight_layout(pad=2.0)
-
-            # Sauvegarde en mémoire avec gestion d'erreur
-            buffer = BytesIO()
-            try:
-                plt.savefig(
-                    buffer,
-                    format="png",
-                    bbox_inches="tight",
-                    facecolor="#2F3136",
-                    edgecolor="none",
-                    dpi=100,
-                )
-                buffer.seek(0)
-                return buffer
-            except Exception as e:
-                logger.error(f"Erreur lors de la sauvegarde du graphique: {e}")
-                return None
-            finally:
-                plt.close("all")  # Nettoyage final
-
-        except Exception as e:
-            logger.error(f"Erreur lors de la création du graphique: {e}")
+    async def create_chart(self, data, title, ylabel, filename, kind="bar"):
+        """Crée un graphique (rendu hors boucle, mis en cache) ; renvoie un buffer PNG ou None"""
+        image = await chart_renderer.render(filename, data, title, ylabel, kind)
+        if image is None:
             return None
-
-    def get_sorted_data(self, data_dict, limit=None, reverse=True):
-        """Trie les données d'un dictionnaire"""
-        if not data_dict:
-            return []
-        try:
-            # Conversion explicite des valeurs en float pour la comparaison
-            sorted_items = sorted(
-                [
-                    (k, float(v) if isinstance(v, (str, int)) else v)
-                    for k, v in data_dict.items()
-                ],
-                key=lambda x: x[1],
-                reverse=reverse,
-            )
-            return sorted_items[:limit] if limit else sorted_items
-        except (ValueError, TypeError) as e:
-            logger.error(f"Erreur de tri: {e}")
-            return []
+        return BytesIO(image)
 
     @commands.command(
         name="stats",
@@ -321,22 +97,49 @@ class StatsCommands(commands.Cog):
         logger.info(f"📊 Stats demandées pour {target}")
         try:
             user_id = str(target.id)
+            # Copie cohérente des compteurs avant les await suivants
+            snapshot = stats_store.user_snapshot(user_id)
 
             embed = self.create_embed(f"📊 Statistiques de {target.display_name}")
             embed.set_thumbnail(url=target.display_avatar.url)
 
             # Messages
-            messages = self.stats_data.get("messages", {}).get(user_id, 0)
+            messages = snapshot["messages"]
             embed.add_field(name="Messages envoyés", value=str(messages), inline=True)
 
             # Temps vocal
-            voice_time = self.stats_data.get("voice_time", {}).get(user_id, 0)
+            voice_time = snapshot["voice_time"]
             embed.add_field(
                 name="Temps en vocal", value=self.format_time(voice_time), inline=True
             )
 
+            # Position dans les classements du serveur
+            if ctx.guild:
+                for category, label in (("messages", "Classement messages"), ("vocal", "Classement vocal")):
+                    board = leaderboards.board(ctx.guild.id, category)
+                    rank = board.rank(user_id)
+                    if rank:
+                        embed.add_field(
+                            name=label,
+                            value=f"#{rank} sur {len(board):,}".replace(",", " "),
+                            inline=True,
+                        )
+
+            # Activité récente sur ce serveur (historique agrégé)
+            if ctx.guild:
+                totals = await activity_history.get_totals(ctx.guild.id, target.id)
+                embed.add_field(
+                    name="Activité récente",
+                    value="\n".join(
+                        f"{days} j : {totals['messages'][days]} msgs, "
+                        f"{self.format_time(totals['voice'][days])} en vocal"
+                        for days in (7, 30, 365)
+                    ),
+                    inline=False,
+                )
+
             # Dernière activité
-            last_seen = self.stats_data.get("last_online", {}).get(user_id, "Jamais")
+            last_seen = snapshot["last_online"] or "Jamais"
             embed.add_field(name="Dernière activité", value=last_seen, inline=False)
 
             await ctx.send(embed=embed)
@@ -357,14 +160,14 @@ class StatsCommands(commands.Cog):
         # Compter uniquement les messages des non-bots
         messages = {
             uid: count
-            for uid, count in self.stats_data.get("messages", {}).items()
+            for uid, count in stats_store.section("messages").items()
             if not self.bot.get_user(int(uid)) or not self.bot.get_user(int(uid)).bot
         }
 
         # Compter uniquement le temps vocal des non-bots
         voice_time = {
             uid: time
-            for uid, time in self.stats_data.get("voice_time", {}).items()
+            for uid, time in stats_store.section("voice_time").items()
             if not self.bot.get_user(int(uid)) or not self.bot.get_user(int(uid)).bot
         }
 
@@ -413,8 +216,8 @@ class StatsCommands(commands.Cog):
                 pass
 
         # Création du graphique d'activité
-        buffer = self.create_chart(
-            self.stats_data.get("hourly_activity", {}),
+        buffer = await self.create_chart(
+            dict(stats_store.section("hourly_activity")),
             "Activité par heure",
             "Activité",
             "server_activity",
@@ -422,7 +225,8 @@ class StatsCommands(commands.Cog):
         )
 
         await ctx.send(embed=embed)
-        await ctx.send(file=discord.File(buffer, filename="server_activity.png"))
+        if buffer is not None:
+            await ctx.send(file=discord.File(buffer, filename="server_activity.png"))
 
     @commands.command(
         name="top",
@@ -432,48 +236,14 @@ class StatsCommands(commands.Cog):
     )
     async def top_members(self, ctx, category="messages", limit: int = 5):
         """Affiche le classement des membres"""
-        # Filtrer les données pour exclure les bots
-        filtered_messages = {}
-        filtered_vocal = {}
-        filtered_streaming = {}
-
-        for user_id, value in self.stats_data.get("messages", {}).items():
-            try:
-                member = await ctx.guild.fetch_member(int(user_id))
-                if member and not member.bot:
-                    filtered_messages[user_id] = value
-            except:
-                continue
-
-        for user_id, value in self.stats_data.get("voice_time", {}).items():
-            try:
-                member = await ctx.guild.fetch_member(int(user_id))
-                if member and not member.bot:
-                    filtered_vocal[user_id] = value
-            except:
-                continue
-
-        for user_id, value in self.stats_data.get("streaming", {}).items():
-            try:
-                member = await ctx.guild.fetch_member(int(user_id))
-                if member and not member.bot:
-                    filtered_streaming[user_id] = value
-            except:
-                continue
-
-        categories = {
-            "messages": filtered_messages,
-            "vocal": filtered_vocal,
-            "streaming": filtered_streaming,
-        }
-
-        if category not in categories:
+        if category not in ("messages", "vocal", "streaming"):
             await ctx.send(
                 "❌ Catégorie invalide. Utilisez 'messages', 'vocal' ou 'streaming'"
             )
             return
 
-        sorted_data = self.get_sorted_data(categories[category], limit)
+        # Classement du serveur (membres non-bots), maintenu au fil des événements
+        sorted_data = leaderboards.board(ctx.guild.id, category).top(limit)
 
         if not sorted_data:
             await ctx.send("❌ Aucune donnée disponible pour cette catégorie")
@@ -482,18 +252,15 @@ class StatsCommands(commands.Cog):
         embed = self.create_embed(f"🏆 Top {limit} - {category}")
 
         for i, (user_id, value) in enumerate(sorted_data, 1):
-            try:
-                member = await ctx.guild.fetch_member(int(user_id))
-                if member and not member.bot:
-                    name = member.display_name
-                    value_str = (
-                        self.format_time(value)
-                        if category != "messages"
-                        else str(value)
-                    )
-                    embed.add_field(name=f"#{i} {name}", value=value_str, inline=False)
-            except:
-                continue
+            member = ctx.guild.get_member(int(user_id))
+            if member:
+                name = member.display_name
+                value_str = (
+                    self.format_time(value)
+                    if category != "messages"
+                    else str(value)
+                )
+                embed.add_field(name=f"#{i} {name}", value=value_str, inline=False)
 
         await ctx.send(embed=embed)
 
@@ -509,8 +276,7 @@ class StatsCommands(commands.Cog):
             await ctx.send("❌ Type invalide. Utilisez 'text' ou 'voice'")
             return
 
-        channels_data = self.stats_data.get("channels", {}).get(channel_type, {})
-        sorted_channels = self.get_sorted_data(channels_data, 10)
+        sorted_channels = leaderboards.board(ctx.guild.id, f"{channel_type}_channels").top(10)
 
         embed = self.create_embed(f"📊 Top 10 salons {channel_type}")
 
@@ -532,17 +298,8 @@ class StatsCommands(commands.Cog):
     )
     async def emoji_stats(self, ctx, limit: int = 10):
         """Affiche les statistiques des emojis"""
-        emojis_data = self.stats_data.get("emojis", {})
-        reactions_data = self.stats_data.get("reactions", {})
-
-        # Combine les données des emojis et des réactions
-        all_emojis = defaultdict(int)
-        for emoji_id, count in emojis_data.items():
-            all_emojis[emoji_id] += count
-        for emoji_str, count in reactions_data.items():
-            all_emojis[emoji_str] += count
-
-        sorted_emojis = self.get_sorted_data(all_emojis, limit)
+        # Emojis des messages et réactions combinés
+        sorted_emojis = leaderboards.board(None, "emojis").top(limit)
         embed = self.create_embed("😀 Top emojis")
 
         for emoji_id, count in sorted_emojis:
@@ -579,11 +336,11 @@ class StatsCommands(commands.Cog):
             return
 
         if chart_type == "hourly":
-            data = self.stats_data.get("hourly_activity", {})
+            data = stats_store.section("hourly_activity")
             title = "Activité par heure"
             ordered_data = {f"{i}h": data.get(str(i), 0) for i in range(24)}
         else:
-            data = self.stats_data.get("daily_activity", {})
+            data = stats_store.section("daily_activity")
             days = [
                 "Lundi",
                 "Mardi",
@@ -596,7 +353,7 @@ class StatsCommands(commands.Cog):
             ordered_data = {days[int(d)]: data.get(d, 0) for d in data}
             title = "Activité par jour"
 
-        buffer = self.create_chart(
+        buffer = await self.create_chart(
             ordered_data, title, "Niveau d'activité", f"{chart_type}_activity"
         )
         if buffer is None:
@@ -616,28 +373,24 @@ class StatsCommands(commands.Cog):
     async def game_stats(self, ctx, limit: int = 10):
         """Affiche les statistiques des jeux"""
         try:
-            games_data = self.stats_data.get("games", {})
+            games_board = leaderboards.board(None, "games")
 
-            if not games_data:
+            if not len(games_board):
                 await ctx.send("❌ Aucune donnée de jeu disponible")
                 return
 
-            # Filtrer les jeux contenant les mots à exclure
-            filtered_games = {}
-            for game_name, minutes in games_data.items():
-                if (
-                    not self.should_filter_game(game_name)
-                    and minutes
-                    and str(minutes).replace(".", "", 1).isdigit()
-                ):
-                    filtered_games[str(game_name)] = float(minutes)
-
-            if not filtered_games:
+            # Parcourir le classement en ignorant les jeux contenant les mots à exclure
+            sorted_games = []
+            for game_name, minutes in games_board:
+                if len(sorted_games) >= limit or minutes <= 0:
+                    break
+                if not self.should_filter_game(game_name):
+                    sorted_games.append((game_name, minutes))
+
+            if not sorted_games:
                 await ctx.send("❌ Aucune donnée valide trouvée après filtrage")
                 return
 
-            sorted_games = self.get_sorted_data(filtered_games, limit)
-
             embed = self.create_embed("🎮 Top jeux joués")
             embed.set_footer(text=EmbedManager.FOOTER_STANDARD)
 
@@ -649,7 +402,7 @@ class StatsCommands(commands.Cog):
             # Création du graphique
             if len(sorted_games) > 0:
                 chart_data = {str(game): float(mins) for game, mins in sorted_games[:5]}
-                buffer = self.create_chart(
+                buffer = await self.create_chart(
                     chart_data,
                     "Top 5 jeux les plus joués",
                     "Temps de jeu (minutes)",
@@ -657,7 +410,8 @@ class StatsCommands(commands.Cog):
                 )
 
                 await ctx.send(embed=embed)
-                await ctx.send(file=discord.File(buffer, filename="games_stats.png"))
+                if buffer is not None:
+                    await ctx.send(file=discord.File(buffer, filename="games_stats.png"))
             else:
                 await ctx.send(embed=embed)
 
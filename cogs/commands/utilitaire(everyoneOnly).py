@@ -1,14 +1,13 @@
 import discord
 from discord.ext import commands
-import requests
 import qrcode
 from io import BytesIO
-import aiohttp
 import os
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 from utils.embed_manager import EmbedManager
 from utils.error import ErrorHandler
+from utils.http_client import http_client
 
 
 class Commandes_Webs(commands.Cog):
@@ -64,13 +63,13 @@ class Commandes_Webs(commands.Cog):
                 "Authorization": f"Bearer {self.BITLY_API_KEY}",
                 "Content-Type": "application/json",
             }
-            response = requests.post(
+            response = await http_client.post(
                 "https://api-ssl.bitly.com/v4/shorten",
                 headers=headers,
                 json={"long_url": url},
             )
 
-            if response.status_code == 200:
+            if response.status == 200:
                 short_url = response.json().get("link")
                 embed = self.create_embed(
                     "🔗 URL Raccourcie",
@@ -140,60 +139,59 @@ class Commandes_Webs(commands.Cog):
         status_msg = await ctx.send("🔎 Analyse en cours...")
         try:
             headers = {"x-apikey": self.VIRUSTOTAL_API_KEY}
-            async with aiohttp.ClientSession() as session:
-                # Soumet l'URL pour analyse
-                async with session.post(
-                    "https://www.virustotal.com/api/v3/urls",
-                    headers=headers,
-                    data={"url": url},
-                ) as response:
-                    if response.status != 200:
-                        await status_msg.edit(content="❌ Erreur lors de l'analyse")
-                        return
-
-                    result = await response.json()
-                    analysis_id = result["data"]["id"]
-                    await status_msg.edit(content="⏳ Récupération des résultats...")
-
-                    # Récupère les résultats
-                    async with session.get(
-                        f"https://www.virustotal.com/api/v3/analyses/{analysis_id}",
-                        headers=headers,
-                    ) as get_response:
-                        if get_response.status != 200:
-                            await status_msg.edit(
-                                content="❌ Erreur lors de la récupération des résultats"
-                            )
-                            return
-
-                        analysis_result = await get_response.json()
-                        stats = analysis_result["data"]["attributes"].get("stats", {})
-                        malicious = stats.get("malicious", 0)
-                        suspicious = stats.get("suspicious", 0)
-                        total = sum(stats.values())
-
-                        if malicious > 0 or suspicious > 0:
-                            threat_level = (
-                                "🔴 Élevé"
-                                if malicious > 5
-                                else "🟡 Modéré" if malicious > 0 else "🟠 Faible"
-                            )
-                            embed = self.create_embed(
-                                "⚠️ URL Potentiellement Dangereuse",
-                                f"**Niveau de menace :** {threat_level}\n"
-                                f"**Détections :** {malicious} malveillantes, {suspicious} suspectes\n"
-                                f"**Total analyseurs :** {total}\n"
-                                f"**URL analysée :** {url}",
-                            )
-                        else:
-                            embed = self.create_embed(
-                                "✅ URL Sûre",
-                                f"Aucune détection sur {total} analyseurs.\n"
-                                f"URL analysée : {url}",
-                            )
-
-                        await status_msg.delete()
-                        await ctx.send(embed=embed)
+            # Soumet l'URL pour analyse
+            response = await http_client.post(
+                "https://www.virustotal.com/api/v3/urls",
+                headers=headers,
+                data={"url": url},
+            )
+            if response.status != 200:
+                await status_msg.edit(content="❌ Erreur lors de l'analyse")
+                return
+
+            result = response.json()
+            analysis_id = result["data"]["id"]
+            await status_msg.edit(content="⏳ Récupération des résultats...")
+
+            # Récupère les résultats
+            get_response = await http_client.get(
+                f"https://www.virustotal.com/api/v3/analyses/{analysis_id}",
+                headers=headers,
+            )
+            if get_response.status != 200:
+                await status_msg.edit(
+                    content="❌ Erreur lors de la récupération des résultats"
+                )
+                return
+
+            analysis_result = get_response.json()
+            stats = analysis_result["data"]["attributes"].get("stats", {})
+            malicious = stats.get("malicious", 0)
+            suspicious = stats.get("suspicious", 0)
+            total = sum(stats.values())
+
+            if malicious > 0 or suspicious > 0:
+                threat_level = (
+                    "🔴 Élevé"
+                    if malicious > 5
+                    else "🟡 Modéré" if malicious > 0 else "🟠 Faible"
+                )
+                embed = self.create_embed(
+                    "⚠️ URL Potentiellement Dangereuse",
+                    f"**Niveau de menace :** {threat_level}\n"
+                    f"**Détections :** {malicious} malveillantes, {suspicious} suspectes\n"
+                    f"**Total analyseurs :** {total}\n"
+                    f"**URL analysée :** {url}",
+                )
+            else:
+                embed = self.create_embed(
+                    "✅ URL Sûre",
+                    f"Aucune détection sur {total} analyseurs.\n"
+                    f"URL analysée : {url}",
+                )
+
+            await status_msg.delete()
+            await ctx.send(embed=embed)
         except Exception as e:
             await status_msg.edit(content=f"❌ Une erreur est survenue : {str(e)}")
 
@@ -1,9 +1,13 @@
 import discord
 from discord.ext import commands
-import requests
+import asyncio
 import logging
+from urllib.parse import quote
 
+from config import Config
 from utils.embed_manager import EmbedManager
+from utils.http_client import http_client
+from utils.ttl_cache import AsyncTTLCache
 
 logger = logging.getLogger('bot')
 
@@ -12,6 +16,16 @@ class WikiCommands(commands.Cog):
         self.bot = bot
         self.color = EmbedManager.get_default_color()
         self.icon_url = "https://i.imgur.com/YSQ8PBN.png"
+        # Recherches (requête, nombre) et extraits (titre) partagés entre utilisateurs
+        self.search_cache = AsyncTTLCache(Config.WIKI_CACHE_SIZE, Config.WIKI_CACHE_TTL)
+        self.extract_cache = AsyncTTLCache(Config.WIKI_CACHE_SIZE, Config.WIKI_CACHE_TTL)
+
+    def cog_unload(self):
+        search, extract = self.search_cache.get_stats(), self.extract_cache.get_stats()
+        logger.info(
+            f"📚 Cache Wiki: recherches {search['hits']} hits / {search['misses']} requêtes, "
+            f"extraits {extract['hits']} hits / {extract['misses']} requêtes"
+        )
 
     def create_embed(self, title, description="", url=None, thumbnail=None):
         embed = discord.Embed(
@@ -26,63 +40,84 @@ class WikiCommands(commands.Cog):
         embed.set_footer(text="MathysieBot™ • Wikipédia", icon_url=self.icon_url)
         return embed
 
+    @staticmethod
+    def shorten_extract(extract: str) -> str:
+        """Limiter la longueur et ajouter ..."""
+        return extract[:500] + ('...' if len(extract) > 500 else '')
+
     async def search_wiki(self, query: str, limit: int = 5):
-        """Recherche des articles Wikipedia avec extraits"""
+        """Recherche des articles Wikipedia avec extraits (depuis le cache si la recherche est récente)"""
+        limit = min(limit, 50)
+        key = (" ".join(query.split()).casefold(), limit)
+        try:
+            return await self.search_cache.get_or_load(key, lambda: self.fetch_search(query, limit))
+        except Exception as e:
+            logger.error(f"Erreur recherche Wiki: {e}")
+            return []
+
+    async def fetch_search(self, query: str, limit: int):
+        """Interroge l'API de recherche ; lève une exception en cas d'échec (rien n'est mis en cache)"""
         search_url = (
             "https://fr.wikipedia.org/w/api.php"
             "?action=query&format=json"
             "&generator=search&gsrlimit={}"
             "&prop=extracts&exintro=1&explaintext=1"
             "&gsrsearch={}".format(
-                min(limit, 50),
-                requests.utils.quote(query)
+                limit,
+                quote(query)
             )
         )
-        
+
+        response = await http_client.get(search_url, timeout=5)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        data = response.json()
+        pages = data.get('query', {}).get('pages', {})
+        results = []
+        for page_id in sorted(pages.keys()):
+            page = pages[page_id]
+            results.append({
+                'title': page.get('title', ''),
+                'extract': page.get('extract', ''),
+                'pageid': page_id
+            })
+            # Les extraits reçus avec la recherche évitent une requête par article
+            if page.get('extract'):
+                self.extract_cache.set(page.get('title', ''), self.shorten_extract(page['extract']))
+        return results
+
+    async def get_wiki_extract(self, title: str) -> str:
+        """Récupère l'extrait d'un article Wikipedia (depuis le cache s'il est récent)"""
         try:
-            response = requests.get(search_url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                pages = data.get('query', {}).get('pages', {})
-                results = []
-                for page_id in sorted(pages.keys()):
-                    page = pages[page_id]
-                    results.append({
-                        'title': page.get('title', ''),
-                        'extract': page.get('extract', ''),
-                        'pageid': page_id
-                    })
-                return results
-            return []
+            return await self.extract_cache.get_or_load(title, lambda: self.fetch_extract(title))
         except Exception as e:
-            logger.error(f"Erreur recherche Wiki: {e}")
-            return []
+            logger.error(f"Erreur extraction Wiki: {e}")
+            return None
 
-    async def get_wiki_extract(self, title: str) -> str:
-        """Récupère l'extrait d'un article Wikipedia"""
+    async def fetch_extract(self, title: str) -> str:
+        """Interroge l'API pour l'extrait d'un article ; lève une exception en cas d'échec"""
         extract_url = (
             "https://fr.wikipedia.org/w/api.php"
             "?action=query&format=json&prop=extracts"
             "&exintro=true&explaintext=true&titles={}".format(
-                requests.utils.quote(title)
+                quote(title)
             )
         )
-        
-        try:
-            response = requests.get(extract_url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                pages = data.get('query', {}).get('pages', {})
-                # Prendre la première page (seule page)
-                page = next(iter(pages.values()))
-                extract = page.get('extract', '')
-                if extract:
-                    # Limiter la longueur et ajouter ...
-                    return extract[:500] + ('...' if len(extract) > 500 else '')
-            return None
-        except Exception as e:
-            logger.error(f"Erreur extraction Wiki: {e}")
-            return None
+
+        response = await http_client.get(extract_url, timeout=5)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        data = response.json()
+        pages = data.get('query', {}).get('pages', {})
+        # Prendre la première page (seule page)
+        page = next(iter(pages.values()), {})
+        extract = page.get('extract', '')
+        return self.shorten_extract(extract) if extract else None
+
+    async def prefetch_extracts(self, results: list):
+        """Charge à l'avance les extraits absents des résultats (l'API n'en renvoie que 20 par recherche)"""
+        titles = [result['title'] for result in results if not result.get('extract')]
+        await asyncio.gather(*(self.get_wiki_extract(title) for title in titles))
 
     def create_results_page(self, query: str, results: list, page: int, items_per_page: int = 5):
         start_idx = page * items_per_page
@@ -99,10 +134,14 @@ class WikiCommands(commands.Cog):
 
         for i, result in enumerate(current_results, start=start_idx + 1):
             title = result['title']
-            snippet = result.get('snippet', 'Pas de description disponible.')
+            snippet = (
+                result.get('extract')
+                or self.extract_cache.get(title)
+                or 'Pas de description disponible.'
+            )
             # Nettoie les balises HTML du snippet
             snippet = snippet.replace('<span class="searchmatch">', '**').replace('</span>', '**')
-            url = f"https://fr.wikipedia.org/wiki/{requests.utils.quote(title.replace(' ', '_'))}"
+            url = f"https://fr.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
             
             embed.add_field(
                 name=f"{i}. {title}",
@@ -126,7 +165,7 @@ class WikiCommands(commands.Cog):
             else:
                 extract = sentences[0][:250] + "..."
 
-        url = f"https://fr.wikipedia.org/wiki/{requests.utils.quote(title.replace(' ', '_'))}"
+        url = f"https://fr.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
         
         description = (
             f"📖 **Résumé :**\n"
@@ -153,6 +192,15 @@ class WikiCommands(commands.Cog):
             self.results = results
             self.current_page = 0
             self.items_per_page = 5
+            self._prefetch = None
+            self.prefetch_next()
+
+        def prefetch_next(self):
+            """Prépare en arrière-plan les extraits de la page suivante"""
+            start = (self.current_page + 1) * self.items_per_page
+            upcoming = self.results[start:start + self.items_per_page]
+            if upcoming and (self._prefetch is None or self._prefetch.done()):
+                self._prefetch = asyncio.create_task(self.cog.prefetch_extracts(upcoming))
 
         @discord.ui.button(label="◀️ Précédent", style=discord.ButtonStyle.primary)
         async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -160,13 +208,18 @@ class WikiCommands(commands.Cog):
                 self.current_page -= 1
                 embed = self.cog.create_results_page(self.query, self.results, self.current_page)
                 await interaction.response.edit_message(embed=embed, view=self)
+                self.prefetch_next()
 
         @discord.ui.button(label="Suivant ▶️", style=discord.ButtonStyle.primary)
         async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
             if (self.current_page + 1) * self.items_per_page < len(self.results):
                 self.current_page += 1
+                # Préchargement encore en cours : l'attendre brièvement (Discord exige une réponse sous 3 s)
+                if self._prefetch is not None and not self._prefetch.done():
+                    await asyncio.wait({self._prefetch}, timeout=1.5)
                 embed = self.cog.create_results_page(self.query, self.results, self.current_page)
                 await interaction.response.edit_message(embed=embed, view=self)
+                self.prefetch_next()
 
     @commands.command(
         name="wiki",
@@ -2,7 +2,6 @@ import discord
 from discord.ext import commands
 import os
 import asyncio
-import yt_dlp
 import re
 from datetime import timedelta
 import logging
@@ -10,6 +9,7 @@ from typing import Optional, Tuple
 from datetime import datetime
 
 from utils.embed_manager import EmbedManager
+from utils.youtube_extractor import youtube_extractor
 
 logger = logging.getLogger("bot")
 
@@ -47,61 +47,20 @@ class YouTubeDownloader(commands.Cog):
         self.icon_url = "https://i.imgur.com/YSQ8PBN.png"
         logger.info("📥 Module YouTube Downloader chargé")
 
-    def get_ydl_opts(self, type: str = "audio") -> dict:
-        """Retourne les options yt-dlp selon le type"""
-        base_opts = {
-            "extract_flat": True,
-            "get_url": True,
-            "quiet": True,
-            "nocheckcertificate": True,
-            "http_headers": {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "fr,fr-FR;q=0.9,en;q=0.8",
-                "Accept-Charset": "ISO-8859-1,utf-8;q=0.7,*;q=0.7",
-            },
-        }
-
-        if type == "audio":
-            return {
-                **base_opts,
-                "format": "bestaudio[ext=mp3]/bestaudio/best",
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                    }
-                ],
-                "prefer_insecure": True,
-                "geo_bypass": True,
-                "geo_bypass_country": "FR",
-            }
-        return {
-            **base_opts,
-            "format": "best[ext=mp4]/best",
-            "prefer_insecure": True,
-            "geo_bypass": True,
-            "geo_bypass_country": "FR",
-        }
+    def cog_unload(self):
+        stats = youtube_extractor.get_stats()
+        logger.info(
+            f"📥 Extractions YouTube: {stats['extractions']} ({stats['avg_ms']} ms en moyenne), "
+            f"cache {stats['hits']} hits, {stats['coalesced']} regroupées"
+        )
 
     async def extract_info(
         self, url: str
     ) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
-        """Extrait les informations de la vidéo"""
+        """Extrait les informations de la vidéo (une seule extraction pour l'audio et la vidéo)"""
         try:
-            # Extraction audio
-            with yt_dlp.YoutubeDL(self.get_ydl_opts("audio")) as ydl:
-                info = ydl.extract_info(url, download=False)
-                audio_url = info.get("url")
-                title = info.get("title", "Audio")
-                thumbnail = info.get("thumbnail")
-
-            # Extraction vidéo
-            with yt_dlp.YoutubeDL(self.get_ydl_opts("video")) as ydl:
-                info = ydl.extract_info(url, download=False)
-                video_url = info.get("url")
-
-            return audio_url, video_url, title, thumbnail
+            video = await youtube_extractor.get_video(self.extract_video_id(url))
+            return video.audio_url, video.video_url, video.title, video.thumbnail
         except Exception as e:
             logger.error(f"Erreur d'extraction: {e}")
             return None, None, None, None
@@ -372,59 +331,16 @@ class YouTubeDownloader(commands.Cog):
         else:
             return f"{minutes:02d}:{seconds:02d}"
 
-    def get_ydl_opts_with_clip(
-        self, type: str = "audio", start_time: int = None, end_time: int = None
-    ) -> dict:
-        """Retourne les options yt-dlp avec clipping"""
-        base_opts = self.get_ydl_opts(type)
-
-        if start_time is not None or end_time is not None:
-            # Ajouter les options de postprocessing pour FFmpeg
-            postprocessors = base_opts.get("postprocessors", [])
-
-            # Créer les arguments FFmpeg pour le clipping
-            ffmpeg_args = []
-            if start_time is not None:
-                ffmpeg_args.extend(["-ss", str(start_time)])
-            if end_time is not None:
-                duration = end_time - (start_time or 0)
-                ffmpeg_args.extend(["-t", str(duration)])
-
-            # Ajouter le postprocessor FFmpeg pour le clipping
-            clip_processor = {
-                "key": "FFmpegVideoConvertor",
-                "preferedformat": "mp4" if type == "video" else "mp3",
-                "when": "before_dl",
-            }
-
-            # Pour l'audio, utiliser FFmpegExtractAudio avec des options de clipping
-            if type == "audio":
-                audio_processor = {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                }
-                postprocessors = [audio_processor]
-
-            base_opts["postprocessors"] = postprocessors
-
-            # Ajouter les options de clipping directement dans les options de téléchargement
-            if ffmpeg_args:
-                base_opts["external_downloader_args"] = {"ffmpeg_i": ffmpeg_args}
-
-        return base_opts
-
     async def extract_info_with_clip(
         self, url: str, start_time: int = None, end_time: int = None
     ) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
         """Extrait les informations de la vidéo avec clipping"""
         try:
-            # D'abord, obtenir les informations de base sans télécharger
-            with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                title = info.get("title", "Video")
-                thumbnail = info.get("thumbnail")
-                duration = info.get("duration", 0)
+            # Même extraction (et même cache) que la vidéo complète : les liens directs ne dépendent pas de l'extrait
+            video = await youtube_extractor.get_video(self.extract_video_id(url))
+            title = video.title
+            thumbnail = video.thumbnail
+            duration = video.duration
 
             # Valider les timestamps
             if end_time and end_time > duration:
@@ -436,18 +352,8 @@ class YouTubeDownloader(commands.Cog):
                     "Le timestamp de début doit être inférieur au timestamp de fin"
                 )
 
-            # Extraction avec clipping
-            audio_ydl_opts = self.get_ydl_opts_with_clip("audio", start_time, end_time)
-            video_ydl_opts = self.get_ydl_opts_with_clip("video", start_time, end_time)
-
-            # Obtenir les URLs directes (sans téléchargement réel)
-            with yt_dlp.YoutubeDL(audio_ydl_opts) as ydl:
-                audio_info = ydl.extract_info(url, download=False)
-                audio_url = audio_info.get("url")
-
-            with yt_dlp.YoutubeDL(video_ydl_opts) as ydl:
-                video_info = ydl.extract_info(url, download=False)
-                video_url = video_info.get("url")
+            audio_url = video.audio_url
+            video_url = video.video_url
 
             # Modifier le titre pour indiquer le clipping
             if start_time is not None or end_time is not None:
@@ -702,16 +608,6 @@ class YouTubeDownloader(commands.Cog):
 
         async with ctx.typing():
             try:
-                # Configuration de yt-dlp pour une recherche YouTube
-                ydl_opts = {
-                    "quiet": True,
-                    "no_warnings": True,
-                    "extract_flat": True,
-                    "default_search": "ytsearch",
-                    "skip_download": True,
-                    "format": "best",
-                }
-
                 # Mettre à jour le message de chargement
                 await loading_msg.edit(
                     embed=self.create_embed(
@@ -721,10 +617,8 @@ class YouTubeDownloader(commands.Cog):
                     )
                 )
 
-                # Effectuer la recherche
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    search_query = f"ytsearch{count}:{query}"
-                    search_results = ydl.extract_info(search_query, download=False)
+                # Effectuer la recherche (dans le pool d'extraction)
+                valid_entries = await youtube_extractor.search(query, count)
 
                 # Mettre à jour le message de chargement
                 await loading_msg.edit(
@@ -736,7 +630,7 @@ class YouTubeDownloader(commands.Cog):
                 )
 
                 # Vérifier si nous avons des résultats
-                if not search_results or not search_results.get("entries"):
+                if not valid_entries:
                     no_results_embed = self.create_embed(
                         f"{EMOJIS['warning']} Aucun résultat",
                         f"Aucune vidéo trouvée pour la recherche : **{query}**",
@@ -745,11 +639,6 @@ class YouTubeDownloader(commands.Cog):
                     await loading_msg.edit(embed=no_results_embed)
                     return
 
-                # Récupérer tous les résultats valides
-                valid_entries = [
-                    entry for entry in search_results.get("entries", []) if entry
-                ]
-
                 # Créer une fonction pour générer un embed pour une page spécifique
                 def create_page_embed(page_num, entries_per_page=5):
                     start_idx = page_num * entries_per_page
@@ -941,10 +830,8 @@ class YouTubeDownloader(commands.Cog):
                     loading_msg, 2, 5, loading_steps[1], emoji_index
                 )
 
-                ydl_opts = {"quiet": True, "no_warnings": True, "skip_download": True}
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
+                # Extraction partagée avec !ytdw (instantanée si la vidéo est en cache)
+                info = (await youtube_extractor.get_video(video_id)).info
 
                 # Phase 3: Analyse
                 emoji_index = await self.update_loading_message(
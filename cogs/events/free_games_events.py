@@ -42,7 +42,7 @@ class EpicGamesEvents(commands.Cog):
             cache = self.epic_games.load_announced_games()
             announced_games = cache.get("games", [])
             
-            games, current_game_ids = self.epic_games.get_free_games()
+            games, current_game_ids = await self.epic_games.get_free_games()
             if not games:
                 return
             
@@ -83,7 +83,7 @@ class EpicGamesEvents(commands.Cog):
     async def check_steam_games(self, channel):
         """Vérifie les jeux Steam"""
         try:
-            games, current_game_ids = self.epic_games.get_steam_free_games()
+            games, current_game_ids = await self.epic_games.get_steam_free_games()
             if not games:
                 return
             
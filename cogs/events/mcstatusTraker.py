@@ -1,331 +1,363 @@
 import discord
 from discord.ext import commands
 from discord import ui
-from mcstatus import JavaServer
-import socket
 import asyncio
-import os
-from dotenv import load_dotenv
 import logging
+import time
 from datetime import datetime
 import pytz  # Pour gérer les fuseaux horaires
-import re
 import json
+from typing import Dict, Optional
+from config import Config
+from utils.database import db_manager
 from utils.embed_manager import EmbedManager
+from utils.mc_probe import ServerStatus, mc_probe
+from utils.mc_scheduler import MCStatusScheduler
+from utils.ttl_cache import AsyncTTLCache
 
 logger = logging.getLogger('bot')
 
+STATUS_TITLE = "📊 Statut du serveur Minecraft"
+# Mise à jour périodique du message même sans changement (secondes)
+PERIODIC_UPDATE = 3600
+
+
+def get_paris_time():
+    """Renvoie l'heure actuelle dans le fuseau horaire de Paris, arrondie à la minute"""
+    paris_tz = pytz.timezone('Europe/Paris')
+    paris_time = datetime.now(paris_tz)
+    # Supprimer les secondes et microsecondes pour arrondir à la minute
+    paris_time = paris_time.replace(second=0, microsecond=0)
+    return paris_time.strftime('%d/%m/%Y %H:%M')  # Format amélioré avec l'année
+
+
+def detect_server_type(version_name, motd=None):
+    """Détecte le type de serveur à partir de la version et du motd"""
+    # Initialiser les résultats de détection
+    server_type = "❔ Inconnu ou Vanilla"
+
+    # Convertir en minuscules pour faciliter la détection
+    version_lower = version_name.lower() if version_name else ""
+    motd_text = ""
+
+    # Extraire le texte du MOTD s'il existe
+    if motd:
+        if hasattr(motd, 'text'):
+            motd_text = motd.text.lower()
+        elif hasattr(motd, 'raw'):
+            motd_text = motd.raw.lower()
+        elif hasattr(motd, 'extra'):
+            # Pour les MOTD avec composants "extra"
+            motd_text = "".join(comp.get('text', '') for comp in motd.extra).lower()
+        elif isinstance(motd, str):
+            motd_text = motd.lower()
+        elif isinstance(motd, dict):
+            # Pour les MOTD au format JSON
+            motd_text = json.dumps(motd).lower()
+
+    # Combiner les deux sources pour la détection
+    combined_text = f"{version_lower} {motd_text}"
+
+    # Détection des types de serveur courants basée sur le texte combiné
+    if "fabric" in combined_text:
+        server_type = "🧵 Fabric"
+    elif "quilt" in combined_text:
+        server_type = "🪡 Quilt"
+    elif "neoforge" in combined_text:
+        server_type = ":fox: NeoForge"
+    elif "forge" in combined_text or "fml" in combined_text:
+        server_type = "🔨 Forge"
+    elif "paper" in combined_text:
+        server_type = "📝 Paper"
+    elif "purpur" in combined_text:
+        server_type = "🟣 Purpur"
+    elif "pufferfish" in combined_text:
+        server_type = "🐡 Pufferfish (optimisé Paper)"
+    elif "airplane" in combined_text:
+        server_type = "✈️ Airplane"
+    elif "spigot" in combined_text:
+        server_type = "🔌 Spigot"
+    elif "taco" in combined_text:
+        server_type = "🌮 TacoSpigot (optimisé Spigot)"
+    elif "bukkit" in combined_text:
+        server_type = "🪣 Bukkit"
+    elif "sponge" in combined_text:
+        server_type = "🧽 Sponge"
+    elif "mohist" in combined_text:
+        server_type = "⚙️ Mohist (Forge + Bukkit)"
+    elif "catserver" in combined_text:
+        server_type = "🐱 CatServer (Forge + Bukkit)"
+    elif "arclight" in combined_text:
+        server_type = "💡 Arclight (Forge + Bukkit)"
+    elif "magma" in combined_text:
+        server_type = "🔥 Magma (Forge + Bukkit)"
+    elif "vanilla" in combined_text:
+        server_type = "🍦 Vanilla"
+    elif "cuberite" in combined_text:
+        server_type = "🧊 Cuberite (C++ vanilla-like)"
+    elif "velocity" in combined_text:
+        server_type = "⚡ Velocity (proxy)"
+    elif "waterfall" in combined_text:
+        server_type = "💧 Waterfall (proxy)"
+    elif "travertine" in combined_text:
+        server_type = "⛲ Travertine (proxy)"
+    elif "bungeecord" in combined_text or "bungee" in combined_text:
+        server_type = "🔀 BungeeCord (proxy)"
+    elif "modded" in combined_text or "mod" in combined_text:
+        server_type = "🔧 Modded"
+
+    return server_type
+
+
+def is_status_message(message, bot_user):
+    """Indique si un message est un message de statut Minecraft du bot"""
+    return (
+        message.author == bot_user and message.embeds
+        and (message.embeds[0].title or "").startswith(STATUS_TITLE)
+    )
+
+
 # Bouton de rafraîchissement personnalisé
 class RefreshButton(ui.Button):
-    def __init__(self, tracker):
+    def __init__(self, monitor):
         super().__init__(style=discord.ButtonStyle.primary, emoji="🔄", label="Actualiser")
-        self.tracker = tracker
-    
+        self.monitor = monitor
+
     async def callback(self, interaction):
+        # Un membre ne peut relancer l'actualisation qu'après un court délai
+        if not self.monitor.accept_click(interaction.user.id):
+            await interaction.response.send_message(
+                "⏳ Le statut vient d'être actualisé, réessayez dans quelques secondes.", ephemeral=True
+            )
+            return
+
         # Indiquer que le bot traite la demande
         await interaction.response.defer()
-        
-        # Obtenir le nouvel embed de statut
-        current_status, embed, player_count, current_player_list = await self.tracker.get_status_embed()
-        
-        # Mettre à jour le message avec le nouvel embed et le bouton
-        view = ui.View()
-        view.add_item(RefreshButton(self.tracker))
-        view.timeout = None  # Le bouton ne disparaît pas
-        
+
+        status_message = self.monitor.status_message
+        if status_message is not None and status_message.id == interaction.message.id:
+            # Clics simultanés : une seule sonde et une seule modification du message
+            await self.monitor.refresh()
+            return
+
+        # Ancien message de statut (remplacé depuis) : le mettre à jour directement
+        _, embed = await self.monitor.get_status_embed()
         await interaction.followup.edit_message(
             message_id=interaction.message.id,
             embed=embed,
-            view=view
+            view=self.monitor.make_view()
         )
 
-class MCStatusTracker(commands.Cog):
-    def __init__(self, bot):
+
+class ServerMonitor:
+    """Suivi d'un serveur Minecraft pour un serveur Discord : message de statut et notifications"""
+
+    def __init__(self, bot, scheduler: MCStatusScheduler, guild_id: int, host: str, port: int,
+                 channel_id: int, role_id: int = None):
         self.bot = bot
-        # Centraliser la configuration
-        self.load_config()
+        self.scheduler = scheduler
+        self.guild_id = guild_id
+        self.SERVER_IP = host
+        self.PORT = port
+        self.STATUS_CHANNEL_ID = channel_id
+        self.NOTIFICATION_ROLE_ID = role_id or 0
         self.status_message = None
         self.previous_player_count = 0
         self.previous_player_list = []
         self.previous_server_status = None
         self.error_messages = []
         self.player_notify_messages = []
-        self.previous_latency = 0  
+        self.previous_latency = 0
         self.high_latency_threshold = 200
         self.critical_latency_threshold = 500
-        
-        # Ajout d'un compteur pour les mises à jour horaires
-        self.hourly_update_counter = 0
-        
-        # Créer une tâche asynchrone pour le suivi du serveur
-        self.server_tracker = None
-        bot.loop.create_task(self.initialize_status_message())
-        
-    def load_config(self):
-        """Charge la configuration depuis le JSON"""
-        try:
-            with open('data/user_preferences.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                mc_config = config.get('minecraft', {})
-                self.SERVER_IP = mc_config.get('server', {}).get('ip', 'localhost')
-                self.PORT = int(mc_config.get('server', {}).get('port', '25565'))
-                self.STATUS_CHANNEL_ID = int(mc_config.get('discord', {}).get('statusChannelId', '0'))
-                self.NOTIFICATION_ROLE_ID = int(mc_config.get('discord', {}).get('notificationRoleId', '0'))
-        except Exception as e:
-            logger.error(f"❌ Erreur lors du chargement de la configuration: {e}")
-            self.SERVER_IP = 'localhost'
-            self.PORT = 25565
-            self.STATUS_CHANNEL_ID = 0 
-            self.NOTIFICATION_ROLE_ID = 0
-            
-    def reload_config(self):
-        """Recharge la configuration et replace le message de statut dans le bon salon si besoin"""
-        old_channel_id = self.STATUS_CHANNEL_ID
-        self.load_config()
-        # Si le salon a changé, réinitialiser le message de statut dans le bon salon
-        if old_channel_id != self.STATUS_CHANNEL_ID:
-            self.status_message = None
-            self.bot.loop.create_task(self.find_or_create_status_message())
-        else:
-            # Toujours s'assurer que le message est dans le bon salon
-            self.bot.loop.create_task(self.find_or_create_status_message())
-    
-    def get_paris_time(self):
-        """Renvoie l'heure actuelle dans le fuseau horaire de Paris, arrondie à la minute"""
-        paris_tz = pytz.timezone('Europe/Paris')
-        paris_time = datetime.now(paris_tz)
-        # Supprimer les secondes et microsecondes pour arrondir à la minute
-        paris_time = paris_time.replace(second=0, microsecond=0)
-        return paris_time.strftime('%d/%m/%Y %H:%M')  # Format amélioré avec l'année
-    
-    async def initialize_status_message(self):
-        """Initialise le message de statut au démarrage du bot"""
-        await self.bot.wait_until_ready()
-        await self.find_or_create_status_message()
-        self.server_tracker = self.bot.loop.create_task(self.track_server_status())
-    
+        # Dernière modification du message de statut (pour la mise à jour horaire)
+        self.last_update = 0.0
+        # Statut actuellement affiché (un même résultat partagé n'est jamais réaffiché)
+        self.displayed_status = None
+        # Actualisation manuelle en cours, partagée par les clics simultanés
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Membres ayant cliqué récemment sur Actualiser
+        self._recent_clicks = AsyncTTLCache(maxsize=1024, ttl=Config.MC_REFRESH_COOLDOWN)
+
+    @property
+    def channel(self):
+        return self.bot.get_channel(self.STATUS_CHANNEL_ID)
+
+    def same_target(self, host: str, port: int, channel_id: int, role_id: int = None) -> bool:
+        return (self.SERVER_IP, self.PORT, self.STATUS_CHANNEL_ID, self.NOTIFICATION_ROLE_ID) == \
+            (host, port, channel_id, role_id or 0)
+
+    def make_view(self):
+        """Vue avec le bouton de rafraîchissement (le bouton ne disparaît pas)"""
+        view = ui.View(timeout=None)
+        view.add_item(RefreshButton(self))
+        return view
+
     async def find_or_create_status_message(self):
         """Cherche un message de statut existant ou en crée un nouveau dans le salon configuré"""
-        # Toujours recharger la config pour être sûr d'avoir le bon salon
-        self.load_config()
-        channel = self.bot.get_channel(self.STATUS_CHANNEL_ID)
+        channel = self.channel
         if not channel:
-            logger.error(f"❌ Canal de statut introuvable (ID: {self.STATUS_CHANNEL_ID})")
+            logger.error(f"❌ Canal de statut introuvable (ID: {self.STATUS_CHANNEL_ID}, serveur {self.guild_id})")
             return
 
-        # Nettoyer tous les anciens messages de statut dans tous les salons où le bot a accès
-        # (pour éviter d'avoir plusieurs messages de statut dans plusieurs salons)
-        for guild in self.bot.guilds:
-            for ch in guild.text_channels:
-                try:
-                    async for message in ch.history(limit=50):
-                        if message.author == self.bot.user and message.embeds and message.embeds[0].title.startswith("📊 Statut du serveur Minecraft"):
-                            if ch.id != self.STATUS_CHANNEL_ID or self.status_message is None:
-                                try:
-                                    await message.delete()
-                                    await asyncio.sleep(0.2)
-                                except Exception:
-                                    pass
-                            else:
-                                self.status_message = message
-                except Exception:
-                    continue
-
         # Chercher les messages du bot dans le salon cible
         bot_messages = []
         async for message in channel.history(limit=50):
-            if message.author == self.bot.user and message.embeds and message.embeds[0].title.startswith("📊 Statut du serveur Minecraft"):
+            if is_status_message(message, self.bot.user):
                 bot_messages.append(message)
 
         # Supprimer tous les messages du bot dans le canal sauf le plus récent
         if bot_messages:
-            for i, message in enumerate(bot_messages):
-                if i > 0:  # Garder le premier message (le plus récent)
-                    try:
-                        await message.delete()
-                        await asyncio.sleep(0.2)
-                    except Exception as e:
-                        logger.error(f"Erreur lors de la suppression d'un message: {e}")
+            for message in bot_messages[1:]:
+                try:
+                    await message.delete()
+                    await asyncio.sleep(0.2)
+                except Exception as e:
+                    logger.error(f"Erreur lors de la suppression d'un message: {e}")
 
-            # Utiliser le message le plus récent comme message de statut
+            # Utiliser le message le plus récent comme message de statut (mis à jour par la première sonde)
             self.status_message = bot_messages[0]
             logger.info(f"✅ Message de statut existant trouvé (ID: {self.status_message.id}) dans le salon {channel.id}")
-
-            # Ajouter le bouton de rafraîchissement
-            view = ui.View()
-            view.add_item(RefreshButton(self))
-            view.timeout = None
-
-            # Mise à jour initiale
-            current_status, embed, player_count, current_player_list = await self.get_status_embed()
-            await self.status_message.edit(embed=embed, view=view)
         else:
             # Créer un nouveau message si aucun n'existe
             embed = EmbedManager.create_embed(
-                title="📊 Statut du serveur Minecraft",
+                title=STATUS_TITLE,
                 description="🔄 **Initialisation du statut...**\nVeuillez patienter pendant que je vérifie le serveur.",
                 color=discord.Color.blue()  # Couleur spécifique pour le statut
             )
+            self.status_message = await channel.send(embed=embed, view=self.make_view())
+            logger.info(f"✅ Nouveau message de statut créé (ID: {self.status_message.id}) dans le salon {channel.id}")
 
-            # Ajouter le bouton de rafraîchissement
-            view = ui.View()
-            view.add_item(RefreshButton(self))
-            view.timeout = None
+    def accept_click(self, user_id: int) -> bool:
+        """Limite les actualisations manuelles à une par membre et par délai MC_REFRESH_COOLDOWN"""
+        if user_id in self._recent_clicks:
+            return False
+        self._recent_clicks.set(user_id, True)
+        return True
 
-            self.status_message = await channel.send(embed=embed, view=view)
-            logger.info(f"✅ Nouveau message de statut créé (ID: {self.status_message.id}) dans le salon {channel.id}")
-    
-    async def track_server_status(self):
-        """Suit le statut du serveur en continu"""
-        try:
-            channel = self.bot.get_channel(self.STATUS_CHANNEL_ID)
-            if not channel:
-                logger.error(f"❌ Canal de statut introuvable (ID: {self.STATUS_CHANNEL_ID})")
+    async def refresh(self):
+        """Actualisation manuelle : les demandes simultanées partagent la même sonde et la même modification"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh(self):
+        status = await self.get_status()
+        await self.update_status_message(self.build_status_embed(status), status)
+
+    async def update_status_message(self, embed, status: ServerStatus = None):
+        """Met à jour le message de statut, ou en envoie un nouveau s'il a disparu"""
+        # Résultat partagé déjà affiché (actualisation manuelle et suivi sur la même sonde)
+        if status is not None and status is self.displayed_status:
+            return
+        channel = self.channel
+        if self.status_message is not None:
+            try:
+                await self.status_message.edit(embed=embed, view=self.make_view())
+                self.displayed_status = status
+                self.last_update = time.monotonic()
                 return
-                
-            # Vérifier que le message de statut existe
-            if not self.status_message:
-                await self.find_or_create_status_message()
-            
-            # Première vérification pour initialiser l'état
-            current_status, embed, player_count, current_player_list = await self.get_status_embed()
-            
-            # Ajouter le bouton de rafraîchissement
-            view = ui.View()
-            view.add_item(RefreshButton(self))
-            view.timeout = None
-            
-            await self.status_message.edit(embed=embed, view=view)
+            except discord.NotFound:
+                logger.warning("⚠️ Message de statut non trouvé, création d'un nouveau message")
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de la mise à jour du message: {str(e)}")
+        if channel is None:
+            return
+        try:
+            self.status_message = await channel.send(embed=embed, view=self.make_view())
+            self.displayed_status = status
+            self.last_update = time.monotonic()
+        except Exception as e2:
+            logger.error(f"❌ Erreur lors de la création d'un nouveau message: {str(e2)}")
+
+    async def handle_status(self, status: ServerStatus) -> bool:
+        """Traite le résultat d'une sonde ; retourne True en cas d'activité (contrôle rapproché)"""
+        current_status = status.online
+        player_count = status.players_online
+        current_player_list = status.player_names
+
+        # Première sonde : initialiser l'état et afficher le statut
+        if self.previous_server_status is None:
+            await self.update_status_message(self.build_status_embed(status), status)
             self.previous_server_status = current_status
             self.previous_player_count = player_count
             self.previous_player_list = current_player_list
-            
-            while not self.bot.is_closed():
-                current_status, embed, player_count, current_player_list = await self.get_status_embed()
-                
-                # Déterminer s'il faut mettre à jour le message
-                state_changed = current_status != self.previous_server_status
-                new_players = self.detect_new_players(current_player_list)
-                left_players = self.detect_left_players(current_player_list)
-                players_changed = len(current_player_list) != len(self.previous_player_list)
-                
-                # Mettre à jour le compteur pour les mises à jour horaires (60 itérations * 60 secondes = 1 heure)
-                self.hourly_update_counter += 1
-                hourly_update = self.hourly_update_counter >= 60
-                if hourly_update:
-                    self.hourly_update_counter = 0
-                
-                # Vérification de latence
-                latency_spike = False
-                current_latency = 0
-                
-                if hasattr(embed, 'fields'):
-                    for field in embed.fields:
-                        if field.name == "📶 Latence":
-                            # Extraire la valeur de latence de la chaîne
-                            match = re.search(r'(\d+(\.\d+)?)', field.value)
-                            if match:
-                                current_latency = float(match.group(1))
-                                # Détecter si c'est un pic de latence ou changement significatif
-                                if self.previous_latency > 0:
-                                    latency_change = abs(current_latency - self.previous_latency)
-                                    
-                                    # Critères de déclenchement de mise à jour pour la latence:
-                                    latency_spike = (
-                                        (latency_change > 100) or 
-                                        (self.previous_latency > 100 and latency_change / self.previous_latency > 0.3) or
-                                        (current_latency > self.critical_latency_threshold)
-                                    )
-                                    
-                                    if latency_spike:
-                                        logger.warning(f"⚠️ Changement de latence important: {self.previous_latency}ms → {current_latency}ms")
-                                
-                                # Mettre à jour la latence précédente
-                                self.previous_latency = current_latency
-                
-                # Mettre à jour le message si :
-                # - l'état du serveur a changé
-                # - un joueur a rejoint ou quitté
-                # - il y a un pic de latence
-                # - c'est l'heure de la mise à jour périodique (toutes les heures)
-                player_activity = new_players or left_players or players_changed
-                update_needed = state_changed or player_activity or latency_spike or hourly_update
-                
-                if update_needed:
-                    # Notifier des changements d'état
-                    if state_changed:
-                        await self.notify_status_change(channel, current_status)
-                    
-                    # Notifier des nouveaux joueurs avec des popups éphémères
-                    if new_players and current_status:
-                        await self.notify_new_players(channel, new_players, player_count)
-                        logger.info(f"👋 Joueurs connectés: {', '.join(new_players)} - Mise à jour du statut")
-                        
-                    # Notifier des joueurs déconnectés avec des popups éphémères
-                    if left_players and current_status:
-                        await self.notify_left_players(channel, left_players, player_count)
-                        logger.info(f"👋 Joueurs déconnectés: {', '.join(left_players)} - Mise à jour du statut")
-                    
-                    # Garantir que le message de statut principal est toujours à jour
-                    try:
-                        # Ajouter le bouton de rafraîchissement
-                        view = ui.View()
-                        view.add_item(RefreshButton(self))
-                        view.timeout = None
-                        
-                        # Mettre à jour l'embed pour refléter les nouveaux joueurs et ceux qui sont partis
-                        if player_activity:
-                            # Mettre à jour l'embed pour refléter le changement de joueurs
-                            current_status, embed, player_count, current_player_list = await self.get_status_embed()
-                        
-                        # Essayer de mettre à jour le message existant
-                        await self.status_message.edit(embed=embed, view=view)
-                        
-                        # Journalisation des mises à jour
-                        if player_activity:
-                            logger.info("✅ Message de statut mis à jour avec les changements de joueurs")
-                        elif hourly_update:
-                            logger.info("⏱️ Mise à jour horaire du statut effectuée")
-                            
-                    except discord.NotFound:
-                        # Le message a été supprimé, en créer un nouveau
-                        logger.warning("⚠️ Message de statut non trouvé, création d'un nouveau message")
-                        view = ui.View()
-                        view.add_item(RefreshButton(self))
-                        view.timeout = None
-                        self.status_message = await channel.send(embed=embed, view=view)
-                    except Exception as e:
-                        # Autre erreur, créer un nouveau message
-                        logger.error(f"❌ Erreur lors de la mise à jour du message: {str(e)}")
-                        try:
-                            view = ui.View()
-                            view.add_item(RefreshButton(self))
-                            view.timeout = None
-                            self.status_message = await channel.send(embed=embed, view=view)
-                        except Exception as e2:
-                            logger.error(f"❌ Erreur lors de la création d'un nouveau message: {str(e2)}")
-                    
-                    # Supprimer les messages d'erreur si le serveur est en ligne après une déconnexion
-                    if current_status and self.previous_server_status is False and self.error_messages:
-                        await self.clean_error_messages(channel)
-                
-                # Mettre à jour les valeurs précédentes
-                self.previous_server_status = current_status
-                self.previous_player_count = player_count
-                self.previous_player_list = current_player_list
-                
-                # Réduire l'intervalle de vérification si joueurs changent fréquemment
-                check_interval = 15 if player_activity else (30 if latency_spike else 60)
-                await asyncio.sleep(check_interval)
-                
-        except Exception as e:
-            logger.error(f"❌ Erreur dans le tracker: {str(e)}")
-            if self.server_tracker:
-                self.server_tracker.cancel()
-            # Redémarrer le tracker après une erreur
-            await asyncio.sleep(30)
-            self.server_tracker = self.bot.loop.create_task(self.track_server_status())
-    
+            self.previous_latency = status.latency
+            return False
+
+        channel = self.channel
+
+        # Déterminer s'il faut mettre à jour le message
+        state_changed = current_status != self.previous_server_status
+        new_players = self.detect_new_players(current_player_list)
+        left_players = self.detect_left_players(current_player_list)
+        players_changed = len(current_player_list) != len(self.previous_player_list)
+        hourly_update = time.monotonic() - self.last_update >= PERIODIC_UPDATE
+
+        # Vérification de latence
+        latency_spike = False
+        if current_status:
+            current_latency = status.latency
+            # Détecter si c'est un pic de latence ou changement significatif
+            if self.previous_latency > 0:
+                latency_change = abs(current_latency - self.previous_latency)
+
+                # Critères de déclenchement de mise à jour pour la latence:
+                latency_spike = (
+                    (latency_change > 100) or
+                    (self.previous_latency > 100 and latency_change / self.previous_latency > 0.3) or
+                    (current_latency > self.critical_latency_threshold)
+                )
+
+                if latency_spike:
+                    logger.warning(f"⚠️ Changement de latence important: {self.previous_latency}ms → {current_latency}ms")
+
+            # Mettre à jour la latence précédente
+            self.previous_latency = current_latency
+
+        # Mettre à jour le message si :
+        # - l'état du serveur a changé
+        # - un joueur a rejoint ou quitté
+        # - il y a un pic de latence
+        # - c'est l'heure de la mise à jour périodique (toutes les heures)
+        player_activity = bool(new_players or left_players or players_changed)
+        update_needed = state_changed or player_activity or latency_spike or hourly_update
+
+        if update_needed and channel is not None:
+            # Notifier des changements d'état
+            if state_changed:
+                await self.notify_status_change(channel, current_status)
+
+            # Notifier des nouveaux joueurs avec des popups éphémères
+            if new_players and current_status:
+                await self.notify_new_players(channel, new_players, player_count)
+                logger.info(f"👋 Joueurs connectés: {', '.join(new_players)} - Mise à jour du statut")
+
+            # Notifier des joueurs déconnectés avec des popups éphémères
+            if left_players and current_status:
+                await self.notify_left_players(channel, left_players, player_count)
+                logger.info(f"👋 Joueurs déconnectés: {', '.join(left_players)} - Mise à jour du statut")
+
+            # Garantir que le message de statut principal est toujours à jour
+            await self.update_status_message(self.build_status_embed(status), status)
+
+            # Journalisation des mises à jour
+            if player_activity:
+                logger.info("✅ Message de statut mis à jour avec les changements de joueurs")
+            elif hourly_update:
+                logger.info("⏱️ Mise à jour horaire du statut effectuée")
+
+            # Supprimer les messages d'erreur si le serveur est en ligne après une déconnexion
+            if current_status and self.previous_server_status is False and self.error_messages:
+                await self.clean_error_messages(channel)
+
+        # Mettre à jour les valeurs précédentes
+        self.previous_server_status = current_status
+        self.previous_player_count = player_count
+        self.previous_player_list = current_player_list
+
+        return player_activity or latency_spike
+
     def detect_new_players(self, current_player_list):
         """Détecte les nouveaux joueurs qui se sont connectés"""
         new_players = []
@@ -333,7 +365,7 @@ class MCStatusTracker(commands.Cog):
             if player not in self.previous_player_list:
                 new_players.append(player)
         return new_players
-    
+
     def detect_left_players(self, current_player_list):
         """Détecte les joueurs qui se sont déconnectés"""
         left_players = []
@@ -341,7 +373,21 @@ class MCStatusTracker(commands.Cog):
             if player not in current_player_list:
                 left_players.append(player)
         return left_players
-    
+
+    def _expire_notification(self, msg, delay):
+        """Supprime une notification de joueurs après delay secondes, sans bloquer le suivi"""
+        async def expire():
+            await asyncio.sleep(delay)
+            try:
+                await msg.delete()
+            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+                pass  # Ignorer si le message a déjà été supprimé ou si on n'a pas les permissions
+            # Supprimer l'ID du message de la liste des messages à nettoyer
+            if msg.id in self.player_notify_messages:
+                self.player_notify_messages.remove(msg.id)
+
+        self.bot.loop.create_task(expire())
+
     async def notify_new_players(self, channel, new_players, total_players):
         """Notifie lorsque de nouveaux joueurs rejoignent le serveur"""
         if new_players:
@@ -351,7 +397,7 @@ class MCStatusTracker(commands.Cog):
                 description=f"De nouveaux joueurs ont rejoint le serveur Minecraft.",
                 color=discord.Color.gold()
             )
-            
+
             # Listing des nouveaux joueurs
             players_text = ", ".join(f"**{player}**" for player in new_players)
             embed.add_field(
@@ -359,30 +405,21 @@ class MCStatusTracker(commands.Cog):
                 value=players_text,
                 inline=False
             )
-            
+
             # Information sur le nombre total de joueurs
             embed.add_field(
                 name="👥 Total de joueurs",
                 value=f"**{total_players}** joueurs en ligne actuellement",
                 inline=False
             )
-            
+
             # Ajouter l'heure de connexion
-            embed.set_footer(text=f"Connecté(s) à {self.get_paris_time()} (heure de Paris)")
-            
-            # Envoyer l'annonce
+            embed.set_footer(text=f"Connecté(s) à {get_paris_time()} (heure de Paris)")
+
+            # Envoyer l'annonce, supprimée après 1 minute
             msg = await channel.send(embed=embed)
             self.player_notify_messages.append(msg.id)
-            
-            # Programmer la suppression du message après 2 minutes
-            await asyncio.sleep(60)  # 1 minutes
-            try:
-                await msg.delete()
-                # Supprimer l'ID du message de la liste des messages à nettoyer
-                if msg.id in self.player_notify_messages:
-                    self.player_notify_messages.remove(msg.id)
-            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
-                pass  # Ignorer si le message a déjà été supprimé ou si on n'a pas les permissions
+            self._expire_notification(msg, 60)
 
     async def notify_left_players(self, channel, left_players, total_players):
         """Notifie lorsque des joueurs quittent le serveur"""
@@ -393,7 +430,7 @@ class MCStatusTracker(commands.Cog):
                 description=f"Des joueurs ont quitté le serveur Minecraft.",
                 color=discord.Color.orange()
             )
-            
+
             # Listing des joueurs déconnectés
             players_text = ", ".join(f"**{player}**" for player in left_players)
             embed.add_field(
@@ -401,30 +438,21 @@ class MCStatusTracker(commands.Cog):
                 value=players_text,
                 inline=False
             )
-            
+
             # Information sur le nombre total de joueurs
             embed.add_field(
                 name="👥 Total de joueurs",
                 value=f"**{total_players}** joueurs en ligne actuellement",
                 inline=False
             )
-            
+
             # Ajouter l'heure de déconnexion
-            embed.set_footer(text=f"Déconnecté(s) à {self.get_paris_time()} (heure de Paris)")
-            
-            # Envoyer l'annonce
+            embed.set_footer(text=f"Déconnecté(s) à {get_paris_time()} (heure de Paris)")
+
+            # Envoyer l'annonce, supprimée après 2 minutes
             msg = await channel.send(embed=embed)
             self.player_notify_messages.append(msg.id)
-            
-            # Programmer la suppression du message après 2 minutes
-            await asyncio.sleep(120)  # 2 minutes
-            try:
-                await msg.delete()
-                # Supprimer l'ID du message de la liste des messages à nettoyer
-                if msg.id in self.player_notify_messages:
-                    self.player_notify_messages.remove(msg.id)
-            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
-                pass  # Ignorer si le message a déjà été supprimé ou si on n'a pas les permissions
+            self._expire_notification(msg, 120)
 
     async def clean_error_messages(self, channel):
         """Supprime les messages d'erreur précédents"""
@@ -437,7 +465,7 @@ class MCStatusTracker(commands.Cog):
                     pass  # Message déjà supprimé
                 except Exception as e:
                     logger.error(f"Erreur lors de la suppression du message: {e}")
-            
+
             self.error_messages = []  # Réinitialiser la liste des messages d'erreur
         except Exception as e:
             logger.error(f"Erreur lors du nettoyage des messages: {e}")
@@ -463,12 +491,12 @@ class MCStatusTracker(commands.Cog):
             # Premier état détecté, juste enregistrer
             self.previous_server_status = current_status
             return
-        
+
         # Vérifier si l'état a changé
         if current_status != self.previous_server_status:
-            # S'assurer que le rôle est mentionné correctement
-            role_mention = f"<@&{self.NOTIFICATION_ROLE_ID}>"
-            
+            # Mentionner le rôle de notification s'il est configuré
+            role_mention = f"<@&{self.NOTIFICATION_ROLE_ID}>" if self.NOTIFICATION_ROLE_ID else None
+
             if current_status:
                 # Le serveur est revenu en ligne - créer un embed
                 embed = discord.Embed(
@@ -476,12 +504,12 @@ class MCStatusTracker(commands.Cog):
                     description=f"Le serveur est à nouveau accessible!\n\n**Adresse:** `{self.SERVER_IP}`",
                     color=discord.Color.green()
                 )
-                embed.set_footer(text=f"Serveur en ligne depuis {self.get_paris_time()} (heure de Paris)")
-                
+                embed.set_footer(text=f"Serveur en ligne depuis {get_paris_time()} (heure de Paris)")
+
                 # Envoyer la notification avec le rôle mentionné
                 status_msg = await channel.send(content=role_mention, embed=embed)
                 self.error_messages.append(status_msg.id)  # Pour pouvoir le supprimer plus tard si besoin
-                
+
                 # Ne pas supprimer les notifications d'état en ligne
             else:
                 # Le serveur est tombé hors ligne - créer un embed
@@ -490,122 +518,31 @@ class MCStatusTracker(commands.Cog):
                     description="Le serveur n'est plus accessible. Une notification sera envoyée dès que le serveur sera de nouveau en ligne.",
                     color=discord.Color.red()
                 )
-                embed.set_footer(text=f"Hors ligne depuis {self.get_paris_time()} (heure de Paris)")
-                
+                embed.set_footer(text=f"Hors ligne depuis {get_paris_time()} (heure de Paris)")
+
                 # Envoyer la notification avec le rôle mentionné
                 status_msg = await channel.send(content=role_mention, embed=embed)
                 self.error_messages.append(status_msg.id)
-                
-                # Ne pas supprimer les notifications de hors ligne
 
-    def detect_server_type(self, version_name, motd=None):
-        """Détecte le type de serveur à partir de la version et du motd"""
-        # Initialiser les résultats de détection
-        server_type = "❔ Inconnu ou Vanilla"
-        
-        # Convertir en minuscules pour faciliter la détection
-        version_lower = version_name.lower() if version_name else ""
-        motd_text = ""
-        
-        # Extraire le texte du MOTD s'il existe
-        if motd:
-            if hasattr(motd, 'text'):
-                motd_text = motd.text.lower()
-            elif hasattr(motd, 'raw'):
-                motd_text = motd.raw.lower()
-            elif hasattr(motd, 'extra'):
-                # Pour les MOTD avec composants "extra"
-                motd_text = "".join(comp.get('text', '') for comp in motd.extra).lower()
-            elif isinstance(motd, str):
-                motd_text = motd.lower()
-            elif isinstance(motd, dict):
-                # Pour les MOTD au format JSON
-                motd_text = json.dumps(motd).lower()
-        
-        # Combiner les deux sources pour la détection
-        combined_text = f"{version_lower} {motd_text}"
-        
-        # Détection des types de serveur courants basée sur le texte combiné
-        if "fabric" in combined_text:
-            server_type = "🧵 Fabric"
-        elif "quilt" in combined_text:
-            server_type = "🪡 Quilt"
-        elif "neoforge" in combined_text:
-            server_type = ":fox: NeoForge"
-        elif "forge" in combined_text or "fml" in combined_text:
-            server_type = "🔨 Forge"
-        elif "paper" in combined_text:
-            server_type = "📝 Paper"
-        elif "purpur" in combined_text:
-            server_type = "🟣 Purpur"
-        elif "pufferfish" in combined_text:
-            server_type = "🐡 Pufferfish (optimisé Paper)"
-        elif "airplane" in combined_text:
-            server_type = "✈️ Airplane"
-        elif "spigot" in combined_text:
-            server_type = "🔌 Spigot"
-        elif "taco" in combined_text:
-            server_type = "🌮 TacoSpigot (optimisé Spigot)"
-        elif "bukkit" in combined_text:
-            server_type = "🪣 Bukkit"
-        elif "sponge" in combined_text:
-            server_type = "🧽 Sponge"
-        elif "mohist" in combined_text:
-            server_type = "⚙️ Mohist (Forge + Bukkit)"
-        elif "catserver" in combined_text:
-            server_type = "🐱 CatServer (Forge + Bukkit)"
-        elif "arclight" in combined_text:
-            server_type = "💡 Arclight (Forge + Bukkit)"
-        elif "magma" in combined_text:
-            server_type = "🔥 Magma (Forge + Bukkit)"
-        elif "vanilla" in combined_text:
-            server_type = "🍦 Vanilla"
-        elif "cuberite" in combined_text:
-            server_type = "🧊 Cuberite (C++ vanilla-like)"
-        elif "velocity" in combined_text:
-            server_type = "⚡ Velocity (proxy)"
-        elif "waterfall" in combined_text:
-            server_type = "💧 Waterfall (proxy)"
-        elif "travertine" in combined_text:
-            server_type = "⛲ Travertine (proxy)"
-        elif "bungeecord" in combined_text or "bungee" in combined_text:
-            server_type = "🔀 BungeeCord (proxy)"
-        elif "modded" in combined_text or "mod" in combined_text:
-            server_type = "🔧 Modded"
-        
-        return server_type
-
-    async def get_status_embed(self):
-        """Obtient l'embed de statut actuel et retourne également l'état du serveur"""
-        try:
-            # Test de résolution DNS
-            try:
-                ip = socket.gethostbyname(self.SERVER_IP)
-            except socket.gaierror:
-                raise ConnectionError("Serveur hors ligne")
+                # Ne pas supprimer les notifications de hors ligne
 
-            # Test de connexion au serveur
-            server = JavaServer(ip, self.PORT)
-            status = server.status()
-            
-            # Liste des joueurs connectés
-            current_player_list = []
-            if status.players.online > 0 and hasattr(status.players, 'sample'):
-                current_player_list = [p.name for p in status.players.sample]
-
-            # Récupérer le MOTD de manière plus robuste
-            motd = None
-            if hasattr(status, 'description'):
-                motd = status.description
-            elif hasattr(status, 'motd'):
-                motd = status.motd
+    async def get_status(self) -> ServerStatus:
+        """Statut du serveur suivi : résultat récent ou sonde partagée avec les demandes simultanées"""
+        status = await mc_probe.get_status(self.SERVER_IP, self.PORT)
+        if not status.online:
+            # Enregistrer l'erreur dans les logs, mais ne pas l'afficher à l'utilisateur
+            logger.error(f"❌ Erreur MCStatus ({status.address}): {status.error}")
+        return status
 
+    def build_status_embed(self, status: ServerStatus):
+        """Construit l'embed de statut à partir du résultat d'une sonde"""
+        if status.online:
             # Détection du type de serveur avec le MOTD
-            server_type = self.detect_server_type(status.version.name, motd)
+            server_type = detect_server_type(status.version, status.motd)
             
             # Création de l'embed avec les infos
             embed = discord.Embed(
-                title="📊 Statut du serveur Minecraft",
+                title=STATUS_TITLE,
                 description=f"**🟢 EN LIGNE**",
                 color=EmbedManager.get_default_color()
             )
@@ -613,7 +550,7 @@ class MCStatusTracker(commands.Cog):
             # Informations sur la version avec le type de serveur
             embed.add_field(
                 name="🛠️ Version",
-                value=f"{server_type}\n{status.version.name}",
+                value=f"{server_type}\n{status.version}",
                 inline=False
             )
             
@@ -625,7 +562,7 @@ class MCStatusTracker(commands.Cog):
             )
             
             # Affichage des joueurs avec émoji
-            player_status = f"**{status.players.online}** / **{status.players.max}**"
+            player_status = f"**{status.players_online}** / **{status.players_max}**"
             embed.add_field(
                 name="👥 Joueurs",
                 value=player_status,
@@ -633,7 +570,7 @@ class MCStatusTracker(commands.Cog):
             )
             
             # Affichage de la latence avec code couleur
-            latency = round(status.latency, 2)
+            latency = status.latency
             if latency < 100:
                 latency_emoji = "🟢"  # Bon
                 latency_status = "Excellente"
@@ -654,9 +591,9 @@ class MCStatusTracker(commands.Cog):
             )
 
             # Ajout des joueurs connectés si présents
-            if status.players.online > 0 and hasattr(status.players, 'sample'):
+            if status.players_online > 0 and status.player_names:
                 # Trier les joueurs par ordre alphabétique
-                sorted_players = sorted([p.name for p in status.players.sample])
+                sorted_players = sorted(status.player_names)
                 
                 # Afficher les joueurs avec un style plus élégant
                 if len(sorted_players) <= 10:  # Si moins de 10 joueurs, afficher avec des emoji
@@ -665,69 +602,154 @@ class MCStatusTracker(commands.Cog):
                     players_display = ", ".join(f"**{p}**" for p in sorted_players)
                     
                 embed.add_field(
-                    name=f"🎲 Joueurs en ligne ({status.players.online})",
+                    name=f"🎲 Joueurs en ligne ({status.players_online})",
                     value=players_display or "Aucun joueur",
                     inline=False
                 )
             
             # Ajouter une date de mise à jour avec l'heure de Paris
-            paris_time = self.get_paris_time()
+            paris_time = get_paris_time()
             embed.set_footer(
                 text=f"Dernière mise à jour: {paris_time}"
             )
-            
-            return True, embed, status.players.online, current_player_list  # True = serveur en ligne
+            return embed
 
-        except Exception as e:
-            # Enregistrer l'erreur dans les logs, mais ne pas l'afficher à l'utilisateur
-            logger.error(f"❌ Erreur MCStatus: {str(e)}")
-            
-            # Créer un embed pour serveur hors ligne
-            embed = discord.Embed(
-                title="📊 Statut du serveur Minecraft",
-                description="**🔴 HORS LIGNE**\n\nLe serveur n'est pas accessible actuellement.",
-                color=discord.Color.red()  # Garder une couleur spécifique pour l'état hors ligne
-            )
-            
-            # Ajouter l'adresse du serveur
-            embed.add_field(
-                name="📡 Adresse",
-                value=f"`{self.SERVER_IP}`",
-                inline=True
-            )
-            
-            # Tentative de reconnexion
-            embed.add_field(
-                name="⏱️ Prochaine vérification",
-                value="Dans 1 minute",
-                inline=True
-            )
-            
-            # Ajouter une date de mise à jour avec l'heure de Paris
-            paris_time = self.get_paris_time()
-            embed.set_footer(
-                text=f"Dernière vérification: {paris_time}"
-            )
-            
-            return False, embed, 0, []  # False = serveur hors ligne
+        # Créer un embed pour serveur hors ligne
+        embed = discord.Embed(
+            title=STATUS_TITLE,
+            description="**🔴 HORS LIGNE**\n\nLe serveur n'est pas accessible actuellement.",
+            color=discord.Color.red()  # Garder une couleur spécifique pour l'état hors ligne
+        )
+        
+        # Ajouter l'adresse du serveur
+        embed.add_field(
+            name="📡 Adresse",
+            value=f"`{self.SERVER_IP}`",
+            inline=True
+        )
+        
+        # Tentative de reconnexion (espacée tant que le serveur reste hors ligne)
+        delay = max(1, round(self.scheduler.offline_delay(self.guild_id) / 60))
+        embed.add_field(
+            name="⏱️ Prochaine vérification",
+            value="Dans 1 minute" if delay == 1 else f"Dans {delay} minutes",
+            inline=True
+        )
+        
+        # Ajouter une date de mise à jour avec l'heure de Paris
+        paris_time = get_paris_time()
+        embed.set_footer(
+            text=f"Dernière vérification: {paris_time}"
+        )
+        return embed
+
+    async def get_status_embed(self):
+        """Sonde le serveur et retourne le statut structuré avec l'embed correspondant"""
+        status = await self.get_status()
+        return status, self.build_status_embed(status)
 
     async def clean_status_messages(self, channel):
         """Nettoie les messages de statut précédents du bot dans le canal"""
         try:
             # Chercher les messages du bot dans les 100 derniers messages
             async for message in channel.history(limit=100):
-                if message.author == self.bot.user:
-                    # Vérifier si c'est un message de statut (avec embed)
-                    if message.embeds and (
-                        "Statut du serveur Minecraft" in message.embeds[0].title
-                    ):
-                        try:
-                            await message.delete()
-                            await asyncio.sleep(0.5)  # Éviter le rate limiting
-                        except Exception as e:
-                            logger.error(f"Erreur lors de la suppression d'un message de statut: {e}")
+                if is_status_message(message, self.bot.user):
+                    try:
+                        await message.delete()
+                        await asyncio.sleep(0.5)  # Éviter le rate limiting
+                    except Exception as e:
+                        logger.error(f"Erreur lors de la suppression d'un message de statut: {e}")
         except Exception as e:
             logger.error(f"Erreur lors du nettoyage des messages de statut: {e}")
 
+
+class MCStatusTracker(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # Un suivi par serveur Discord configuré (colonnes mc_* de guild_config)
+        self.monitors: Dict[int, ServerMonitor] = {}
+        self.scheduler = MCStatusScheduler(
+            mc_probe, self._on_status,
+            fast=Config.MC_POLL_FAST,
+            normal=Config.MC_POLL_NORMAL,
+            idle=Config.MC_POLL_IDLE,
+            offline_max=Config.MC_OFFLINE_MAX,
+            max_concurrent=Config.MC_MAX_PROBES,
+        )
+        self._startup = bot.loop.create_task(self.initialize_monitors())
+
+    async def initialize_monitors(self):
+        """Démarre le suivi de tous les serveurs Discord configurés au démarrage du bot"""
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            try:
+                await self.configure(guild.id)
+            except Exception as e:
+                logger.error(f"❌ Suivi Minecraft impossible pour le serveur {guild.id}: {e}")
+        logger.info(f"⛏️ Suivi Minecraft actif sur {len(self.monitors)} serveur(s)")
+
+    def get_monitor(self, guild_id: int) -> Optional[ServerMonitor]:
+        return self.monitors.get(guild_id)
+
+    async def configure(self, guild_id: int) -> Optional[ServerMonitor]:
+        """(Re)lit la configuration Minecraft d'un serveur Discord et ajuste son suivi"""
+        guild = self.bot.get_guild(guild_id)
+        if guild is not None:
+            await self.bot.bootstrap.ensure_guild_ready(guild)
+        config = await db_manager.get_guild_config(guild_id)
+        host = config.get('mc_server_ip')
+        channel_id = config.get('mc_status_channel_id')
+        port = int(config.get('mc_server_port') or 25565)
+        role_id = config.get('mc_notification_role_id')
+
+        monitor = self.monitors.get(guild_id)
+        if monitor is not None and monitor.same_target(host, port, channel_id, role_id):
+            return monitor
+        self.remove(guild_id)
+
+        # Le salon doit appartenir à ce serveur (l'ancienne configuration globale a été copiée partout)
+        channel = self.bot.get_channel(channel_id) if (host and channel_id) else None
+        if channel is None or getattr(channel, 'guild', None) is None or channel.guild.id != guild_id:
+            return None
+
+        monitor = ServerMonitor(self.bot, self.scheduler, guild_id, host, port, channel_id, role_id)
+        self.monitors[guild_id] = monitor
+        await monitor.find_or_create_status_message()
+        self.scheduler.add(guild_id, host, port)
+        return monitor
+
+    def reload_config(self, guild_id: int):
+        """Recharge la configuration d'un serveur Discord en arrière-plan"""
+        self.bot.loop.create_task(self.configure(guild_id))
+
+    def remove(self, guild_id: int):
+        """Arrête le suivi Minecraft d'un serveur Discord"""
+        self.scheduler.remove(guild_id)
+        self.monitors.pop(guild_id, None)
+
+    async def _on_status(self, guild_id: int, status: ServerStatus) -> bool:
+        monitor = self.monitors.get(guild_id)
+        if monitor is None:
+            return False
+        if not status.online:
+            logger.error(f"❌ Erreur MCStatus ({status.address}): {status.error}")
+        return await monitor.handle_status(status)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.remove(guild.id)
+
+    async def cog_unload(self):
+        self._startup.cancel()
+        stats = self.scheduler.get_stats()
+        await self.scheduler.stop()
+        probe_stats = mc_probe.get_stats()
+        logger.info(
+            f"⛏️ Suivi Minecraft: {stats['servers']} serveurs ({stats['offline']} hors ligne), "
+            f"{stats['probes']} sondes, {probe_stats['avg_ms']} ms en moyenne ({probe_stats['max_ms']} ms max), "
+            f"{probe_stats['shared']['hits'] + probe_stats['shared']['coalesced']} statuts partagés, "
+            f"DNS {probe_stats['dns']['hits']} hits / {probe_stats['dns']['misses']} misses"
+        )
+
 async def setup(bot):
-    await bot.add_cog(MCStatusTracker(bot))
\ No newline at end of file
+    await bot.add_cog(MCStatusTracker(bot))
@@ -1,117 +1,74 @@
 import discord
 from discord.ext import commands, tasks
-import json
-import os
 import datetime
+import logging
 import re
 from collections import defaultdict
+from utils.stats_buffer import stats_buffer
+from utils.leaderboard import leaderboards
+from utils.activity_history import activity_history
+from utils.voice_sessions import voice_sessions, is_counted
+from utils.game_sessions import game_sessions, STREAMING
+from utils.game_names import game_names
+from utils.stats_store import stats_store
+
+logger = logging.getLogger('bot')
 
 class StatsListener(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.stats_file = 'data/stats.json'
-        self.init_stats_data()
-        self.check_voice_time.start()
-        self.track_activities.start()
+        # Compteurs partagés avec les commandes ; le JSON est réécrit par flush_stats, pas à chaque événement
+        stats_store.load()
+        self.merge_game_variants()
+        leaderboards.rebuild_global(self.stats_data)
         self.update_history.start()
-
-    def init_stats_data(self):
-        """Initialise ou charge les données de statistiques"""
-        if os.path.exists('data/stats.json'):
-            with open('data/stats.json', 'r', encoding='utf-8') as f:
-                self.stats_data = json.load(f)
-        else:
-            self.stats_data = {
-                'messages': {},
-                'voice_time': {},
-                'last_online': {},
-                'channels': {'text': {}, 'voice': {}},
-                'emojis': {},
-                'reactions': {},
-                'hourly_activity': {str(i): 0 for i in range(24)},
-                'daily_activity': {str(i): 0 for i in range(7)},
-                'games': {},
-                'streaming': {},
-                'message_history': {},
-                'voice_history': {},
-                'commands_used': 0
-            }
-
-    async def load_stats(self):
-        """Charge les statistiques depuis le fichier"""
-        try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    self.stats_data = json.load(f)
-            else:
-                self.init_default_stats()
-                self.save_stats()
-
-            # Structure complète requise
-            required_keys = {
-                'messages': {},
-                'voice_time': {},
-                'last_online': {},
-                'channels': {'text': {}, 'voice': {}},
-                'emojis': {},
-                'reactions': {},
-                'hourly_activity': {str(i): 0 for i in range(24)},
-                'daily_activity': {str(i): 0 for i in range(7)},
-                'games': {},
-                'streaming': {},
-                'message_history': {},
-                'voice_history': {},
-                'commands_used': 0,
-                'last_update': ""
-            }
-
-            # Vérification récursive des clés
-            for key, default_value in required_keys.items():
-                if key not in self.stats_data:
-                    self.stats_data[key] = default_value
-                elif isinstance(default_value, dict) and key in ['channels']:
-                    for subkey, subvalue in default_value.items():
-                        if subkey not in self.stats_data[key]:
-                            self.stats_data[key][subkey] = subvalue
-
-            self.save_stats()
-            print.info("📈 Données statistiques chargées")
-        except Exception as e:
-            print.error(f"❌ Erreur de chargement des stats: {str(e)}")
-            self.init_default_stats()
-
-    def init_default_stats(self):
-        """Initialise la structure par défaut des stats"""
-        self.stats_data = {
-            'messages': {},
-            'voice_time': {},
-            'last_online': {},
-            'channels': {
-                'text': {},
-                'voice': {}
-            },
-            'emojis': {},
-            'reactions': {},
-            'hourly_activity': {str(i): 0 for i in range(24)},
-            'daily_activity': {str(i): 0 for i in range(7)},
-            'games': {},
-            'streaming': {},
-            'message_history': {},
-            'voice_history': {},
-            'commands_used': 0,
-            'last_update': ""
-        }
-
-    def save_stats(self):
-        """Sauvegarde les statistiques dans le fichier JSON"""
-        os.makedirs('data', exist_ok=True)
-        with open('data/stats.json', 'w', encoding='utf-8') as f:
-            json.dump(self.stats_data, f, ensure_ascii=False, indent=4)
+        self.flush_stats.start()
+
+    @property
+    def stats_data(self):
+        """Compteurs du magasin partagé (ce cog est le seul à les modifier)"""
+        return stats_store.data
+
+    def merge_game_variants(self):
+        """Regroupe les compteurs des variantes d'un même jeu sous leur nom canonique"""
+        games = self.stats_data.setdefault('games', {})
+        # Les noms déjà présents restent les noms affichés
+        game_names.register(games)
+        for name, players in list(games.items()):
+            canonical = game_names.canonical(name)
+            if canonical == name or not isinstance(players, dict):
+                continue
+            target = games.get(canonical)
+            if not isinstance(target, dict):
+                target = games[canonical] = {}
+            for user_id, minutes in players.items():
+                target[user_id] = target.get(user_id, 0) + minutes
+            del games[name]
+            stats_store.mark_dirty()
 
     @commands.Cog.listener()
     async def on_ready(self):
+        # Les classements par serveur ont besoin de la liste des membres
+        for guild in self.bot.guilds:
+            leaderboards.rebuild_guild(guild, self.stats_data)
+            self.sync_voice_sessions(guild)
+        self.sync_game_sessions()
         print(f"{self.bot.user.name} - Système de statistiques activé")
 
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        leaderboards.rebuild_guild(guild, self.stats_data)
+        self.sync_voice_sessions(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        voice_sessions.close_guild(guild.id)
+        leaderboards.drop_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        leaderboards.remove_member(member.guild.id, member.id)
+
     @commands.Cog.listener()
     async def on_message(self, message):
         if message.author.bot:
@@ -134,8 +91,14 @@ class StatsListener(commands.Cog):
         custom_emojis = re.findall(r'<:\w+:(\d+)>', message.content)
         for emoji_id in custom_emojis:
             self.stats_data['emojis'][emoji_id] = self.stats_data['emojis'].get(emoji_id, 0) + 1
+            leaderboards.add_global('emojis', emoji_id, 1)
 
-        self.save_stats()
+        if message.guild:
+            stats_buffer.add_message(message.guild.id, message.author.id, now)
+            leaderboards.set_user(message.author, 'messages', self.stats_data['messages'][user_id])
+            leaderboards.set_channel(message.guild.id, 'text_channels', channel_id,
+                                     self.stats_data['channels']['text'][channel_id])
+        stats_store.mark_dirty()
 
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
@@ -144,67 +107,128 @@ class StatsListener(commands.Cog):
 
         emoji = str(reaction.emoji.id) if isinstance(reaction.emoji, discord.Emoji) else str(reaction.emoji)
         self.stats_data['reactions'][emoji] = self.stats_data['reactions'].get(emoji, 0) + 1
-        self.save_stats()
+        leaderboards.add_global('emojis', emoji, 1)
+        stats_store.mark_dirty()
 
-    @tasks.loop(minutes=1)
-    async def check_voice_time(self):
-        """Vérifie et met à jour le temps passé en vocal"""
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Ouvre/ferme les sessions vocales (arrivée, départ, changement de salon, AFK, sourdine)"""
+        if member.bot:
+            return
+        voice_sessions.update(member.guild.id, member.id, before, after)
+
+    def sync_voice_sessions(self, guild):
+        """Ouvre les sessions des membres déjà en vocal (démarrage du bot, reconnexion, nouveau serveur)"""
+        active = {}
+        for channel in [*guild.voice_channels, *guild.stage_channels]:
+            for member in channel.members:
+                if not member.bot and is_counted(member.voice):
+                    active[member.id] = channel.id
+        voice_sessions.sync_guild(guild.id, active)
+
+    def apply_voice_time(self):
+        """Crédite le temps vocal des sessions (minutes entières, les secondes restantes sont reportées)"""
         now = datetime.datetime.now()
+        for guild_id, user_id, channel_id, minutes in voice_sessions.settle():
+            user_id, channel_id = str(user_id), str(channel_id)
+
+            # Mise à jour des stats vocales
+            self.stats_data['voice_time'][user_id] = self.stats_data['voice_time'].get(user_id, 0) + minutes
+            self.stats_data['channels']['voice'][channel_id] = self.stats_data['channels']['voice'].get(channel_id, 0) + minutes
+            stats_buffer.add_voice_time(guild_id, int(user_id), minutes, now)
+
+            user = self.bot.get_user(int(user_id))
+            if user:
+                leaderboards.set_user(user, 'vocal', self.stats_data['voice_time'][user_id])
+            leaderboards.set_channel(guild_id, 'voice_channels', channel_id,
+                                     self.stats_data['channels']['voice'][channel_id])
+            stats_store.mark_dirty()
+
+    @staticmethod
+    def activity_keys(member):
+        """Jeux en cours et stream d'un membre, sous forme de clés de session"""
+        keys = set()
+        for activity in member.activities:
+            if activity.type == discord.ActivityType.playing and activity.name:
+                # Nom canonique et filtre mémorisés par nom brut
+                game_name, filtered = game_names.resolve(activity.name)
+                if not filtered:
+                    keys.add(('game', game_name))
+            elif activity.type == discord.ActivityType.streaming:
+                keys.add(STREAMING)
+        return frozenset(keys)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        """Ouvre/ferme les sessions de jeu et de stream (reçu une fois par serveur commun)"""
+        if after.bot:
+            return
+        game_sessions.update(after.id, self.activity_keys(after))
+
+    def sync_game_sessions(self):
+        """Ouvre les sessions des membres déjà en jeu ou en stream (démarrage du bot, reconnexion)"""
+        states = {}
         for guild in self.bot.guilds:
             for member in guild.members:
-                if not member.bot and member.voice and member.voice.channel and not member.voice.afk:
-                    user_id = str(member.id)
-                    channel_id = str(member.voice.channel.id)
-                    
-                    # Mise à jour des stats vocales
-                    self.stats_data['voice_time'][user_id] = self.stats_data['voice_time'].get(user_id, 0) + 1
-                    self.stats_data['channels']['voice'][channel_id] = self.stats_data['channels']['voice'].get(channel_id, 0) + 1
-
-        self.save_stats()
-
-    @tasks.loop(minutes=5)
-    async def track_activities(self):
-        """Suit les activités des membres"""
-        for guild in self.bot.guilds:
-            for member in guild.members:
-                if member.bot:
+                if member.bot or member.id in states:
                     continue
-                
-                user_id = str(member.id)
-                for activity in member.activities:
-                    if activity.type == discord.ActivityType.playing:
-                        game_name = activity.name
-                        if game_name not in self.stats_data['games']:
-                            self.stats_data['games'][game_name] = {}
-                        self.stats_data['games'][game_name][user_id] = self.stats_data['games'][game_name].get(user_id, 0) + 5
-                    
-                    elif activity.type == discord.ActivityType.streaming:
-                        self.stats_data['streaming'][user_id] = self.stats_data['streaming'].get(user_id, 0) + 5
-
-        self.save_stats()
+                keys = self.activity_keys(member)
+                if keys:
+                    states[member.id] = keys
+        game_sessions.sync(states)
+
+    def apply_game_time(self):
+        """Crédite le temps de jeu et de stream des sessions (JSON, classements, games_played des serveurs)"""
+        for user_id, (kind, game_name), minutes in game_sessions.settle():
+            user = self.bot.get_user(user_id)
+            user_key = str(user_id)
+
+            if (kind, game_name) == STREAMING:
+                self.stats_data['streaming'][user_key] = self.stats_data['streaming'].get(user_key, 0) + minutes
+                if user:
+                    leaderboards.set_user(user, 'streaming', self.stats_data['streaming'][user_key])
+            else:
+                players = self.stats_data['games'].get(game_name)
+                if not isinstance(players, dict):
+                    players = self.stats_data['games'][game_name] = {}
+                players[user_key] = players.get(user_key, 0) + minutes
+                leaderboards.add_global('games', game_name, minutes)
+                for guild in (user.mutual_guilds if user else ()):
+                    stats_buffer.add_game_time(guild.id, user_id, game_name, minutes)
+            stats_store.mark_dirty()
 
     @tasks.loop(hours=1)
     async def update_history(self):
-        """Met à jour l'historique des statistiques"""
-        today = datetime.datetime.now().strftime("%Y-%m-%d %H:00")
-        
-        for user_id, count in self.stats_data['messages'].items():
-            if user_id not in self.stats_data['message_history']:
-                self.stats_data['message_history'][user_id] = {}
-            self.stats_data['message_history'][user_id][today] = count
-        
-        for user_id, minutes in self.stats_data['voice_time'].items():
-            if user_id not in self.stats_data['voice_history']:
-                self.stats_data['voice_history'][user_id] = {}
-            self.stats_data['voice_history'][user_id][today] = minutes
-        
-        self.save_stats()
-
-    def cog_unload(self):
-        """Arrête les tâches quand le cog est déchargé"""
-        self.check_voice_time.cancel()
-        self.track_activities.cancel()
+        """Agrège l'historique d'activité des serveurs (les deltas horaires sont écrits par stats_buffer)"""
+        await stats_buffer.flush()
+        await activity_history.rollup_all([guild.id for guild in self.bot.guilds])
+
+    @update_history.before_loop
+    async def before_update_history(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(seconds=30)
+    async def flush_stats(self):
+        """Écrit périodiquement les statistiques en attente (DB + JSON)"""
+        await self.flush_all()
+
+    async def flush_all(self):
+        """Vide le tampon vers les DB des serveurs et réécrit le JSON s'il a changé"""
+        self.apply_voice_time()
+        self.apply_game_time()
+        try:
+            await stats_buffer.flush()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'écriture des statistiques: {str(e)}")
+        await stats_store.save()
+
+    async def cog_unload(self):
+        """Arrête les tâches et écrit les statistiques en attente quand le cog est déchargé"""
         self.update_history.cancel()
+        self.flush_stats.cancel()
+        voice_sessions.close_all()
+        game_sessions.close_all()
+        await self.flush_all()
 
 async def setup(bot):
     await bot.add_cog(StatsListener(bot))
\ No newline at end of file
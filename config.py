@@ -38,6 +38,58 @@ class Config:
     TARGET_CHANNEL = int(os.getenv("TARGET_CHANNEL_ID", "0"))
     TARGET_USER = int(os.getenv("TARGET_USER_ID", "0"))
     
+    # Nombre de serveurs initialisés en parallèle au démarrage
+    BOOTSTRAP_CONCURRENCY = int(os.getenv("BOOTSTRAP_CONCURRENCY", "8"))
+    
+    # Traitements d'images (pool de processus) : 0 = automatique selon le nombre de CPU
+    MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "0"))
+    MEDIA_QUEUE_SIZE = int(os.getenv("MEDIA_QUEUE_SIZE", "10"))
+    MEDIA_JOBS_PER_USER = int(os.getenv("MEDIA_JOBS_PER_USER", "1"))
+    # Moteur d'extraction des couleurs dominantes : "median_cut" (rapide) ou "kmeans"
+    PALETTE_BACKEND = os.getenv("PALETTE_BACKEND", "median_cut")
+
+    # Graphiques de statistiques : nombre de PNG gardés en cache et durée de validité (secondes)
+    CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "64"))
+    CHART_CACHE_TTL = int(os.getenv("CHART_CACHE_TTL", "300"))
+
+    # Historique d'activité : jours conservés par heure, puis par jour ; semaines conservées (0 = sans limite)
+    HISTORY_HOURLY_DAYS = int(os.getenv("HISTORY_HOURLY_DAYS", "7"))
+    HISTORY_DAILY_DAYS = int(os.getenv("HISTORY_DAILY_DAYS", "90"))
+    HISTORY_WEEKLY_DAYS = int(os.getenv("HISTORY_WEEKLY_DAYS", "1825"))
+
+    # Client HTTP partagé : délai (secondes), nouvelles tentatives, requêtes simultanées par hôte, cache DNS (secondes)
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+    HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "4"))
+    HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+
+    # Wikipédia : recherches et extraits gardés en cache et durée de validité (secondes)
+    WIKI_CACHE_SIZE = int(os.getenv("WIKI_CACHE_SIZE", "256"))
+    WIKI_CACHE_TTL = int(os.getenv("WIKI_CACHE_TTL", "3600"))
+
+    # YouTube (yt-dlp) : threads d'extraction, vidéos gardées en cache et validité (secondes) si les liens n'indiquent pas leur expiration
+    YTDL_WORKERS = int(os.getenv("YTDL_WORKERS", "2"))
+    YTDL_CACHE_SIZE = int(os.getenv("YTDL_CACHE_SIZE", "128"))
+    YTDL_CACHE_TTL = int(os.getenv("YTDL_CACHE_TTL", "1800"))
+    # Musique : entrées de playlist lues à la fois (la suite est chargée pendant la lecture)
+    PLAYLIST_PAGE_SIZE = int(os.getenv("PLAYLIST_PAGE_SIZE", "10"))
+    # Pipeline audio : "opus" (flux Opus transmis sans transcodage, FFmpeg encode les autres) ou "pcm" (ancien mode)
+    MUSIC_AUDIO_MODE = os.getenv("MUSIC_AUDIO_MODE", "opus")
+
+    # Statut Minecraft : délai maximal d'une sonde et validité des résolutions DNS (secondes)
+    MC_PROBE_TIMEOUT = float(os.getenv("MC_PROBE_TIMEOUT", "5"))
+    MC_DNS_TTL = int(os.getenv("MC_DNS_TTL", "300"))
+    # Intervalles de sondage (secondes) : joueurs actifs, joueurs connectés, serveur vide, plafond du recul hors ligne
+    MC_POLL_FAST = float(os.getenv("MC_POLL_FAST", "15"))
+    MC_POLL_NORMAL = float(os.getenv("MC_POLL_NORMAL", "60"))
+    MC_POLL_IDLE = float(os.getenv("MC_POLL_IDLE", "180"))
+    MC_OFFLINE_MAX = float(os.getenv("MC_OFFLINE_MAX", "900"))
+    # Sondes Minecraft simultanées, tous serveurs confondus
+    MC_MAX_PROBES = int(os.getenv("MC_MAX_PROBES", "8"))
+    # Bouton Actualiser : statut réutilisé s'il date de moins de N secondes, délai entre deux clics d'un même membre
+    MC_STATUS_FRESHNESS = float(os.getenv("MC_STATUS_FRESHNESS", "10"))
+    MC_REFRESH_COOLDOWN = float(os.getenv("MC_REFRESH_COOLDOWN", "15"))
+
     # Chemins
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     COGS_DIR = os.path.join(BASE_DIR, "cogs")
@@ -45,6 +97,13 @@ class Config:
     LOGS_DIR = os.path.join(BASE_DIR, "logs")
     DATA_DIR = os.path.join(BASE_DIR, "data")
     
+    # Jeux : mots exclus des statistiques et table d'alias {nom canonique: [variantes]}
+    FILTERED_GAME_WORDS = [
+        word.strip().strip('"') for word in os.getenv("FILTERED_GAME_WORDS", "").split(",")
+        if word.strip().strip('"')
+    ]
+    GAME_ALIASES_FILE = os.path.join(DATA_DIR, "game_aliases.json")
+    
     # Liste des Cogs
     EXTENSIONS = [
         # Commands
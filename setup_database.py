@@ -7,6 +7,7 @@ import sys
 import logging
 from utils.database import db_manager
 from utils.migration import migration_manager
+from utils.schema import check_query_plans, GUILD_SCHEMA_VERSION
 
 async def setup_database():
     """Configure la base de données globale et explique le système par serveur"""
@@ -31,10 +32,19 @@ async def setup_database():
         await db_manager.init_guild_database(guild_id)
         await migration_manager.migrate_all_data(guild_id)
         print("✅ Test de migration terminé")
+        
+        # Vérifier que les requêtes fréquentes utilisent bien leurs index
+        async with db_manager.guild_connection(guild_id) as db:
+            plans = await check_query_plans(db)
+        print(f"🧱 Schéma v{GUILD_SCHEMA_VERSION} - plans de requêtes :")
+        for name, uses_index in plans.items():
+            print(f"  {'✅' if uses_index else '❌'} {name}")
     
     print("\n🎉 Configuration terminée !")
     print("• Le bot créera automatiquement une DB pour chaque nouveau serveur")
     print("• Vous pouvez maintenant démarrer le bot en toute sécurité")
+    
+    await db_manager.close()
 
 if __name__ == "__main__":
     asyncio.run(setup_database())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules du bot (utils, cogs...) s'importent depuis la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
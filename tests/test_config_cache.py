@@ -0,0 +1,38 @@
+"""
+Cache des configurations serveur : une lecture concurrente d'une invalidation ne met rien de périmé en cache
+"""
+import asyncio
+
+from utils.database import DatabaseManager
+
+GUILD_ID = 1
+
+
+async def _read_during_invalidation(base_path, guild_id):
+    manager = DatabaseManager(base_path=str(base_path))
+    try:
+        await manager.init_guild_database(GUILD_ID)
+        read = manager._read_guild_config
+
+        async def read_then_invalidate(db, gid):
+            config = await read(db, gid)
+            manager.invalidate_guild_config(guild_id)
+            return config
+
+        manager._read_guild_config = read_then_invalidate
+        await manager.get_guild_config(GUILD_ID)
+        stale = GUILD_ID in manager._config_cache
+
+        manager._read_guild_config = read
+        await manager.get_guild_config(GUILD_ID)
+        return stale, GUILD_ID in manager._config_cache
+    finally:
+        await manager.close()
+
+
+def test_guild_invalidation_during_read_is_not_cached(tmp_path):
+    assert asyncio.run(_read_during_invalidation(tmp_path, GUILD_ID)) == (False, True)
+
+
+def test_global_invalidation_during_read_is_not_cached(tmp_path):
+    assert asyncio.run(_read_during_invalidation(tmp_path, None)) == (False, True)
@@ -0,0 +1,28 @@
+from utils.game_sessions import STREAMING, GameSessionTracker
+
+GAME = ('game', 'Minecraft')
+
+
+def test_short_session_is_rounded_on_close():
+    tracker = GameSessionTracker()
+    tracker.update(1, frozenset({GAME}), now=0)
+    tracker.update(1, frozenset(), now=45)
+    assert tracker.settle(now=60) == [(1, GAME, 1)]
+
+
+def test_long_session_keeps_its_last_seconds():
+    tracker = GameSessionTracker()
+    tracker.update(1, frozenset({GAME, STREAMING}), now=0)
+    assert sorted(tracker.settle(now=100)) == [(1, GAME, 1), (1, STREAMING, 1)]
+    # 40 s reportées + 50 s = 1 min 30 s, arrondie à 2 minutes à la fermeture
+    tracker.update(1, frozenset({STREAMING}), now=150)
+    assert tracker.settle(now=150) == [(1, GAME, 2), (1, STREAMING, 1)]
+
+
+def test_closed_sessions_leave_no_state():
+    tracker = GameSessionTracker()
+    for user_id in range(100):
+        tracker.update(user_id, frozenset({('game', f'jeu {user_id}')}), now=0)
+        tracker.update(user_id, frozenset(), now=10)
+    assert len(tracker) == 0
+    assert tracker.settle(now=60) == []
@@ -0,0 +1,53 @@
+"""
+Plans d'exécution des requêtes fréquentes sur une DB serveur neuve
+Échoue si une requête chaude n'utilise plus l'index prévu (index renommé, supprimé ou ignoré par SQLite)
+"""
+import asyncio
+
+import pytest
+
+from utils.database import DatabaseManager
+from utils.schema import GUILD_SCHEMA_VERSION, HOT_QUERIES, check_query_plans
+
+GUILD_ID = 1
+
+
+async def _plans(base_path):
+    manager = DatabaseManager(base_path=str(base_path))
+    try:
+        await manager.init_guild_database(GUILD_ID)
+        async with manager.guild_connection(GUILD_ID) as db:
+            cursor = await db.execute("PRAGMA user_version")
+            version = (await cursor.fetchone())[0]
+            details = {}
+            for name, (query, params, _) in HOT_QUERIES.items():
+                cursor = await db.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                details[name] = " | ".join(row[-1] for row in await cursor.fetchall())
+            checked = await check_query_plans(db)
+        return version, details, checked
+    finally:
+        await manager.close()
+
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory):
+    return asyncio.run(_plans(tmp_path_factory.mktemp("databases")))
+
+
+def test_schema_is_current(plans):
+    version, _, _ = plans
+    assert version == GUILD_SCHEMA_VERSION
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_expected_index(plans, name):
+    _, details, checked = plans
+    index_name = HOT_QUERIES[name][2]
+    assert index_name in details[name], f"{name}: {details[name]}"
+    assert checked[name]
+
+
+def test_hot_queries_do_not_force_indexes():
+    # Un index imposé par INDEXED BY rendrait la vérification inutile (et la requête invalide sans l'index)
+    for name, (query, _, _) in HOT_QUERIES.items():
+        assert "INDEXED BY" not in query.upper(), name
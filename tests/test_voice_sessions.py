@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from utils.voice_sessions import VoiceSessionTracker, is_counted
+
+
+def _state(channel_id=10, afk=False, **flags):
+    return SimpleNamespace(channel=SimpleNamespace(id=channel_id), afk=afk, **flags)
+
+
+def test_short_session_is_rounded_on_close():
+    tracker = VoiceSessionTracker()
+    tracker.open(1, 2, 10, now=0)
+    tracker.close(1, 2, now=45)
+    assert tracker.settle(now=60) == [(1, 2, 10, 1)]
+
+
+def test_very_short_session_credits_nothing():
+    tracker = VoiceSessionTracker()
+    tracker.open(1, 2, 10, now=0)
+    tracker.close(1, 2, now=20)
+    assert tracker.settle(now=60) == []
+
+
+def test_channel_switch_carries_remaining_seconds():
+    tracker = VoiceSessionTracker()
+    tracker.open(1, 2, 10, now=0)
+    tracker.open(1, 2, 11, now=90)
+    # 30 s reportées sur le nouveau salon : 30 + 30 = une minute pleine
+    assert tracker.settle(now=120) == [(1, 2, 10, 1), (1, 2, 11, 1)]
+
+
+def test_closed_sessions_leave_no_state():
+    tracker = VoiceSessionTracker()
+    for user_id in range(100):
+        tracker.open(1, user_id, 10, now=0)
+        tracker.close(1, user_id, now=10)
+    assert len(tracker) == 0
+    assert tracker.settle(now=60) == []
+
+
+def test_deafened_members_are_counted():
+    assert is_counted(_state(self_deaf=True, deaf=False, self_mute=True))
+    assert not is_counted(_state(afk=True))
+    assert not is_counted(None)
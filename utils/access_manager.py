@@ -13,6 +13,11 @@ class AccessManager:
         """Vérifie si un serveur est autorisé"""
         return await db_manager.is_guild_allowed(guild.id)
     
+    @staticmethod
+    async def check_guilds_access(guilds) -> dict:
+        """Vérifie l'accès de plusieurs serveurs d'un coup (retourne {guild_id: autorisé})"""
+        return await db_manager.are_guilds_allowed(guild.id for guild in guilds)
+    
     @staticmethod
     async def add_guild_to_whitelist(guild_id: int, reason: str = None, added_by: int = None):
         """Ajoute un serveur à la whitelist"""
@@ -0,0 +1,157 @@
+"""
+Historique d'activité (messages, vocal) des serveurs sous forme de séries temporelles agrégées
+Seuls les deltas non nuls sont stockés ; les données anciennes passent de l'heure au jour puis à la semaine
+"""
+import datetime
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+from .database import db_manager
+
+logger = logging.getLogger('bot')
+
+METRICS = ('messages', 'voice')
+
+# Regroupement d'une période (format YYYY-MM-DD HH:00) selon la résolution demandée
+_PERIODS = {
+    'hour': "bucket",
+    'day': "substr(bucket, 1, 10) || ' 00:00'",
+    # Semaine commençant le lundi
+    'week': "date(bucket, '-6 days', 'weekday 1') || ' 00:00'",
+}
+
+# Le filtre sur toutes les résolutions permet d'utiliser les index sur la plage de dates
+_ALL_RESOLUTIONS = "resolution IN ('hour', 'day', 'week')"
+
+
+def _bucket(when: datetime.datetime) -> str:
+    return when.strftime("%Y-%m-%d %H:00")
+
+
+class ActivityHistory:
+    """Requêtes sur plages de dates et agrégation périodique de la table activity_history"""
+
+    def __init__(self, hourly_days: int = 7, daily_days: int = 90, weekly_days: int = 0):
+        self.hourly_days = hourly_days
+        self.daily_days = daily_days
+        # 0 = semaines conservées indéfiniment
+        self.weekly_days = weekly_days
+
+    def _cutoffs(self, now: datetime.datetime) -> Tuple[str, str, Optional[str]]:
+        """Limites d'agrégation, alignées sur des jours (heure -> jour) et des lundis (jour -> semaine)"""
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        hourly = midnight - datetime.timedelta(days=self.hourly_days)
+        daily = midnight - datetime.timedelta(days=self.daily_days)
+        daily -= datetime.timedelta(days=daily.weekday())
+        weekly = midnight - datetime.timedelta(days=self.weekly_days) if self.weekly_days else None
+        return _bucket(hourly), _bucket(daily), weekly and _bucket(weekly)
+
+    async def rollup(self, guild_id: int, now: datetime.datetime = None) -> int:
+        """Agrège les heures anciennes en jours, les jours anciens en semaines et purge les plus vieilles"""
+        hourly_cutoff, daily_cutoff, weekly_cutoff = self._cutoffs(now or datetime.datetime.now())
+        changed = 0
+
+        async with db_manager.guild_connection(guild_id) as db:
+            for metric in METRICS:
+                for source, target, cutoff in (('hour', 'day', hourly_cutoff), ('day', 'week', daily_cutoff)):
+                    await db.execute(f'''
+                        INSERT INTO activity_history (metric, user_id, resolution, bucket, value)
+                        SELECT metric, user_id, ?, {_PERIODS[target]} AS period, SUM(value)
+                        FROM activity_history
+                        WHERE metric = ? AND resolution = ? AND bucket < ?
+                        GROUP BY user_id, period
+                        ON CONFLICT(metric, resolution, bucket, user_id) DO UPDATE SET
+                            value = value + excluded.value
+                    ''', (target, metric, source, cutoff))
+                    cursor = await db.execute('''
+                        DELETE FROM activity_history
+                        WHERE metric = ? AND resolution = ? AND bucket < ?
+                    ''', (metric, source, cutoff))
+                    changed += cursor.rowcount
+
+                if weekly_cutoff:
+                    cursor = await db.execute('''
+                        DELETE FROM activity_history
+                        WHERE metric = ? AND resolution = 'week' AND bucket < ?
+                    ''', (metric, weekly_cutoff))
+                    changed += cursor.rowcount
+            await db.commit()
+
+        return changed
+
+    async def rollup_all(self, guild_ids: Iterable[int]) -> int:
+        """Agrège l'historique de plusieurs serveurs"""
+        changed = 0
+        for guild_id in guild_ids:
+            try:
+                changed += await self.rollup(guild_id)
+            except Exception as e:
+                logger.error(f"❌ Erreur d'agrégation de l'historique du serveur {guild_id}: {str(e)}")
+        if changed:
+            logger.info(f"🗜️ Historique d'activité agrégé ({changed} lignes compactées)")
+        return changed
+
+    async def get_total(self, guild_id: int, metric: str, days: int, user_id: int = None) -> int:
+        """Total d'une métrique sur les `days` derniers jours (serveur entier ou un membre)"""
+        start = _bucket(datetime.datetime.now() - datetime.timedelta(days=days))
+        query = "SELECT COALESCE(SUM(value), 0) FROM activity_history WHERE metric = ?"
+        params: list = [metric]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += f" AND {_ALL_RESOLUTIONS} AND bucket >= ?"
+        params.append(start)
+
+        async with db_manager.guild_connection(guild_id) as db:
+            cursor = await db.execute(query, params)
+            return (await cursor.fetchone())[0]
+
+    async def get_totals(self, guild_id: int, user_id: int = None,
+                         periods: Tuple[int, ...] = (7, 30, 365)) -> Dict[str, Dict[int, int]]:
+        """Totaux de chaque métrique pour plusieurs plages en une requête : {métrique: {jours: total}}"""
+        now = datetime.datetime.now()
+        starts = [_bucket(now - datetime.timedelta(days=days)) for days in periods]
+        columns = ", ".join("SUM(CASE WHEN bucket >= ? THEN value ELSE 0 END)" for _ in periods)
+        query = f"SELECT metric, {columns} FROM activity_history WHERE metric IN ('messages', 'voice')"
+        params: list = [*starts]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += f" AND {_ALL_RESOLUTIONS} AND bucket >= ? GROUP BY metric"
+        params.append(min(starts))
+
+        totals = {metric: {days: 0 for days in periods} for metric in METRICS}
+        async with db_manager.guild_connection(guild_id) as db:
+            cursor = await db.execute(query, params)
+            for metric, *values in await cursor.fetchall():
+                totals[metric] = dict(zip(periods, values))
+        return totals
+
+    async def get_series(self, guild_id: int, metric: str, days: int, resolution: str = 'day',
+                         user_id: int = None) -> List[Tuple[str, int]]:
+        """Série (période, valeur) sur les `days` derniers jours, regroupée par heure, jour ou semaine
+
+        Les données déjà agrégées ne peuvent pas être détaillées : au-delà de la rétention horaire
+        (resp. journalière), une série par heure (resp. par jour) n'a qu'un point par jour (resp. semaine).
+        """
+        start = _bucket(datetime.datetime.now() - datetime.timedelta(days=days))
+        query = f"SELECT {_PERIODS[resolution]} AS period, SUM(value) FROM activity_history WHERE metric = ?"
+        params: list = [metric]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += f" AND {_ALL_RESOLUTIONS} AND bucket >= ? GROUP BY period ORDER BY period"
+        params.append(start)
+
+        async with db_manager.guild_connection(guild_id) as db:
+            cursor = await db.execute(query, params)
+            return [(period, value) for period, value in await cursor.fetchall()]
+
+
+# Instance globale
+activity_history = ActivityHistory(
+    hourly_days=Config.HISTORY_HOURLY_DAYS,
+    daily_days=Config.HISTORY_DAILY_DAYS,
+    weekly_days=Config.HISTORY_WEEKLY_DAYS
+)
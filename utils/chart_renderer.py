@@ -0,0 +1,218 @@
+"""
+Rendu des graphiques de statistiques hors de la boucle asyncio
+Un processus dédié (backend Agg initialisé au démarrage) dessine les PNG ; ils sont mis en cache par empreinte
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger('bot')
+
+
+def _init_worker():
+    """Initialise matplotlib une seule fois dans le processus de rendu (backend, style, polices)"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.style
+    matplotlib.style.use("dark_background")
+
+    # Premier rendu à vide : charge le cache des polices avant la première vraie demande
+    render_chart(["0"], [0.0], "", "", "bar")
+
+
+def render_chart(labels: List[str], values: List[float], title: str, ylabel: str, kind: str = "bar") -> bytes:
+    """Dessine un graphique en barres ou en ligne et renvoie le PNG (exécuté dans le processus de rendu)"""
+    import matplotlib.dates as mdates
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Figure autonome (sans pyplot) : aucun état global à nettoyer entre deux rendus
+    fig = Figure(figsize=(10, 6), dpi=100, facecolor="#2F3136")
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.set_facecolor("#2F3136")
+
+    positions = range(len(labels))
+    if kind == "line":
+        dates = []
+        for label in labels:
+            try:
+                dates.append(datetime.datetime.strptime(label, "%Y-%m-%d %H:00"))
+            except ValueError:
+                dates.append(label)
+
+        if all(isinstance(d, datetime.datetime) for d in dates):
+            ax.plot(dates, values, marker="o", linestyle="-", color="#2BA3B3")
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m"))
+            ax.xaxis.set_major_locator(mdates.DayLocator(interval=2))
+        else:
+            ax.plot(positions, values, marker="o", linestyle="-", color="#2BA3B3")
+            ax.set_xticks(positions, labels, rotation=45, ha="right")
+    else:
+        ax.bar(positions, values, color="#2BA3B3", alpha=0.7)
+        ax.set_xticks(positions, labels, rotation=45, ha="right")
+
+    # Personnalisation du graphique
+    ax.set_title(title, pad=20, color="white")
+    ax.set_ylabel(ylabel, color="white")
+    ax.grid(True, linestyle="--", alpha=0.3)
+    fig.tight_layout(pad=2.0)
+
+    buffer = BytesIO()
+    fig.savefig(
+        buffer,
+        format="png",
+        bbox_inches="tight",
+        facecolor="#2F3136",
+        edgecolor="none",
+        dpi=100,
+    )
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """Rend les graphiques dans un processus dédié et garde les PNG récents en cache (LRU + TTL)"""
+
+    def __init__(self, cache_size: int = 64, cache_ttl: int = 300):
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Empreinte -> (horodatage, PNG)
+        self._cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # Rendus en cours : deux demandes identiques simultanées ne dessinent qu'une fois
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Temps de rendu par type de graphique : [nombre, total ms, max ms]
+        self._timings: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+
+        # Compteurs de fonctionnement
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Démarre le processus de rendu (le backend Agg y est initialisé immédiatement)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, initializer=_init_worker)
+            # Forcer le lancement du processus sans attendre la première commande
+            self._executor.submit(int)
+            logger.info("📊 Processus de rendu des graphiques démarré")
+
+    @staticmethod
+    def digest(labels: List[str], values: List[float], title: str, ylabel: str, kind: str) -> str:
+        """Empreinte des séries et paramètres du graphique"""
+        payload = json.dumps([kind, title, ylabel, labels, values], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _get_cached(self, key: str) -> Optional[bytes]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: str, image: bytes):
+        self._cache[key] = (time.monotonic(), image)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def render(self, chart_type: str, data: Dict, title: str, ylabel: str, kind: str = "bar") -> Optional[bytes]:
+        """Retourne le PNG du graphique (depuis le cache si les mêmes données ont déjà été rendues)"""
+        # Vérification des données
+        if not data or not isinstance(data, dict):
+            logger.error("Données invalides pour le graphique")
+            return None
+
+        try:
+            labels = [str(label) for label in data.keys()]
+            values = [float(v) for v in data.values()]
+        except (TypeError, ValueError):
+            logger.error("Données incohérentes pour le graphique")
+            return None
+
+        key = self.digest(labels, values, title, ylabel, kind)
+        cached = self._get_cached(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            start = time.perf_counter()
+            image = await asyncio.get_running_loop().run_in_executor(
+                self._executor, render_chart, labels, values, title, ylabel, kind
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            self._record_timing(chart_type, elapsed)
+            logger.info(f"📊 Graphique '{chart_type}' rendu en {elapsed:.0f}ms")
+
+            self._store(key, image)
+            future.set_result(image)
+            return image
+        except BrokenProcessPool:
+            # Processus de rendu mort : il sera relancé à la prochaine demande
+            logger.error("❌ Processus de rendu des graphiques arrêté, redémarrage à la prochaine demande")
+            self.shutdown()
+            return None
+        except Exception as e:
+            logger.error(f"Erreur lors de la création du graphique: {e}")
+            return None
+        finally:
+            del self._pending[key]
+            if not future.done():
+                future.set_result(None)
+
+    def _record_timing(self, chart_type: str, elapsed: float):
+        timing = self._timings[chart_type]
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+
+    def get_stats(self) -> Dict:
+        """Statistiques du cache et temps de rendu moyens/max par type de graphique"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'cached': len(self._cache),
+            'timings': {
+                chart_type: {
+                    'renders': count,
+                    'avg_ms': round(total / count, 1),
+                    'max_ms': round(worst, 1)
+                }
+                for chart_type, (count, total, worst) in self._timings.items()
+            }
+        }
+
+    def shutdown(self):
+        """Arrête le processus de rendu"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instance globale
+chart_renderer = ChartRenderer(
+    cache_size=Config.CHART_CACHE_SIZE,
+    cache_ttl=Config.CHART_CACHE_TTL
+)
@@ -0,0 +1,186 @@
+"""
+Gestionnaire de connexions SQLite persistantes
+Garde un LRU borné de connexions par serveur et une connexion globale longue durée
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import aiosqlite
+
+logger = logging.getLogger('bot')
+
+
+class _PooledConnection:
+    """Connexion ouverte du pool avec son verrou d'usage exclusif"""
+
+    __slots__ = ('db', 'lock', 'last_used', 'closed')
+
+    def __init__(self, db: aiosqlite.Connection):
+        self.db = db
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+
+
+class ConnectionManager:
+    """Pool de connexions aiosqlite (LRU par serveur + connexion globale) en mode WAL"""
+
+    def __init__(self, max_connections: int = 64, idle_timeout: float = 300.0):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self._connections: "OrderedDict[int, _PooledConnection]" = OrderedDict()
+        self._global: Optional[_PooledConnection] = None
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._last_sweep = time.monotonic()
+
+        # Compteurs exposés via get_stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.idle_closed = 0
+
+    async def _open(self, db_path: str) -> aiosqlite.Connection:
+        """Ouvre une connexion configurée pour un usage concurrent (WAL)"""
+        db = await aiosqlite.connect(db_path)
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        await db.execute("PRAGMA busy_timeout=5000")
+        return db
+
+    async def _get_entry(self, key: Any, db_path: str) -> _PooledConnection:
+        """Retourne l'entrée du pool pour une clé, en l'ouvrant si nécessaire"""
+        entry = self._global if key is None else self._connections.get(key)
+        if entry is not None and not entry.closed:
+            self.hits += 1
+            if key is not None:
+                self._connections.move_to_end(key)
+            return entry
+
+        # Une ouverture est déjà en cours pour cette clé : la partager
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            entry = _PooledConnection(await self._open(db_path))
+            if key is None:
+                self._global = entry
+            else:
+                self._connections[key] = entry
+                self._evict_overflow()
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Évite l'avertissement si personne n'attendait
+            raise
+        finally:
+            del self._pending[key]
+
+    def _evict_overflow(self):
+        """Ferme les connexions les moins récemment utilisées au-delà de la limite"""
+        while len(self._connections) > self.max_connections:
+            guild_id, entry = self._connections.popitem(last=False)
+            self.evictions += 1
+            asyncio.create_task(self._close_entry(entry))
+            logger.debug(f"♻️ Connexion du serveur {guild_id} évincée du pool")
+
+    async def _close_entry(self, entry: _PooledConnection):
+        """Ferme une connexion dès qu'elle n'est plus utilisée"""
+        async with entry.lock:
+            if entry.closed:
+                return
+            entry.closed = True
+            try:
+                await entry.db.close()
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de la fermeture d'une connexion: {str(e)}")
+
+    @asynccontextmanager
+    async def _acquire(self, key: Any, db_path: str):
+        """Réserve une connexion pour la durée du bloc (annule la transaction en cas d'erreur)"""
+        await self._maybe_sweep()
+        while True:
+            entry = await self._get_entry(key, db_path)
+            await entry.lock.acquire()
+            if not entry.closed:
+                break
+            # La connexion a été fermée entre-temps : en rouvrir une
+            entry.lock.release()
+
+        try:
+            entry.last_used = time.monotonic()
+            yield entry.db
+        except (Exception, asyncio.CancelledError):
+            try:
+                await entry.db.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            entry.last_used = time.monotonic()
+            entry.lock.release()
+
+    def guild_connection(self, guild_id: int, db_path: str):
+        """Contexte asynchrone donnant la connexion persistante d'un serveur"""
+        return self._acquire(guild_id, db_path)
+
+    def global_connection(self, db_path: str):
+        """Contexte asynchrone donnant la connexion persistante à global.db"""
+        return self._acquire(None, db_path)
+
+    async def _maybe_sweep(self):
+        """Ferme les connexions inactives au plus une fois par intervalle"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.idle_timeout / 2:
+            return
+        self._last_sweep = now
+        await self.close_idle_connections()
+
+    async def close_idle_connections(self) -> int:
+        """Ferme les connexions serveur inutilisées depuis plus de idle_timeout secondes"""
+        now = time.monotonic()
+        idle = [
+            guild_id for guild_id, entry in self._connections.items()
+            if not entry.lock.locked() and now - entry.last_used > self.idle_timeout
+        ]
+        # Retirer d'abord du pool pour qu'aucun appelant ne les récupère pendant la fermeture
+        entries = [self._connections.pop(guild_id) for guild_id in idle]
+        for entry in entries:
+            await self._close_entry(entry)
+        self.idle_closed += len(idle)
+        if idle:
+            logger.debug(f"💤 {len(idle)} connexions inactives fermées")
+        return len(idle)
+
+    async def close_all(self):
+        """Ferme toutes les connexions (à appeler à l'arrêt du bot)"""
+        entries = list(self._connections.values())
+        self._connections.clear()
+        if self._global is not None:
+            entries.append(self._global)
+            self._global = None
+        for entry in entries:
+            await self._close_entry(entry)
+        logger.info(f"🔒 {len(entries)} connexions SQLite fermées")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du pool"""
+        total = self.hits + self.misses
+        return {
+            'open_connections': len(self._connections) + (1 if self._global else 0),
+            'max_connections': self.max_connections,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'idle_closed': self.idle_closed
+        }
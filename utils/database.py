@@ -2,149 +2,81 @@ import sqlite3
 import json
 import logging
 import os
-from typing import Optional, Any, Dict, List
+from types import MappingProxyType
+from typing import Optional, Any, Dict, List, Mapping
 import asyncio
-import aiosqlite
+from .connection_manager import ConnectionManager
+from .schema import upgrade_guild_schema
 
 logger = logging.getLogger('bot')
 
+def _freeze(value: Any) -> Any:
+    """Rend une configuration décodée immuable (dict -> mappingproxy, list -> tuple)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 class DatabaseManager:
     """Gestionnaire de base de données avec une DB par serveur"""
     
-    def __init__(self, base_path: str = "data/databases"):
+    def __init__(self, base_path: str = "data/databases", max_connections: int = 64):
         self.base_path = base_path
         os.makedirs(base_path, exist_ok=True)
         self._initialized_guilds = set()  # Garde en mémoire les serveurs initialisés
+        self.pool = ConnectionManager(max_connections=max_connections)
+        
+        # Cache en lecture des configurations serveur (snapshots immuables)
+        self._config_cache: Dict[int, Mapping[str, Any]] = {}
+        self._config_versions: Dict[int, int] = {}
+        # Incrémenté par une invalidation globale (couvre les serveurs pas encore en cache)
+        self._config_generation = 0
+        self._config_hits = 0
+        self._config_misses = 0
+        
+        # Index mémoire des listes d'accès, chargé au démarrage
+        self._access_lists: Optional[Dict[str, set]] = None
         
     def get_db_path(self, guild_id: int) -> str:
         """Retourne le chemin de la base de données pour un serveur spécifique"""
         return os.path.join(self.base_path, f"guild_{guild_id}.db")
     
+    def get_global_db_path(self) -> str:
+        """Retourne le chemin de la base de données globale"""
+        return os.path.join(self.base_path, "global.db")
+    
+    def guild_connection(self, guild_id: int):
+        """Connexion persistante (poolée) à la DB d'un serveur, à utiliser avec async with"""
+        return self.pool.guild_connection(guild_id, self.get_db_path(guild_id))
+    
+    def global_connection(self):
+        """Connexion persistante à la DB globale, à utiliser avec async with"""
+        return self.pool.global_connection(self.get_global_db_path())
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du pool de connexions (hits, misses, évictions...)"""
+        return self.pool.get_stats()
+    
+    async def close(self):
+        """Ferme toutes les connexions ouvertes"""
+        await self.pool.close_all()
+    
     async def init_guild_database(self, guild_id: int):
-        """Initialise la base de données pour un serveur spécifique"""
+        """Initialise ou met à niveau la base de données d'un serveur (schéma versionné)"""
         if guild_id in self._initialized_guilds:
             return  # Déjà initialisé
             
-        db_path = self.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
-            # Table pour les statistiques des utilisateurs
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS user_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    messages INTEGER DEFAULT 0,
-                    voice_time INTEGER DEFAULT 0,
-                    last_online TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id)
-                )
-            ''')
-            
-            # Table pour les avertissements
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS warnings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    reason TEXT,
-                    author_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Table pour les tickets
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS tickets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ticket_id TEXT,
-                    owner_id INTEGER,
-                    channel_id INTEGER,
-                    status TEXT DEFAULT 'open',
-                    reason TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    closed_at TIMESTAMP,
-                    closed_by INTEGER,
-                    close_reason TEXT
-                )
-            ''')
-            
-            # Table pour les rôles configurés
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS role_config (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    role_id INTEGER,
-                    role_name TEXT,
-                    description TEXT,
-                    emoji TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(role_id)
-                )
-            ''')
-            
-            # Table pour la configuration du serveur
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS guild_config (
-                    id INTEGER PRIMARY KEY DEFAULT 1,
-                    embed_color INTEGER DEFAULT 2827571,
-                    rules_channel_id INTEGER,
-                    rules_message_id INTEGER,
-                    verified_role_id INTEGER,
-                    default_role_id INTEGER,
-                    ticket_category_id INTEGER,
-                    ticket_create_channel_id INTEGER,
-                    ticket_log_channel_id INTEGER,
-                    mc_server_ip TEXT,
-                    mc_server_port INTEGER DEFAULT 25565,
-                    mc_status_channel_id INTEGER,
-                    mc_notification_role_id INTEGER,
-                    roles_channel_id INTEGER,
-                    config_data TEXT, -- JSON pour configurations supplémentaires
-                    CHECK (id = 1)
-                )
-            ''')
-            
-            # Insérer la configuration par défaut si elle n'existe pas
-            await db.execute('''
-                INSERT OR IGNORE INTO guild_config (id) VALUES (1)
-            ''')
-            
-            # Table pour les whitelist/blacklist (au niveau global, pas par serveur)
-            # Cette table sera dans une DB séparée pour la gestion globale
-            
-            # Table pour l'historique des messages (par heure)
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS message_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    hour_timestamp TEXT, -- Format: YYYY-MM-DD HH:00
-                    message_count INTEGER DEFAULT 0,
-                    UNIQUE(user_id, hour_timestamp)
-                )
-            ''')
-            
-            # Table pour les jeux joués
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS games_played (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    game_name TEXT,
-                    play_time INTEGER DEFAULT 0, -- en minutes
-                    last_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id, game_name)
-                )
-            ''')
-            
-            await db.commit()
+        async with self.guild_connection(guild_id) as db:
+            previous, current = await upgrade_guild_schema(db)
             
         self._initialized_guilds.add(guild_id)
-        logger.info(f"✅ Base de données initialisée pour le serveur {guild_id}")
+        if previous != current:
+            logger.info(f"✅ Base de données du serveur {guild_id} mise à jour (schéma v{previous} → v{current})")
     
     async def init_global_database(self):
         """Initialise la base de données globale pour les fonctions du bot"""
-        global_db_path = os.path.join(self.base_path, "global.db")
-        
-        async with aiosqlite.connect(global_db_path) as db:
+        async with self.global_connection() as db:
             # Table pour les whitelist/blacklist globales
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS access_lists (
@@ -170,7 +102,8 @@ class DatabaseManager:
             ''')
             
             await db.commit()
-            
+        
+        await self.load_access_lists()
         logger.info("✅ Base de données globale initialisée")
     
     async def register_guild(self, guild_id: int, guild_name: str):
@@ -179,8 +112,7 @@ class DatabaseManager:
         await self.init_guild_database(guild_id)
         
         # Enregistrer dans la DB globale
-        global_db_path = os.path.join(self.base_path, "global.db")
-        async with aiosqlite.connect(global_db_path) as db:
+        async with self.global_connection() as db:
             await db.execute('''
                 INSERT OR REPLACE INTO registered_guilds (guild_id, guild_name, last_seen)
                 VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -189,118 +121,173 @@ class DatabaseManager:
             
         logger.info(f"✅ Serveur {guild_name} ({guild_id}) enregistré avec sa propre base de données")
     
-    async def is_guild_allowed(self, guild_id: int) -> bool:
-        """Vérifie si un serveur est autorisé (utilise la DB globale)"""
-        global_db_path = os.path.join(self.base_path, "global.db")
-        async with aiosqlite.connect(global_db_path) as db:
-            # Vérifier la blacklist
+    async def load_access_lists(self):
+        """Charge la whitelist et la blacklist en mémoire (une seule requête)"""
+        access_lists = {'whitelist': set(), 'blacklist': set()}
+        async with self.global_connection() as db:
             cursor = await db.execute('''
-                SELECT 1 FROM access_lists 
-                WHERE guild_id = ? AND list_type = 'blacklist'
-            ''', (guild_id,))
-            if await cursor.fetchone():
-                return False
-            
-            # Vérifier la whitelist (si elle existe)
-            cursor = await db.execute('''
-                SELECT COUNT(*) FROM access_lists 
-                WHERE list_type = 'whitelist'
+                SELECT guild_id, list_type FROM access_lists
             ''')
-            whitelist_count = (await cursor.fetchone())[0]
-            
-            if whitelist_count > 0:
-                cursor = await db.execute('''
-                    SELECT 1 FROM access_lists 
-                    WHERE guild_id = ? AND list_type = 'whitelist'
-                ''', (guild_id,))
-                return await cursor.fetchone() is not None
-            
-            return True  # Aucune restriction si pas de whitelist
+            for guild_id, list_type in await cursor.fetchall():
+                access_lists[list_type].add(guild_id)
+        
+        self._access_lists = access_lists
+        logger.info(
+            f"🔐 Listes d'accès chargées: {len(access_lists['whitelist'])} whitelist, "
+            f"{len(access_lists['blacklist'])} blacklist"
+        )
+    
+    def _check_access(self, guild_id: int) -> bool:
+        """Décision d'accès en O(1) à partir des ensembles en mémoire"""
+        if guild_id in self._access_lists['blacklist']:
+            return False
+        
+        # Aucune restriction si pas de whitelist
+        whitelist = self._access_lists['whitelist']
+        return not whitelist or guild_id in whitelist
+    
+    async def is_guild_allowed(self, guild_id: int) -> bool:
+        """Vérifie si un serveur est autorisé (index mémoire de la DB globale)"""
+        if self._access_lists is None:
+            await self.load_access_lists()
+        return self._check_access(guild_id)
+    
+    async def are_guilds_allowed(self, guild_ids) -> Dict[int, bool]:
+        """Vérifie l'accès d'un ensemble de serveurs en une passe"""
+        if self._access_lists is None:
+            await self.load_access_lists()
+        return {guild_id: self._check_access(guild_id) for guild_id in guild_ids}
     
     async def add_to_access_list(self, guild_id: int, list_type: str, reason: str = None, added_by: int = None):
         """Ajoute un serveur à la whitelist ou blacklist (DB globale)"""
-        global_db_path = os.path.join(self.base_path, "global.db")
-        async with aiosqlite.connect(global_db_path) as db:
+        async with self.global_connection() as db:
             await db.execute('''
                 INSERT OR REPLACE INTO access_lists 
                 (guild_id, user_id, list_type, reason, added_by)
                 VALUES (?, 0, ?, ?, ?)
             ''', (guild_id, list_type, reason, added_by))
             await db.commit()
+        
+        if self._access_lists is not None:
+            self._access_lists[list_type].add(guild_id)
     
     async def remove_from_access_list(self, guild_id: int, list_type: str):
         """Retire un serveur de la whitelist ou blacklist (DB globale)"""
-        global_db_path = os.path.join(self.base_path, "global.db")
-        async with aiosqlite.connect(global_db_path) as db:
+        async with self.global_connection() as db:
             await db.execute('''
                 DELETE FROM access_lists 
                 WHERE guild_id = ? AND list_type = ?
             ''', (guild_id, list_type))
             await db.commit()
+        
+        if self._access_lists is not None:
+            self._access_lists[list_type].discard(guild_id)
 
-    async def get_guild_config(self, guild_id: int) -> Dict[str, Any]:
-        """Récupère la configuration d'un serveur depuis sa DB dédiée"""
-        await self.init_guild_database(guild_id)  # S'assurer que la DB existe
+    async def _read_guild_config(self, db, guild_id: int) -> Dict[str, Any]:
+        """Lit et décode la ligne guild_config avec une connexion déjà ouverte"""
+        cursor = await db.execute('''
+            SELECT * FROM guild_config WHERE id = 1
+        ''')
+        row = await cursor.fetchone()
         
-        db_path = self.get_db_path(guild_id)
-        async with aiosqlite.connect(db_path) as db:
-            cursor = await db.execute('''
-                SELECT * FROM guild_config WHERE id = 1
-            ''')
-            row = await cursor.fetchone()
+        if row:
+            # Convertir le résultat en dictionnaire
+            columns = [description[0] for description in cursor.description]
+            config = dict(zip(columns, row))
             
-            if row:
-                # Convertir le résultat en dictionnaire
-                columns = [description[0] for description in cursor.description]
-                config = dict(zip(columns, row))
-                
-                # Décoder les données JSON si présentes
-                if config.get('config_data'):
-                    try:
-                        config['extra_config'] = json.loads(config['config_data'])
-                    except:
-                        config['extra_config'] = {}
-                else:
+            # Décoder les données JSON si présentes
+            if config.get('config_data'):
+                try:
+                    config['extra_config'] = json.loads(config['config_data'])
+                except:
                     config['extra_config'] = {}
-                
-                return config
+            else:
+                config['extra_config'] = {}
             
-            # Configuration par défaut si non trouvée
-            return {
-                'guild_id': guild_id,
-                'embed_color': 2827571,
-                'extra_config': {}
-            }
+            return config
+        
+        # Configuration par défaut si non trouvée
+        return {
+            'guild_id': guild_id,
+            'embed_color': 2827571,
+            'extra_config': {}
+        }
+
+    async def get_guild_config(self, guild_id: int) -> Mapping[str, Any]:
+        """Récupère la configuration d'un serveur (lecture via le cache, snapshot immuable)"""
+        config = self._config_cache.get(guild_id)
+        if config is not None:
+            self._config_hits += 1
+            return config
+        
+        self._config_misses += 1
+        await self.init_guild_database(guild_id)  # S'assurer que la DB existe
+        
+        # Une mise à jour pendant la lecture rend ce résultat obsolète : ne pas le mettre en cache
+        version = (self._config_generation, self._config_versions.get(guild_id, 0))
+        async with self.guild_connection(guild_id) as db:
+            config = _freeze(await self._read_guild_config(db, guild_id))
+        
+        if (self._config_generation, self._config_versions.get(guild_id, 0)) == version:
+            self._config_cache[guild_id] = config
+        return config
     
     async def update_guild_config(self, guild_id: int, **kwargs):
-        """Met à jour la configuration d'un serveur dans sa DB dédiée"""
+        """Met à jour la configuration d'un serveur dans sa DB dédiée et rafraîchit le cache"""
         await self.init_guild_database(guild_id)  # S'assurer que la DB existe
         
         # Séparer les données JSON des colonnes directes
         extra_config = kwargs.pop('extra_config', {})
         
-        if kwargs:
-            # Construire la requête dynamiquement
-            set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
-            values = list(kwargs.values())
-            
-            db_path = self.get_db_path(guild_id)
-            async with aiosqlite.connect(db_path) as db:
+        if not kwargs and not extra_config:
+            return
+        
+        async with self.guild_connection(guild_id) as db:
+            if kwargs:
+                # Construire la requête dynamiquement
+                set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
+                values = list(kwargs.values())
+                
                 await db.execute(f'''
                     UPDATE guild_config 
                     SET {set_clause}
                     WHERE id = 1
                 ''', values)
-                
-                # Mettre à jour les données JSON si nécessaire
-                if extra_config:
-                    await db.execute('''
-                        UPDATE guild_config 
-                        SET config_data = ?
-                        WHERE id = 1
-                    ''', (json.dumps(extra_config),))
-                
-                await db.commit()
+            
+            # Mettre à jour les données JSON si nécessaire
+            if extra_config:
+                await db.execute('''
+                    UPDATE guild_config 
+                    SET config_data = ?
+                    WHERE id = 1
+                ''', (json.dumps(extra_config),))
+            
+            await db.commit()
+            
+            # Remplacer l'entrée du cache par la nouvelle version en une seule affectation
+            config = _freeze(await self._read_guild_config(db, guild_id))
+        
+        self._config_versions[guild_id] = self._config_versions.get(guild_id, 0) + 1
+        self._config_cache[guild_id] = config
+    
+    def invalidate_guild_config(self, guild_id: int = None):
+        """Invalide le cache de configuration d'un serveur (ou de tous si guild_id est None)"""
+        if guild_id is None:
+            self._config_generation += 1
+            self._config_cache.clear()
+            return
+        self._config_versions[guild_id] = self._config_versions.get(guild_id, 0) + 1
+        self._config_cache.pop(guild_id, None)
+    
+    def get_config_cache_stats(self) -> Dict[str, Any]:
+        """Retourne la taille et le taux de succès du cache de configuration"""
+        total = self._config_hits + self._config_misses
+        return {
+            'size': len(self._config_cache),
+            'hits': self._config_hits,
+            'misses': self._config_misses,
+            'hit_ratio': self._config_hits / total if total else 0.0
+        }
 
 # Instance globale
 db_manager = DatabaseManager()
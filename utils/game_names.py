@@ -0,0 +1,87 @@
+"""
+Filtrage et normalisation des noms de jeux (activités Discord)
+Les mots filtrés sont compilés en une seule expression régulière ; chaque nom n'est analysé qu'une fois
+"""
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Tuple
+
+from config import Config
+
+logger = logging.getLogger('bot')
+
+_TRADEMARKS = re.compile(r"[™®©]")
+_SEPARATORS = re.compile(r"[\s:\-–—_.,!]+")
+
+
+def normalize(name: str) -> str:
+    """Clé de comparaison d'un nom : NFKC, sans symboles de marque, casse et séparateurs uniformisés"""
+    # Symboles retirés avant NFKC, qui transformerait ™ en "TM"
+    key = unicodedata.normalize("NFKC", _TRADEMARKS.sub("", name)).casefold()
+    return _SEPARATORS.sub(" ", key).strip()
+
+
+class GameNameIndex:
+    """Résout un nom brut en (nom canonique, filtré ?) avec mémorisation par nom brut"""
+
+    def __init__(self, filtered_words: Iterable[str] = (), aliases: Dict[str, List[str]] = None,
+                 max_cache: int = 10000):
+        words = sorted({normalize(word) for word in filtered_words if normalize(word)}, key=len, reverse=True)
+        # Une seule passe sur le nom quelle que soit la taille de la liste
+        self._filter = re.compile("|".join(map(re.escape, words))) if words else None
+
+        # Clé normalisée -> nom affiché ; les alias pointent vers leur nom canonique
+        self._names: Dict[str, str] = {}
+        for canonical, variants in (aliases or {}).items():
+            for variant in [canonical, *variants]:
+                self._names[normalize(variant)] = canonical
+
+        self.max_cache = max_cache
+        self._cache: Dict[str, Tuple[str, bool]] = {}
+
+    def resolve(self, name: str) -> Tuple[str, bool]:
+        """(nom canonique, filtré ?) ; le premier nom vu pour une clé devient le nom affiché"""
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+
+        key = normalize(name)
+        canonical = self._names.get(key)
+        if canonical is None:
+            canonical = self._names[key] = _TRADEMARKS.sub("", name).strip() or name
+        filtered = bool(self._filter and self._filter.search(key))
+
+        if len(self._cache) >= self.max_cache:
+            self._cache.clear()
+        result = self._cache[name] = (canonical, filtered)
+        return result
+
+    def canonical(self, name: str) -> str:
+        return self.resolve(name)[0]
+
+    def is_filtered(self, name: str) -> bool:
+        return bool(name) and self.resolve(name)[1]
+
+    def register(self, names: Iterable[str]):
+        """Déclare des noms déjà connus (compteurs existants) pour qu'ils restent les noms affichés"""
+        for name in names:
+            self.resolve(name)
+
+
+def load_aliases(path: str) -> Dict[str, List[str]]:
+    """Lit la table d'alias {nom canonique: [variantes]} si elle existe"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.error(f"❌ Erreur de lecture des alias de jeux: {str(e)}")
+        return {}
+
+
+# Instance globale
+game_names = GameNameIndex(Config.FILTERED_GAME_WORDS, load_aliases(Config.GAME_ALIASES_FILE))
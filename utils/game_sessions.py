@@ -0,0 +1,116 @@
+"""
+Suivi des sessions de jeu et de stream à partir des changements de présence
+Chaque événement compare les activités actuelles aux sessions ouvertes du membre : coût indépendant du nombre de membres
+"""
+import time
+from typing import Dict, FrozenSet, List, Tuple
+
+# Activité suivie : ('game', nom du jeu) ou ('streaming', '')
+ActivityKey = Tuple[str, str]
+
+STREAMING: ActivityKey = ('streaming', '')
+
+
+class _Session:
+    """Activité en cours d'un membre"""
+
+    __slots__ = ('started', 'settled', 'remainder')
+
+    def __init__(self, now: float):
+        self.started = now
+        # Instant jusqu'auquel le temps a déjà été crédité
+        self.settled = now
+        # Secondes pas encore converties en minutes (arrondies à la fermeture de la session)
+        self.remainder = 0.0
+
+
+class GameSessionTracker:
+    """Sessions de jeu/stream ouvertes par utilisateur ; la mémoire est bornée par les sessions ouvertes"""
+
+    def __init__(self):
+        self._sessions: Dict[int, Dict[ActivityKey, _Session]] = {}
+        # Minutes des sessions fermées, en attente du prochain règlement
+        self._closed: List[Tuple[int, ActivityKey, int]] = []
+
+        # Compteurs de fonctionnement
+        self.events = 0
+        self.transitions = 0
+
+    def __len__(self) -> int:
+        return sum(len(sessions) for sessions in self._sessions.values())
+
+    def update(self, user_id: int, activities: FrozenSet[ActivityKey], now: float = None):
+        """Applique l'état de présence d'un utilisateur (ouvre/ferme les sessions qui ont changé)"""
+        self.events += 1
+        current = self._sessions.get(user_id)
+        if current is None:
+            if not activities:
+                return
+            current = self._sessions[user_id] = {}
+        elif current.keys() == activities:
+            # Cas le plus fréquent : statut, avatar ou même jeu vu depuis un autre serveur
+            return
+
+        now = now if now is not None else time.monotonic()
+        for key in [key for key in current if key not in activities]:
+            self._close(user_id, key, current.pop(key), now)
+        for key in activities:
+            if key not in current:
+                current[key] = _Session(now)
+                self.transitions += 1
+        if not current:
+            del self._sessions[user_id]
+
+    def sync(self, states: Dict[int, FrozenSet[ActivityKey]], now: float = None):
+        """Aligne toutes les sessions sur un instantané des présences (démarrage, reconnexion)"""
+        now = now if now is not None else time.monotonic()
+        for user_id in [user_id for user_id in self._sessions if user_id not in states]:
+            self.update(user_id, frozenset(), now)
+        for user_id, activities in states.items():
+            self.update(user_id, activities, now)
+
+    def close_all(self, now: float = None):
+        """Ferme toutes les sessions (arrêt du bot)"""
+        now = now if now is not None else time.monotonic()
+        for user_id in list(self._sessions):
+            self.update(user_id, frozenset(), now)
+
+    def _close(self, user_id: int, key: ActivityKey, session: _Session, now: float):
+        self.transitions += 1
+        minutes = self._credit(session, now)
+        # Fin de session : les secondes restantes sont arrondies à la minute la plus proche
+        if session.remainder >= 30:
+            minutes += 1
+        if minutes:
+            self._closed.append((user_id, key, minutes))
+
+    @staticmethod
+    def _credit(session: _Session, now: float) -> int:
+        """Convertit le temps écoulé depuis le dernier règlement en minutes entières"""
+        seconds = session.remainder + max(0.0, now - session.settled)
+        session.settled = now
+        minutes, session.remainder = divmod(seconds, 60)
+        return int(minutes)
+
+    def settle(self, now: float = None) -> List[Tuple[int, ActivityKey, int]]:
+        """Crédite le temps des sessions ouvertes et fermées : [(user_id, activité, minutes)]"""
+        now = now if now is not None else time.monotonic()
+        credited, self._closed = self._closed, []
+        for user_id, sessions in self._sessions.items():
+            for key, session in sessions.items():
+                minutes = self._credit(session, now)
+                if minutes:
+                    credited.append((user_id, key, minutes))
+        return credited
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retourne l'état du suivi"""
+        return {
+            'open_sessions': len(self),
+            'events': self.events,
+            'transitions': self.transitions
+        }
+
+
+# Instance globale
+game_sessions = GameSessionTracker()
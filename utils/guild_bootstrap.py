@@ -0,0 +1,113 @@
+"""
+Initialisation concurrente et bornée des bases de données serveur au démarrage
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional
+
+from .database import db_manager
+from .migration import migration_manager
+
+logger = logging.getLogger('bot')
+
+
+class GuildBootstrap:
+    """Enregistre et migre les serveurs en parallèle sous une limite de concurrence"""
+
+    def __init__(self, concurrency: int = 8, progress_step: int = 25):
+        self.concurrency = max(1, concurrency)
+        self.progress_step = progress_step
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.ready_guilds = set()
+
+        # Durées cumulées par phase (secondes) pour le rapport final
+        self.phase_times = {'register': 0.0, 'migrate': 0.0}
+        self._done = 0
+        self._failed = 0
+        self._total = 0
+
+    def is_guild_ready(self, guild_id: int) -> bool:
+        """Indique si la DB d'un serveur est prête"""
+        return guild_id in self.ready_guilds
+
+    async def _initialize(self, guild_id: int, guild_name: str):
+        """Enregistre et migre un serveur une seule fois, quel que soit le chemin d'appel"""
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            if guild_id in self.ready_guilds:
+                return
+
+            start = time.perf_counter()
+            await db_manager.register_guild(guild_id, guild_name)
+            registered = time.perf_counter()
+            await migration_manager.migrate_all_data(guild_id)
+            finished = time.perf_counter()
+
+            self.phase_times['register'] += registered - start
+            self.phase_times['migrate'] += finished - registered
+            self.ready_guilds.add(guild_id)
+
+    async def _bootstrap_guild(self, guild_id: int, guild_name: str):
+        try:
+            async with self._semaphore:
+                await self._initialize(guild_id, guild_name)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            # Les échecs comptent aussi : la progression atteint toujours le total
+            self._done += 1
+            if self._done % self.progress_step == 0 or self._done == self._total:
+                failed = f" ({self._failed} en échec)" if self._failed else ""
+                logger.info(f"🔄 Initialisation des serveurs: {self._done}/{self._total}{failed}")
+
+    def _schedule(self, guild_id: int, guild_name: str) -> asyncio.Task:
+        task = self._tasks.get(guild_id)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            task = asyncio.create_task(self._bootstrap_guild(guild_id, guild_name))
+            self._tasks[guild_id] = task
+        return task
+
+    async def ensure_guild_ready(self, guild):
+        """Initialise immédiatement un serveur s'il n'est pas prêt (ex: commande reçue)"""
+        if guild.id in self.ready_guilds:
+            return
+        # Passe devant la file d'attente : le verrou par serveur évite un double traitement
+        await self._initialize(guild.id, guild.name)
+
+    async def run(self, guilds: Iterable):
+        """Initialise tous les serveurs donnés et journalise le temps par phase"""
+        pending = [guild for guild in guilds if guild.id not in self.ready_guilds]
+        if not pending:
+            return
+
+        self._done = 0
+        self._failed = 0
+        self._total = len(pending)
+        self.phase_times = {'register': 0.0, 'migrate': 0.0}
+        logger.info(
+            f"🔄 Initialisation de {self._total} serveurs "
+            f"(concurrence: {self.concurrency})"
+        )
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._schedule(guild.id, guild.name) for guild in pending),
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+
+        for guild, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Échec de l'initialisation du serveur {guild.id}: {str(result)}")
+
+        logger.info(
+            f"✅ {len(self.ready_guilds)} serveurs prêts en {elapsed:.2f}s "
+            f"(enregistrement: {self.phase_times['register']:.2f}s, "
+            f"migration: {self.phase_times['migrate']:.2f}s cumulés)"
+        )
@@ -5,7 +5,6 @@ Utilise les bases de données indépendantes par serveur
 import json
 from typing import Dict, Any, Optional
 from .database import db_manager
-import aiosqlite
 
 class GuildDataManager:
     """Gestionnaire unifié des données par serveur avec DB indépendantes"""
@@ -24,9 +23,7 @@ class GuildDataManager:
     async def get_user_stats(guild_id: int, user_id: int) -> Dict[str, Any]:
         """Récupère les statistiques d'un utilisateur pour un serveur spécifique"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             cursor = await db.execute('''
                 SELECT messages, voice_time, last_online 
                 FROM user_stats 
@@ -46,9 +43,7 @@ class GuildDataManager:
     async def update_user_stats(guild_id: int, user_id: int, **kwargs):
         """Met à jour les statistiques d'un utilisateur pour un serveur spécifique"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             # Construire la requête dynamiquement
             if kwargs:
                 set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
@@ -66,9 +61,7 @@ class GuildDataManager:
     async def get_warnings(guild_id: int, user_id: int) -> list:
         """Récupère les avertissements d'un utilisateur pour un serveur spécifique"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             cursor = await db.execute('''
                 SELECT reason, author_id, created_at 
                 FROM warnings 
@@ -82,9 +75,7 @@ class GuildDataManager:
     async def add_warning(guild_id: int, user_id: int, reason: str, author_id: int) -> int:
         """Ajoute un avertissement et retourne le nombre total pour ce serveur"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             await db.execute('''
                 INSERT INTO warnings (user_id, reason, author_id)
                 VALUES (?, ?, ?)
@@ -104,9 +95,7 @@ class GuildDataManager:
     async def get_role_config(guild_id: int) -> Dict[str, Dict]:
         """Récupère la configuration des rôles d'un serveur spécifique"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             cursor = await db.execute('''
                 SELECT role_id, role_name, description, emoji 
                 FROM role_config
@@ -126,9 +115,7 @@ class GuildDataManager:
     async def add_role_config(guild_id: int, role_id: int, name: str, description: str = '', emoji: str = ''):
         """Ajoute une configuration de rôle pour un serveur spécifique"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             await db.execute('''
                 INSERT OR REPLACE INTO role_config 
                 (role_id, role_name, description, emoji)
@@ -140,9 +127,7 @@ class GuildDataManager:
     async def remove_role_config(guild_id: int, role_id: int):
         """Supprime une configuration de rôle pour un serveur spécifique"""
         await db_manager.init_guild_database(guild_id)
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
+        async with db_manager.guild_connection(guild_id) as db:
             await db.execute('''
                 DELETE FROM role_config 
                 WHERE role_id = ?
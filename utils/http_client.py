@@ -0,0 +1,182 @@
+"""
+Client HTTP asynchrone partagé par tous les cogs (une seule session aiohttp)
+Connexions keep-alive réutilisées par hôte, cache DNS, délais, nouvelles tentatives et limite par hôte
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config import Config
+
+logger = logging.getLogger('bot')
+
+# Réponses temporaires qui justifient une nouvelle tentative
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Méthodes rejouables sans effet de bord ; les autres ne sont retentées que sur demande
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class HttpResponse:
+    """Réponse entièrement lue : la connexion est rendue au pool avant le retour"""
+
+    __slots__ = ('status', 'headers', 'body', 'url')
+
+    def __init__(self, status: int, headers, body: bytes, url: str):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class _HostStats:
+    """Compteurs d'un hôte"""
+
+    __slots__ = ('requests', 'errors', 'retries', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class HttpClient:
+    """Session aiohttp unique créée à la première requête et fermée à l'arrêt du bot"""
+
+    def __init__(self, timeout: float = 15, retries: int = 2, per_host: int = 4,
+                 total_connections: int = 100, dns_ttl: int = 300, backoff: float = 0.5):
+        self.timeout = timeout
+        self.retries = retries
+        self.per_host = per_host
+        self.total_connections = total_connections
+        self.dns_ttl = dns_ttl
+        self.backoff = backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _HostStats] = {}
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.total_connections,
+                limit_per_host=self.per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            logger.info(f"🌐 Client HTTP partagé démarré ({self.per_host} connexions max par hôte)")
+        return self._session
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Attente avant la tentative suivante : Retry-After s'il est fourni, sinon exponentielle avec gigue"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), 30.0)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def request(self, method: str, url: str, *, retries: int = None,
+                      timeout: float = None, **kwargs) -> HttpResponse:
+        """Envoie une requête et lit la réponse ; lève aiohttp.ClientError ou asyncio.TimeoutError si toutes les tentatives échouent"""
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+
+        host = urlsplit(url).hostname or ''
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = _HostStats()
+        session = self._ensure_session()
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                async with self._host_limit(host):
+                    async with session.request(method, url, **kwargs) as resp:
+                        body = await resp.read()
+                        response = HttpResponse(resp.status, resp.headers, body, str(resp.url))
+                        retry_after = resp.headers.get('Retry-After')
+                error = None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                response, error = None, e
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                stats.requests += 1
+                stats.total_ms += elapsed
+                stats.max_ms = max(stats.max_ms, elapsed)
+
+            failed = error is not None or response.status in RETRY_STATUSES
+            if failed:
+                stats.errors += 1
+            if not failed or attempt >= retries:
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            stats.retries += 1
+            reason = type(error).__name__ if error is not None else f"HTTP {response.status}"
+            logger.warning(f"⚠️ {method} {host} : {reason}, nouvelle tentative {attempt}/{retries}")
+            await asyncio.sleep(self._delay(attempt - 1, retry_after))
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request('POST', url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Requêtes, erreurs, tentatives et latences (ms) par hôte"""
+        return {
+            host: {
+                'requests': stats.requests,
+                'errors': stats.errors,
+                'retries': stats.retries,
+                'avg_ms': round(stats.total_ms / stats.requests, 1) if stats.requests else 0.0,
+                'max_ms': round(stats.max_ms, 1)
+            }
+            for host, stats in self._stats.items()
+        }
+
+    async def close(self):
+        """Ferme la session et ses connexions (arrêt du bot)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Instance globale
+http_client = HttpClient(
+    timeout=Config.HTTP_TIMEOUT,
+    retries=Config.HTTP_RETRIES,
+    per_host=Config.HTTP_PER_HOST,
+    dns_ttl=Config.HTTP_DNS_TTL,
+)
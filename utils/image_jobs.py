@@ -0,0 +1,264 @@
+"""
+Traitements d'images exécutés dans le pool de processus (voir utils/media_pool.py)
+Fonctions pures de niveau module : elles reçoivent et renvoient des octets pour être sérialisables
+"""
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+
+def _flatten_alpha(image):
+    """Remplace la transparence par un fond blanc (formats sans canal alpha)"""
+    if image.mode not in ["RGBA", "P"]:
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    if image.mode == "P":
+        image = image.convert("RGBA")
+    background.paste(
+        image, mask=image.split()[-1] if image.mode == "RGBA" else None
+    )
+    return background
+
+
+def convert_image(image_data: bytes, format_type: str) -> bytes:
+    """Convertit une image vers le format donné (png, jpeg, webp, gif, bmp)"""
+    image = Image.open(io.BytesIO(image_data))
+
+    # Convertir en RGB si nécessaire (pour JPG)
+    if format_type == "jpeg":
+        image = _flatten_alpha(image)
+
+    output = io.BytesIO()
+    image.save(output, format=format_type.upper())
+    return output.getvalue()
+
+
+def compress_image(image_data: bytes, quality: int) -> bytes:
+    """Recompresse une image en JPEG avec la qualité donnée"""
+    image = _flatten_alpha(Image.open(io.BytesIO(image_data)))
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def enhance_image(image_data: bytes, scale_factor: float, as_jpeg: bool):
+    """Agrandit (Lanczos) et améliore netteté/contraste ; renvoie (octets, extension, nouvelle taille)"""
+    image = Image.open(io.BytesIO(image_data))
+    original_format = image.format or "PNG"
+
+    # Convertir en RGB si nécessaire (la transparence est conservée pour PNG)
+    if image.mode == "P":
+        image = image.convert("RGBA")
+    elif image.mode not in ["RGB", "RGBA"]:
+        image = image.convert("RGB")
+
+    new_size = (int(image.size[0] * scale_factor), int(image.size[1] * scale_factor))
+
+    # 1. Redimensionnement avec algorithme Lanczos (haute qualité)
+    enhanced_image = image.resize(new_size, Image.Resampling.LANCZOS)
+
+    # 2. Améliorer la netteté puis légèrement le contraste
+    enhanced_image = ImageEnhance.Sharpness(enhanced_image).enhance(1.2)
+    enhanced_image = ImageEnhance.Contrast(enhanced_image).enhance(1.1)
+
+    # Appliquer un filtre de netteté supplémentaire pour les détails
+    if scale_factor >= 2.0:
+        enhanced_image = enhanced_image.filter(
+            ImageFilter.UnsharpMask(radius=1, percent=120, threshold=3)
+        )
+
+    output = io.BytesIO()
+    if original_format.upper() == "JPEG" or as_jpeg:
+        # JPEG ne supporte pas la transparence
+        enhanced_image.convert("RGB").save(output, format="JPEG", quality=95, optimize=True)
+        extension = "jpg"
+    else:
+        enhanced_image.save(output, format="PNG", optimize=True)
+        extension = "png"
+
+    return output.getvalue(), extension, new_size
+
+
+def _color_histogram(pixels, bits: int = 5):
+    """Histogramme 3D des couleurs : (couleur moyenne, nombre de pixels) par case non vide"""
+    shift = 8 - bits
+    quantized = (pixels >> shift).astype(np.int32)
+    index = (quantized[:, 0] << (2 * bits)) | (quantized[:, 1] << bits) | quantized[:, 2]
+    size = 1 << (3 * bits)
+
+    counts = np.bincount(index, minlength=size)
+    sums = np.stack(
+        [np.bincount(index, weights=pixels[:, channel], minlength=size) for channel in range(3)],
+        axis=1,
+    )
+    occupied = counts.nonzero()[0]
+    return sums[occupied] / counts[occupied, None], counts[occupied].astype(np.float64)
+
+
+def _box_spread(colors, weights, box):
+    """Erreur quadratique d'une boîte sur son axe le plus dispersé : (score, axe)"""
+    if len(box) < 2:
+        return 0.0, 0
+    box_colors, box_weights = colors[box], weights[box]
+    mean = np.average(box_colors, axis=0, weights=box_weights)
+    spread = (box_weights[:, None] * (box_colors - mean) ** 2).sum(axis=0)
+    axis = int(spread.argmax())
+    return float(spread[axis]), axis
+
+
+def _median_cut(colors, weights, num_colors: int):
+    """Découpe médiane pondérée : coupe la boîte qui contribue le plus à l'erreur, sur son axe le plus large"""
+    boxes = [np.arange(len(colors))]
+    spreads = [_box_spread(colors, weights, boxes[0])]
+    while len(boxes) < num_colors:
+        best = max(range(len(boxes)), key=lambda i: spreads[i][0])
+        if spreads[best][0] <= 0:
+            break
+
+        box = boxes.pop(best)
+        axis = spreads.pop(best)[1]
+        ordered = box[np.argsort(colors[box, axis], kind="stable")]
+        cumulative = np.cumsum(weights[ordered])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        split = min(max(split, 1), len(ordered) - 1)
+        for half in (ordered[:split], ordered[split:]):
+            boxes.append(half)
+            spreads.append(_box_spread(colors, weights, half))
+
+    return np.array([np.average(colors[box], axis=0, weights=weights[box]) for box in boxes])
+
+
+def _refine(colors, weights, centers, iterations: int = 2):
+    """Quelques itérations de Lloyd sur l'histogramme (pas sur les pixels) ; renvoie (centres, poids)"""
+    for iteration in range(iterations + 1):
+        distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        if iteration == iterations:
+            break
+        for channel in range(3):
+            sums = np.bincount(labels, weights=weights * colors[:, channel], minlength=len(centers))
+            centers[:, channel] = np.where(totals > 0, sums / np.maximum(totals, 1), centers[:, channel])
+    return centers, totals
+
+
+def dominant_colors(img_array, num_colors: int, backend: str = "median_cut"):
+    """Couleurs dominantes d'un tableau de pixels (N, 3) ; renvoie (couleurs, pourcentages) triés"""
+    if backend == "kmeans":
+        from sklearn.cluster import KMeans
+
+        # Utiliser KMeans pour trouver les couleurs dominantes
+        kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=10)
+        kmeans.fit(img_array)
+
+        colors = kmeans.cluster_centers_.astype(int)
+        unique_labels, counts = np.unique(kmeans.labels_, return_counts=True)
+        percentages = (counts / len(kmeans.labels_)) * 100
+    else:
+        # Quantification vectorisée : histogramme 3D, découpe médiane puis affinage
+        bin_colors, bin_weights = _color_histogram(img_array)
+        centers = _median_cut(bin_colors, bin_weights, num_colors)
+        centers, totals = _refine(bin_colors, bin_weights, centers)
+        keep = totals > 0
+        colors = np.clip(np.rint(centers[keep]), 0, 255).astype(int)
+        percentages = totals[keep] / bin_weights.sum() * 100
+
+    # Trier par pourcentage décroissant
+    sorted_indices = np.argsort(percentages)[::-1]
+    return colors[sorted_indices], percentages[sorted_indices]
+
+
+def extract_palette(image_data: bytes, num_colors: int, backend: str = "median_cut"):
+    """Couleurs dominantes ; renvoie (couleurs, pourcentages, taille d'origine, palette PNG)"""
+    image = Image.open(io.BytesIO(image_data))
+    original_size = image.size
+
+    # Convertir en RGB puis redimensionner pour accélérer l'analyse
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((200, 200))
+    img_array = np.array(image).reshape(-1, 3)
+
+    colors, percentages = dominant_colors(img_array, num_colors, backend)
+    return colors, percentages, original_size, render_palette(colors, num_colors)
+
+
+def render_palette(colors, num_colors: int) -> bytes:
+    """Dessine la palette PNG : en ligne jusqu'à 5 couleurs, en grille au-delà"""
+    if num_colors <= 5:
+        # Palette horizontale pour 5 couleurs ou moins
+        palette_width = min(num_colors * 120, 600)
+        palette_height = 150
+        palette_img = Image.new(
+            "RGB", (palette_width, palette_height), (40, 40, 40)
+        )
+        draw = ImageDraw.Draw(palette_img)
+
+        rect_width = (palette_width - 20) // num_colors
+        start_x = 10
+
+        for i, color in enumerate(colors):
+            x = start_x + (i * rect_width)
+
+            # Rectangle principal
+            draw.rectangle([x, 20, x + rect_width - 10, 130], fill=tuple(color))
+
+            # Bordure subtile
+            draw.rectangle(
+                [x, 20, x + rect_width - 10, 130],
+                outline=(255, 255, 255),
+                width=2,
+            )
+    else:
+        # Palette en grille pour plus de 5 couleurs
+        cols_per_row = 5
+        rows = (num_colors + cols_per_row - 1) // cols_per_row
+        palette_width = cols_per_row * 120
+        palette_height = rows * 100 + 50
+
+        palette_img = Image.new(
+            "RGB", (palette_width, palette_height), (30, 30, 30)
+        )
+        draw = ImageDraw.Draw(palette_img)
+
+        # Titre
+        try:
+            title_font = ImageFont.truetype("arial.ttf", 20)
+        except:
+            title_font = ImageFont.load_default()
+
+        draw.text(
+            (palette_width // 2, 15),
+            f"Palette de {num_colors} couleurs",
+            fill=(255, 255, 255),
+            font=title_font,
+            anchor="mm",
+        )
+
+        # Dessiner les rectangles
+        for i, color in enumerate(colors):
+            row = i // cols_per_row
+            col = i % cols_per_row
+
+            x = col * 120 + 10
+            y = row * 100 + 60
+
+            # Rectangle de couleur
+            draw.rectangle([x, y, x + 100, y + 80], fill=tuple(color))
+            draw.rectangle(
+                [x, y, x + 100, y + 80], outline=(255, 255, 255), width=1
+            )
+
+            # Numéro
+            draw.text(
+                (x + 5, y + 5),
+                str(i + 1),
+                fill=(255, 255, 255),
+                font=title_font,
+            )
+
+    output = io.BytesIO()
+    palette_img.save(output, format="PNG")
+    return output.getvalue()
@@ -0,0 +1,170 @@
+"""
+Classements maintenus incrémentalement pour les commandes de statistiques
+Chaque classement garde ses entrées triées : top N en O(N), rang d'un membre en O(log n)
+"""
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _as_number(value) -> float:
+    """Compteur lu dans stats.json (certaines anciennes valeurs sont des chaînes)"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class Leaderboard:
+    """Scores triés par ordre décroissant (liste triée de (-score, clé) + dictionnaire des scores)"""
+
+    __slots__ = ('_scores', '_order', 'total')
+
+    def __init__(self, scores: Dict[str, float] = None):
+        self._scores: Dict[str, float] = dict(scores or {})
+        # Tri unique au chargement, puis insertions dichotomiques
+        self._order: List[Tuple[float, str]] = sorted((-score, key) for key, score in self._scores.items())
+        self.total = sum(self._scores.values())
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._scores
+
+    def get(self, key: str, default: float = 0) -> float:
+        return self._scores.get(key, default)
+
+    def set(self, key: str, score: float):
+        """Fixe le score d'une clé et la replace dans le classement"""
+        old = self._scores.get(key)
+        if old == score:
+            return
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, key))]
+            self.total -= old
+        self._scores[key] = score
+        insort(self._order, (-score, key))
+        self.total += score
+
+    def add(self, key: str, delta: float) -> float:
+        """Incrémente le score d'une clé ; renvoie le nouveau score"""
+        score = self._scores.get(key, 0) + delta
+        self.set(key, score)
+        return score
+
+    def remove(self, key: str):
+        """Retire une clé du classement"""
+        old = self._scores.pop(key, None)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, key))]
+            self.total -= old
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        """Parcourt les entrées du meilleur au moins bon score"""
+        for negative, key in self._order:
+            yield key, -negative
+
+    def top(self, limit: int) -> List[Tuple[str, float]]:
+        """Les `limit` meilleures entrées (clé, score)"""
+        return [(key, -negative) for negative, key in self._order[:limit]]
+
+    def rank(self, key: str) -> Optional[int]:
+        """Rang (à partir de 1) d'une clé ; les ex æquo partagent le même rang"""
+        score = self._scores.get(key)
+        if score is None:
+            return None
+        return bisect_left(self._order, (-score,)) + 1
+
+
+class LeaderboardIndex:
+    """Classements par serveur (membres, salons) et globaux (emojis, jeux)"""
+
+    # Catégorie -> clé des compteurs par utilisateur dans stats.json
+    USER_CATEGORIES = {
+        'messages': 'messages',
+        'vocal': 'voice_time',
+        'streaming': 'streaming',
+    }
+    # Catégorie -> type de salon dans stats.json['channels']
+    CHANNEL_CATEGORIES = {
+        'text_channels': 'text',
+        'voice_channels': 'voice',
+    }
+
+    def __init__(self):
+        # (guild_id ou None pour les classements globaux, catégorie) -> classement
+        self._boards: Dict[Tuple[Optional[int], str], Leaderboard] = {}
+
+    def board(self, guild_id: Optional[int], category: str) -> Leaderboard:
+        """Classement d'un serveur (ou global si guild_id est None) ; vide s'il n'existe pas encore"""
+        board = self._boards.get((guild_id, category))
+        if board is None:
+            board = self._boards[(guild_id, category)] = Leaderboard()
+        return board
+
+    def rebuild_guild(self, guild, stats_data: Dict):
+        """Construit les classements d'un serveur à partir des compteurs (membres non-bots uniquement)"""
+        members = {str(member.id) for member in guild.members if not member.bot}
+        for category, key in self.USER_CATEGORIES.items():
+            counters = stats_data.get(key, {})
+            self._boards[(guild.id, category)] = Leaderboard(
+                {user_id: _as_number(value) for user_id, value in counters.items() if user_id in members}
+            )
+
+        channels = {str(channel.id) for channel in guild.channels}
+        for category, channel_type in self.CHANNEL_CATEGORIES.items():
+            counters = stats_data.get('channels', {}).get(channel_type, {})
+            self._boards[(guild.id, category)] = Leaderboard(
+                {channel_id: _as_number(value) for channel_id, value in counters.items() if channel_id in channels}
+            )
+
+    def rebuild_global(self, stats_data: Dict):
+        """Construit les classements globaux (emojis + réactions, temps de jeu total par jeu)"""
+        emojis: Dict[str, float] = {}
+        for source in ('emojis', 'reactions'):
+            for emoji, count in stats_data.get(source, {}).items():
+                emojis[emoji] = emojis.get(emoji, 0) + _as_number(count)
+        self._boards[(None, 'emojis')] = Leaderboard(emojis)
+
+        games: Dict[str, float] = {}
+        for game_name, value in stats_data.get('games', {}).items():
+            # Par jeu : {user_id: minutes} ou un total
+            minutes = sum(map(_as_number, value.values())) if isinstance(value, dict) else value
+            games[str(game_name)] = _as_number(minutes)
+        self._boards[(None, 'games')] = Leaderboard(games)
+
+    def set_user(self, user, category: str, score: float):
+        """Met à jour le score d'un membre dans tous les serveurs qu'il partage avec le bot"""
+        user_id = str(user.id)
+        for guild in user.mutual_guilds:
+            board = self._boards.get((guild.id, category))
+            if board is not None:
+                board.set(user_id, score)
+
+    def set_channel(self, guild_id: int, category: str, channel_id: str, score: float):
+        """Met à jour le compteur d'un salon"""
+        board = self._boards.get((guild_id, category))
+        if board is not None:
+            board.set(channel_id, score)
+
+    def add_global(self, category: str, key: str, delta: float):
+        """Incrémente une entrée d'un classement global"""
+        self.board(None, category).add(key, delta)
+
+    def remove_member(self, guild_id: int, user_id: int):
+        """Retire un membre parti des classements de son ancien serveur"""
+        for category in self.USER_CATEGORIES:
+            board = self._boards.get((guild_id, category))
+            if board is not None:
+                board.remove(str(user_id))
+
+    def drop_guild(self, guild_id: int):
+        """Supprime les classements d'un serveur quitté"""
+        for category in (*self.USER_CATEGORIES, *self.CHANNEL_CATEGORIES):
+            self._boards.pop((guild_id, category), None)
+
+
+# Instance globale
+leaderboards = LeaderboardIndex()
@@ -0,0 +1,162 @@
+"""
+Sondage asynchrone des serveurs Minecraft : aucun appel bloquant sur la boucle asyncio
+Résolution DNS mise en cache, délais stricts et résultat structuré (plus d'analyse du texte des embeds)
+Les demandes simultanées pour un même serveur partagent une sonde, dont le résultat reste frais quelques secondes
+"""
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from typing import Dict, List, Optional
+
+from mcstatus import JavaServer
+
+from config import Config
+from utils.ttl_cache import AsyncTTLCache
+
+logger = logging.getLogger('bot')
+
+
+class ServerStatus:
+    """État d'un serveur Minecraft à un instant donné"""
+
+    __slots__ = ('host', 'port', 'online', 'latency', 'players_online', 'players_max',
+                 'player_names', 'version', 'motd', 'error', 'checked_at')
+
+    def __init__(self, host: str, port: int, online: bool = False, latency: float = 0.0,
+                 players_online: int = 0, players_max: int = 0, player_names: List[str] = None,
+                 version: str = "", motd: str = "", error: str = None):
+        self.host = host
+        self.port = port
+        self.online = online
+        self.latency = latency
+        self.players_online = players_online
+        self.players_max = players_max
+        # Échantillon renvoyé par le serveur (peut être incomplet sur les gros serveurs)
+        self.player_names = player_names or []
+        self.version = version
+        self.motd = motd
+        self.error = error
+        self.checked_at = time.monotonic()
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @classmethod
+    def offline(cls, host: str, port: int, error: str) -> 'ServerStatus':
+        return cls(host, port, online=False, error=error)
+
+
+def _motd_text(status) -> str:
+    """Texte brut du MOTD quelle que soit sa forme (objet Motd, chaîne ou composants JSON)"""
+    motd = getattr(status, 'motd', None)
+    if motd is not None and hasattr(motd, 'to_plain'):
+        return motd.to_plain()
+    description = getattr(status, 'description', None)
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        return description.get('text', '') + "".join(
+            comp.get('text', '') for comp in description.get('extra', []) if isinstance(comp, dict)
+        )
+    return ""
+
+
+class MinecraftProbe:
+    """Interrogations de statut Java Edition avec cache DNS et délai global par sonde"""
+
+    def __init__(self, timeout: float = 5, dns_ttl: int = 300, dns_timeout: float = 3,
+                 dns_cache_size: int = 128, freshness: float = 10):
+        self.timeout = timeout
+        self.dns_timeout = dns_timeout
+        self._dns = AsyncTTLCache(dns_cache_size, dns_ttl)
+        # Derniers statuts par adresse (host, port), réutilisés pendant freshness secondes
+        self._recent = AsyncTTLCache(dns_cache_size, freshness)
+
+        # Compteurs de fonctionnement
+        self.probes = 0
+        self.failures = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    async def resolve(self, host: str) -> str:
+        """Adresse IP de l'hôte (résolution dans le pool de threads de la boucle, gardée en cache)"""
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+
+        async def load() -> str:
+            infos = await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_INET,
+                                                       type=socket.SOCK_STREAM),
+                self.dns_timeout
+            )
+            if not infos:
+                raise socket.gaierror(f"aucune adresse pour {host}")
+            return infos[0][4][0]
+
+        return await self._dns.get_or_load(host, load)
+
+    async def probe(self, host: str, port: int = 25565) -> ServerStatus:
+        """Statut du serveur ; ne lève jamais d'exception (hors ligne avec le motif de l'échec)"""
+        start = time.perf_counter()
+        self.probes += 1
+        try:
+            try:
+                ip = await self.resolve(host)
+            except (OSError, asyncio.TimeoutError) as e:
+                raise ConnectionError(f"résolution DNS impossible ({e or 'délai dépassé'})")
+
+            server = JavaServer(ip, port, timeout=self.timeout)
+            # Délai global en plus de celui des sockets : connexion, handshake et ping compris
+            status = await asyncio.wait_for(server.async_status(tries=1), self.timeout)
+
+            players = status.players
+            return ServerStatus(
+                host, port, online=True,
+                latency=round(status.latency, 2),
+                players_online=players.online,
+                players_max=players.max,
+                player_names=[player.name for player in (players.sample or [])],
+                version=status.version.name or "",
+                motd=_motd_text(status),
+            )
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.failures += 1
+            return ServerStatus.offline(host, port, "délai dépassé")
+        except Exception as e:
+            self.failures += 1
+            return ServerStatus.offline(host, port, str(e) or type(e).__name__)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._total_ms += elapsed
+            self._max_ms = max(self._max_ms, elapsed)
+
+    async def get_status(self, host: str, port: int = 25565) -> ServerStatus:
+        """Statut récent du serveur, sinon une sonde partagée avec les demandes simultanées"""
+        return await self._recent.get_or_load((host.lower(), port), lambda: self.probe(host, port))
+
+    def get_stats(self) -> Dict:
+        """Sondes effectuées, échecs, durée moyenne/max, statuts réutilisés et état du cache DNS"""
+        return {
+            'probes': self.probes,
+            'failures': self.failures,
+            'avg_ms': round(self._total_ms / self.probes, 1) if self.probes else 0.0,
+            'max_ms': round(self._max_ms, 1),
+            'shared': self._recent.get_stats(),
+            'dns': self._dns.get_stats()
+        }
+
+
+# Instance globale
+mc_probe = MinecraftProbe(
+    timeout=Config.MC_PROBE_TIMEOUT,
+    dns_ttl=Config.MC_DNS_TTL,
+    freshness=Config.MC_STATUS_FRESHNESS,
+)
@@ -0,0 +1,184 @@
+"""
+Planificateur de sondes Minecraft pour tous les serveurs Discord suivis
+Intervalle adapté à chaque serveur (rapide si les joueurs bougent, lent au repos, recul exponentiel hors ligne),
+décalage aléatoire pour étaler les sondes et limite globale de sondes simultanées
+"""
+import asyncio
+import heapq
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.mc_probe import MinecraftProbe, ServerStatus
+
+logger = logging.getLogger('bot')
+
+
+class _Target:
+    """Serveur suivi et état de sa planification"""
+
+    __slots__ = ('key', 'host', 'port', 'generation', 'due', 'interval', 'failures', 'running')
+
+    def __init__(self, key: Hashable, host: str, port: int, generation: int):
+        self.key = key
+        self.host = host
+        self.port = port
+        # Change à chaque (re)configuration : les entrées plus anciennes du tas sont ignorées
+        self.generation = generation
+        self.due = 0.0
+        self.interval = 0.0
+        # Sondes hors ligne consécutives
+        self.failures = 0
+        self.running = False
+
+
+class MCStatusScheduler:
+    """Une seule tâche réveillée à la prochaine échéance ; chaque sonde tourne dans sa propre tâche"""
+
+    def __init__(self, probe: MinecraftProbe,
+                 on_result: Callable[[Hashable, ServerStatus], Awaitable[bool]],
+                 fast: float = 15, normal: float = 60, idle: float = 180,
+                 offline_max: float = 900, jitter: float = 0.15, max_concurrent: int = 8):
+        self.probe = probe
+        # Reçoit chaque résultat ; retourne True s'il s'est passé quelque chose (contrôle rapproché)
+        self.on_result = on_result
+        self.fast = fast
+        self.normal = normal
+        self.idle = idle
+        self.offline_max = offline_max
+        self.jitter = jitter
+        self.max_concurrent = max(1, max_concurrent)
+        self._targets: Dict[Hashable, _Target] = {}
+        # (échéance, ordre, clé, génération)
+        self._heap: List[Tuple[float, int, Hashable, int]] = []
+        self._sequence = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._probes: set = set()
+
+        # Compteurs de fonctionnement
+        self.completed = 0
+        self.max_waiting = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"⛏️ Planificateur Minecraft démarré ({self.max_concurrent} sondes simultanées max)")
+
+    def _spread(self, delay: float) -> float:
+        """Décalage aléatoire de ±jitter pour que les serveurs ne soient pas sondés en même temps"""
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _push(self, target: _Target, delay: float):
+        target.due = time.monotonic() + delay
+        self._sequence += 1
+        heapq.heappush(self._heap, (target.due, self._sequence, target.key, target.generation))
+        self._wake.set()
+
+    def add(self, key: Hashable, host: str, port: int = 25565, delay: float = None):
+        """Suit un serveur (remplace le précédent pour cette clé) ; première sonde après delay secondes"""
+        self._ensure_started()
+        previous = self._targets.get(key)
+        target = _Target(key, host, port, previous.generation + 1 if previous else 0)
+        self._targets[key] = target
+        # Par défaut, premières sondes étalées sur quelques secondes (démarrage avec beaucoup de serveurs)
+        self._push(target, random.uniform(0, min(self.fast, 5)) if delay is None else delay)
+
+    def remove(self, key: Hashable):
+        """Arrête le suivi (une sonde en cours se termine sans être reprogrammée)"""
+        self._targets.pop(key, None)
+
+    def refresh(self, key: Hashable):
+        """Avance la prochaine sonde à maintenant (ignoré si une sonde est déjà en cours)"""
+        target = self._targets.get(key)
+        if target is None or target.running:
+            return
+        target.generation += 1
+        self._push(target, 0)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._targets
+
+    def offline_delay(self, key: Hashable) -> float:
+        """Délai avant la prochaine sonde d'un serveur hors ligne (recul exponentiel plafonné)"""
+        target = self._targets.get(key)
+        failures = target.failures if target else 1
+        return min(self.offline_max, self.normal * 2 ** max(0, failures - 1))
+
+    def next_interval(self, target: _Target, status: ServerStatus, activity: bool) -> float:
+        """Intervalle avant la prochaine sonde selon le dernier résultat (avant décalage aléatoire)"""
+        if not status.online:
+            return self.offline_delay(target.key)
+        if activity:
+            return self.fast
+        return self.normal if status.players_online else self.idle
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, key, generation = heapq.heappop(self._heap)
+                target = self._targets.get(key)
+                # Entrée périmée : serveur retiré, reconfiguré ou déjà reprogrammé
+                if target is None or target.generation != generation or target.running:
+                    continue
+                target.running = True
+                task = asyncio.create_task(self._probe(target))
+                self._probes.add(task)
+                task.add_done_callback(self._probes.discard)
+
+            self._wake.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _probe(self, target: _Target):
+        activity = False
+        status = None
+        try:
+            self.max_waiting = max(self.max_waiting, len(self._probes) - self.max_concurrent)
+            async with self._semaphore:
+                # Sonde partagée : un rafraîchissement manuel récent ou simultané évite un doublon
+                status = await self.probe.get_status(target.host, target.port)
+            target.failures = 0 if status.online else target.failures + 1
+            self.completed += 1
+            if self._targets.get(target.key) is target:
+                activity = await self.on_result(target.key, status)
+        except Exception as e:
+            # Une erreur n'arrête que ce cycle : le serveur reste planifié
+            logger.error(f"❌ Erreur du suivi Minecraft ({target.host}:{target.port}): {e}")
+        finally:
+            target.running = False
+            if self._targets.get(target.key) is target:
+                if status is None:
+                    interval = self.normal
+                else:
+                    interval = self.next_interval(target, status, activity)
+                target.interval = interval
+                target.generation += 1
+                self._push(target, self._spread(interval))
+
+    def get_stats(self) -> Dict:
+        """Serveurs suivis, hors ligne, sondes effectuées et attente maximale pour la limite globale"""
+        return {
+            'servers': len(self._targets),
+            'offline': sum(1 for target in self._targets.values() if target.failures),
+            'probes': self.completed,
+            'max_waiting': self.max_waiting
+        }
+
+    async def stop(self):
+        """Arrête la planification et les sondes en cours"""
+        self._targets.clear()
+        self._heap.clear()
+        tasks = [task for task in (self._task, *self._probes) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
@@ -0,0 +1,120 @@
+"""
+Pool de processus partagé pour les traitements média coûteux en CPU (PIL, numpy, scikit-learn)
+Garde la boucle asyncio libre : limites globale et par utilisateur, file d'attente bornée
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger('bot')
+
+
+class MediaQueueFull(Exception):
+    """La file d'attente des traitements média est pleine"""
+
+
+class MediaUserLimit(Exception):
+    """L'utilisateur a déjà trop de traitements en cours"""
+
+
+class MediaPool:
+    """Exécute des fonctions CPU dans un ProcessPoolExecutor avec contrôle de concurrence"""
+
+    def __init__(self, max_workers: int = None, max_queue: int = 10, per_user: int = 1):
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._user_jobs: Dict[int, int] = defaultdict(int)
+        self._waiting = 0
+        self._running = 0
+
+        # Compteurs de fonctionnement
+        self.completed = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            logger.info(f"⚙️ Pool de traitement média démarré ({self.max_workers} processus)")
+
+    @property
+    def waiting(self) -> int:
+        """Nombre de traitements en attente d'un processus libre"""
+        return self._waiting
+
+    async def run(self, user_id: int, func: Callable, *args,
+                  on_queued: Callable[[int], Awaitable[Any]] = None,
+                  on_start: Callable[[], Awaitable[Any]] = None) -> Any:
+        """Exécute func(*args) dans un processus ; on_queued reçoit la position dans la file"""
+        self._ensure_started()
+
+        if self._user_jobs[user_id] >= self.per_user:
+            self.rejected += 1
+            raise MediaUserLimit()
+
+        must_wait = self._semaphore.locked()
+        if must_wait and self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise MediaQueueFull()
+
+        self._user_jobs[user_id] += 1
+        try:
+            if must_wait:
+                self._waiting += 1
+                try:
+                    if on_queued:
+                        await on_queued(self._waiting)
+                    await self._semaphore.acquire()
+                finally:
+                    self._waiting -= 1
+            else:
+                await self._semaphore.acquire()
+
+            try:
+                self._running += 1
+                if on_start:
+                    await on_start()
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, func, *args)
+                self.completed += 1
+                return result
+            finally:
+                self._running -= 1
+                self._semaphore.release()
+        finally:
+            self._user_jobs[user_id] -= 1
+            if not self._user_jobs[user_id]:
+                del self._user_jobs[user_id]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retourne l'état du pool"""
+        return {
+            'workers': self.max_workers,
+            'running': self._running,
+            'waiting': self._waiting,
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        """Arrête les processus du pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+
+# Instance globale
+media_pool = MediaPool(
+    max_workers=Config.MEDIA_WORKERS or None,
+    max_queue=Config.MEDIA_QUEUE_SIZE,
+    per_user=Config.MEDIA_JOBS_PER_USER
+)
@@ -1,8 +1,8 @@
 import json
 import os
+import hashlib
 import logging
-import aiosqlite
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from .database import db_manager
 
 logger = logging.getLogger('bot')
@@ -10,90 +10,130 @@ logger = logging.getLogger('bot')
 class DataMigration:
     """Classe pour migrer les anciennes données vers les bases de données par serveur"""
     
+    # Migrations dans l'ordre d'exécution : (nom dans le registre, fichier source, méthode, rejouer si modifié)
+    # stats.json est réécrit en continu par le listener : il n'est importé qu'une seule fois
+    MIGRATIONS = [
+        ('stats', 'stats.json', 'migrate_stats', False),
+        ('warnings', 'warns.json', 'migrate_warnings', True),
+        ('ticket_config', 'ticket_config.json', 'migrate_ticket_config', True),
+        ('roles_config', 'roles_config.json', 'migrate_roles_config', True),
+        ('rules_config', 'rules_config.json', 'migrate_rules_config', True),
+        ('user_preferences', 'user_preferences.json', 'migrate_user_preferences', True),
+    ]
+    
     def __init__(self):
         self.old_data_dir = "data"
+        # Fichiers sources déjà lus : chemin -> (mtime_ns, taille, checksum, données)
+        self._sources: Dict[str, Tuple[int, int, str, Any]] = {}
     
-    async def migrate_all_data(self, guild_id: int):
-        """Migre toutes les données d'un serveur vers sa DB dédiée"""
-        logger.info(f"🔄 Migration des données pour le serveur {guild_id}")
+    def load_source(self, filename: str) -> Tuple[Optional[str], Any]:
+        """Lit et décode un ancien fichier JSON une seule fois pour tous les serveurs"""
+        path = os.path.join(self.old_data_dir, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._sources.pop(path, None)
+            return None, None
+        
+        cached = self._sources.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2], cached[3]
         
+        with open(path, 'rb') as f:
+            raw = f.read()
+        checksum = hashlib.sha256(raw).hexdigest()
+        data = json.loads(raw.decode('utf-8'))
+        self._sources[path] = (stat.st_mtime_ns, stat.st_size, checksum, data)
+        return checksum, data
+    
+    async def get_ledger(self, guild_id: int) -> Dict[str, str]:
+        """Retourne les migrations déjà appliquées pour un serveur (nom -> checksum source)"""
+        async with db_manager.guild_connection(guild_id) as db:
+            cursor = await db.execute('''
+                SELECT name, source_checksum FROM migration_ledger
+            ''')
+            return {name: checksum for name, checksum in await cursor.fetchall()}
+    
+    async def record_migration(self, guild_id: int, name: str, checksum: str):
+        """Inscrit une migration terminée dans le registre du serveur"""
+        async with db_manager.guild_connection(guild_id) as db:
+            await db.execute('''
+                INSERT OR REPLACE INTO migration_ledger (name, source_checksum, applied_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (name, checksum))
+            await db.commit()
+    
+    async def migrate_all_data(self, guild_id: int):
+        """Migre toutes les données d'un serveur vers sa DB dédiée (migrations déjà faites ignorées)"""
         try:
             # S'assurer que la DB du serveur est initialisée
             await db_manager.init_guild_database(guild_id)
             
-            await self.migrate_stats(guild_id)
-            await self.migrate_warnings(guild_id)
-            await self.migrate_ticket_config(guild_id)
-            await self.migrate_roles_config(guild_id)
-            await self.migrate_rules_config(guild_id)
-            await self.migrate_user_preferences(guild_id)
+            ledger = await self.get_ledger(guild_id)
+            applied = 0
+            for name, filename, method, rerun_on_change in self.MIGRATIONS:
+                if name in ledger and not rerun_on_change:
+                    continue
+                
+                checksum, data = self.load_source(filename)
+                if checksum is None or ledger.get(name) == checksum:
+                    continue
+                
+                await getattr(self, method)(guild_id, data)
+                await self.record_migration(guild_id, name, checksum)
+                applied += 1
             
-            logger.info(f"✅ Migration terminée pour le serveur {guild_id}")
+            if applied:
+                logger.info(f"✅ Migration terminée pour le serveur {guild_id} ({applied} migrations appliquées)")
         except Exception as e:
             logger.error(f"❌ Erreur lors de la migration: {str(e)}")
     
-    async def migrate_stats(self, guild_id: int):
+    async def migrate_stats(self, guild_id: int, stats_data: Dict[str, Any]):
         """Migre les statistiques utilisateurs vers la DB du serveur"""
-        stats_file = os.path.join(self.old_data_dir, "stats.json")
-        if not os.path.exists(stats_file):
-            return
-            
-        with open(stats_file, 'r', encoding='utf-8') as f:
-            stats_data = json.load(f)
-        
-        db_path = db_manager.get_db_path(guild_id)
+        voice_times = stats_data.get('voice_time', {})
+        last_online = stats_data.get('last_online', {})
+        rows = [
+            (int(user_id), message_count, voice_times.get(user_id, 0), last_online.get(user_id, ''))
+            for user_id, message_count in stats_data.get('messages', {}).items()
+        ]
         
         # Migrer les messages et temps vocal
-        async with aiosqlite.connect(db_path) as db:
-            for user_id, message_count in stats_data.get('messages', {}).items():
-                voice_time = stats_data.get('voice_time', {}).get(user_id, 0)
-                last_online = stats_data.get('last_online', {}).get(user_id, '')
-                
-                await db.execute('''
-                    INSERT OR REPLACE INTO user_stats 
-                    (user_id, messages, voice_time, last_online)
-                    VALUES (?, ?, ?, ?)
-                ''', (int(user_id), message_count, voice_time, last_online))
+        async with db_manager.guild_connection(guild_id) as db:
+            await db.executemany('''
+                INSERT OR REPLACE INTO user_stats
+                (user_id, messages, voice_time, last_online)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
             await db.commit()
         
-        logger.info(f"✅ Statistiques migrées pour {len(stats_data.get('messages', {}))} utilisateurs")
+        logger.info(f"✅ Statistiques migrées pour {len(rows)} utilisateurs")
     
-    async def migrate_warnings(self, guild_id: int):
+    async def migrate_warnings(self, guild_id: int, warns_data: Dict[str, Any]):
         """Migre les avertissements vers la DB du serveur"""
-        warns_file = os.path.join(self.old_data_dir, "warns.json")
-        if not os.path.exists(warns_file):
-            return
-            
-        with open(warns_file, 'r', encoding='utf-8') as f:
-            warns_data = json.load(f)
+        # Format: [datetime ISO, raison, auteur]
+        rows = [
+            (int(user_id), warning[1], warning[2], warning[0])
+            for user_id, warnings in warns_data.get('warnings', {}).items()
+            for warning in warnings
+        ]
         
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
-            for user_id, warnings in warns_data.get('warnings', {}).items():
-                for warning in warnings:
-                    created_at = warning[0]  # datetime ISO format
-                    reason = warning[1]
-                    author_id = warning[2]
-                    
-                    await db.execute('''
-                        INSERT INTO warnings 
-                        (user_id, reason, author_id, created_at)
-                        VALUES (?, ?, ?, ?)
-                    ''', (int(user_id), reason, author_id, created_at))
+        # Le fichier peut avoir changé depuis la dernière migration : n'insérer que les nouveaux
+        async with db_manager.guild_connection(guild_id) as db:
+            await db.executemany('''
+                INSERT INTO warnings
+                (user_id, reason, author_id, created_at)
+                SELECT ?1, ?2, ?3, ?4
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM warnings
+                    WHERE user_id = ?1 AND created_at = ?4 AND reason IS ?2
+                )
+            ''', rows)
             await db.commit()
         
         logger.info(f"✅ Avertissements migrés")
     
-    async def migrate_ticket_config(self, guild_id: int):
+    async def migrate_ticket_config(self, guild_id: int, ticket_data: Dict[str, Any]):
         """Migre la configuration des tickets vers la DB du serveur"""
-        ticket_file = os.path.join(self.old_data_dir, "ticket_config.json")
-        if not os.path.exists(ticket_file):
-            return
-            
-        with open(ticket_file, 'r', encoding='utf-8') as f:
-            ticket_data = json.load(f)
-        
         await db_manager.update_guild_config(
             guild_id,
             ticket_category_id=ticket_data.get('category_id'),
@@ -108,55 +148,38 @@ class DataMigration:
         
         logger.info("✅ Configuration des tickets migrée")
     
-    async def migrate_roles_config(self, guild_id: int):
+    async def migrate_roles_config(self, guild_id: int, roles_data: Dict[str, Any]):
         """Migre la configuration des rôles vers la DB du serveur"""
-        roles_file = os.path.join(self.old_data_dir, "roles_config.json")
-        if not os.path.exists(roles_file):
-            return
-            
-        with open(roles_file, 'r', encoding='utf-8') as f:
-            roles_data = json.load(f)
+        rows = [
+            (role_info['id'], role_info['name'],
+             role_info.get('description', ''), role_info.get('emoji', ''))
+            for role_info in roles_data.values()
+        ]
         
-        db_path = db_manager.get_db_path(guild_id)
-        
-        async with aiosqlite.connect(db_path) as db:
-            for role_id, role_info in roles_data.items():
-                await db.execute('''
-                    INSERT OR REPLACE INTO role_config 
-                    (role_id, role_name, description, emoji)
-                    VALUES (?, ?, ?, ?)
-                ''', (role_info['id'], role_info['name'], 
-                      role_info.get('description', ''), role_info.get('emoji', '')))
+        async with db_manager.guild_connection(guild_id) as db:
+            await db.executemany('''
+                INSERT OR REPLACE INTO role_config
+                (role_id, role_name, description, emoji)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
             await db.commit()
         
-        logger.info(f"✅ Configuration des rôles migrée ({len(roles_data)} rôles)")
+        logger.info(f"✅ Configuration des rôles migrée ({len(rows)} rôles)")
     
-    async def migrate_rules_config(self, guild_id: int):
+    async def migrate_rules_config(self, guild_id: int, rules_config: Dict[str, Any]):
         """Migre la configuration des règles vers la DB du serveur"""
-        rules_config_file = os.path.join(self.old_data_dir, "rules_config.json")
-        if os.path.exists(rules_config_file):
-            with open(rules_config_file, 'r', encoding='utf-8') as f:
-                rules_config = json.load(f)
-            
-            await db_manager.update_guild_config(
-                guild_id,
-                rules_channel_id=rules_config.get('rules_channel_id'),
-                rules_message_id=rules_config.get('rules_message_id'),
-                verified_role_id=rules_config.get('verified_role_id'),
-                default_role_id=rules_config.get('default_role_id')
-            )
+        await db_manager.update_guild_config(
+            guild_id,
+            rules_channel_id=rules_config.get('rules_channel_id'),
+            rules_message_id=rules_config.get('rules_message_id'),
+            verified_role_id=rules_config.get('verified_role_id'),
+            default_role_id=rules_config.get('default_role_id')
+        )
         
         logger.info("✅ Configuration des règles migrée")
     
-    async def migrate_user_preferences(self, guild_id: int):
+    async def migrate_user_preferences(self, guild_id: int, prefs_data: Dict[str, Any]):
         """Migre les préférences utilisateur (Minecraft, etc.)"""
-        prefs_file = os.path.join(self.old_data_dir, "user_preferences.json")
-        if not os.path.exists(prefs_file):
-            return
-            
-        with open(prefs_file, 'r', encoding='utf-8') as f:
-            prefs_data = json.load(f)
-        
         mc_config = prefs_data.get('minecraft', {})
         if mc_config:
             server_config = mc_config.get('server', {})
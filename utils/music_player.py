@@ -0,0 +1,207 @@
+"""
+Lecteur de musique par serveur : file d'attente propre, piste suivante résolue pendant la lecture
+L'enchaînement se fait sur la boucle asyncio (le callback after ne fait que la réveiller)
+Une playlist occupe une seule place dans la file et n'est dépliée qu'une page à la fois
+Les flux Opus sont transmis tels quels à Discord (simple remultiplexage par FFmpeg, sans décodage)
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Optional, Union
+
+import discord
+
+from config import Config
+from utils.youtube_extractor import PlaylistStream, VideoInfo, youtube_extractor
+
+logger = logging.getLogger('bot')
+
+# Reprise automatique si la connexion au flux distant est coupée
+FFMPEG_BEFORE_OPTIONS = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
+FFMPEG_OPTIONS = "-vn"
+
+
+def create_source(stream_url: str, codec: Optional[str], mode: str = "opus") -> discord.AudioSource:
+    """Source audio Discord : Opus sans transcodage si possible, sinon Opus encodé par FFmpeg
+
+    mode "pcm" : ancien pipeline (FFmpeg décode en PCM, le bot encode en Opus dans son processus)
+    """
+    if mode == "pcm":
+        return discord.FFmpegPCMAudio(
+            stream_url, executable="ffmpeg",
+            before_options=FFMPEG_BEFORE_OPTIONS, options=FFMPEG_OPTIONS
+        )
+    # codec="opus" : discord.py demande à FFmpeg une simple copie du flux ; sinon libopus
+    return discord.FFmpegOpusAudio(
+        stream_url, executable="ffmpeg",
+        codec="opus" if codec == "opus" else None,
+        before_options=FFMPEG_BEFORE_OPTIONS, options=FFMPEG_OPTIONS
+    )
+
+
+class Track:
+    """Piste en file d'attente ; le lien de lecture est résolu au dernier moment (et mis en cache)"""
+
+    __slots__ = ('url', 'title', 'requester')
+
+    def __init__(self, url: str, title: str = None, requester: str = None):
+        self.url = url
+        self.title = title
+        self.requester = requester
+
+    @property
+    def display_name(self) -> str:
+        return self.title or self.url
+
+    async def resolve(self) -> VideoInfo:
+        """Lien audio direct et codec (extraction dans le pool yt-dlp, instantanée si préchargée)"""
+        video = await youtube_extractor.resolve(self.url)
+        self.title = self.title or video.title
+        return video
+
+
+QueueItem = Union[Track, PlaylistStream]
+
+
+class GuildPlayer:
+    """Lecture d'un serveur : une tâche qui enchaîne les pistes de sa file"""
+
+    def __init__(self, guild_id: int, voice_client: discord.VoiceClient,
+                 channel: discord.abc.Messageable = None,
+                 on_finished: Callable[['GuildPlayer'], None] = None):
+        self.guild_id = guild_id
+        self.voice_client = voice_client
+        self.channel = channel
+        self.queue: Deque[QueueItem] = deque()
+        self.current: Optional[Track] = None
+        self.closed = False
+        self._on_finished = on_finished
+        self._loop = asyncio.get_running_loop()
+        self._track_end = asyncio.Event()
+        self._prefetch: Optional[asyncio.Task] = None
+        self._expand_lock = asyncio.Lock()
+        # Playlist sortie de la file le temps de lire sa page suivante
+        self._expanding: Optional[PlaylistStream] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Compteurs de fonctionnement
+        self.played = 0
+        self.failed = 0
+        self.passthrough = 0
+
+    def enqueue(self, track: QueueItem) -> int:
+        """Ajoute une piste ou une playlist et démarre la lecture si besoin ; retourne sa position (0 = lue tout de suite)"""
+        self.queue.append(track)
+        if self._task is None or self._task.done():
+            self._task = self._loop.create_task(self._run())
+            return 0
+        elif len(self.queue) == 1:
+            # La piste ajoutée est la suivante : la préparer pendant la lecture en cours
+            self._schedule_prefetch()
+        # Tant que la tâche n'a pas démarré, la première piste est encore dans la file
+        return len(self.queue) - (1 if self.current is None else 0)
+
+    def _schedule_prefetch(self):
+        """Résout en arrière-plan le lien de la prochaine piste"""
+        if not self.queue or (self._prefetch is not None and not self._prefetch.done()):
+            return
+        self._prefetch = self._loop.create_task(self._warm())
+
+    async def _warm(self):
+        try:
+            await self._expand_head()
+            if self.queue:
+                await self.queue[0].resolve()
+        except Exception as e:
+            # L'erreur sera signalée lorsque la piste sera jouée
+            logger.debug(f"Préchargement impossible (serveur {self.guild_id}): {e}")
+
+    async def _expand_head(self):
+        """Remplace une playlist en tête de file par sa page suivante (la playlist reste derrière si elle continue)"""
+        async with self._expand_lock:
+            while self.queue and isinstance(self.queue[0], PlaylistStream):
+                playlist = self._expanding = self.queue.popleft()
+                try:
+                    entries = await playlist.next_page()
+                except Exception as e:
+                    self._expanding = None
+                    logger.error(f"❌ Lecture de la playlist {playlist.title} interrompue: {e}")
+                    await playlist.close()
+                    await self._notify(f"❌ Lecture de la playlist **{playlist.title}** interrompue.")
+                    continue
+                self._expanding = None
+                if not playlist.exhausted:
+                    self.queue.appendleft(playlist)
+                self.queue.extendleft(
+                    Track(entry.get("url") or entry["webpage_url"], title=entry.get("title"),
+                          requester=playlist.requester)
+                    for entry in reversed(entries)
+                )
+
+    def _after(self, error: Optional[Exception]):
+        """Appelé par le thread audio de discord.py à la fin d'une piste"""
+        if error:
+            logger.error(f"❌ Erreur de lecture : {error}")
+        self._loop.call_soon_threadsafe(self._track_end.set)
+
+    async def _run(self):
+        try:
+            while self.voice_client.is_connected():
+                # Attend aussi un éventuel dépliage en cours par le préchargement
+                await self._expand_head()
+                if not self.queue:
+                    break
+                track = self.current = self.queue.popleft()
+                try:
+                    video = await track.resolve()
+                    if not video.audio_url:
+                        raise ValueError("aucun flux audio")
+                    source = create_source(video.audio_url, video.audio_codec, Config.MUSIC_AUDIO_MODE)
+                    if video.audio_codec == "opus" and Config.MUSIC_AUDIO_MODE != "pcm":
+                        self.passthrough += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"❌ Piste illisible {track.url}: {e}")
+                    await self._notify(f"❌ Impossible de lire **{track.display_name}**, piste suivante.")
+                    self.current = None
+                    continue
+
+                self._track_end.clear()
+                self.voice_client.play(source, after=self._after)
+                self.played += 1
+                self._schedule_prefetch()
+                await self._track_end.wait()
+                self.current = None
+        finally:
+            self.current = None
+            # File vide ou lecture interrompue : libérer le salon vocal
+            if not self.closed:
+                await self.close()
+
+    async def _notify(self, message: str):
+        if self.channel is None:
+            return
+        try:
+            await self.channel.send(message)
+        except discord.HTTPException:
+            pass
+
+    async def close(self):
+        """Vide la file, arrête la lecture et quitte le salon vocal"""
+        self.closed = True
+        playlists = [item for item in self.queue if isinstance(item, PlaylistStream)]
+        if self._expanding is not None:
+            playlists.append(self._expanding)
+        self.queue.clear()
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        if self._on_finished:
+            self._on_finished(self)
+        if self.voice_client.is_playing():
+            self.voice_client.stop()
+        if self.voice_client.is_connected():
+            await self.voice_client.disconnect()
+        for playlist in playlists:
+            await playlist.close()
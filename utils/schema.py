@@ -0,0 +1,235 @@
+"""
+Schéma versionné des bases de données serveur
+La version courante est stockée dans PRAGMA user_version ; chaque étape fait passer la DB à la version suivante
+"""
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger('bot')
+
+# Étapes de mise à niveau ordonnées : (version atteinte, description, requêtes)
+GUILD_SCHEMA_STEPS: List[Tuple[int, str, List[str]]] = [
+    (1, "tables de base", [
+        # Table pour les statistiques des utilisateurs
+        '''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            messages INTEGER DEFAULT 0,
+            voice_time INTEGER DEFAULT 0,
+            last_online TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id)
+        )
+        ''',
+        # Table pour les avertissements
+        '''
+        CREATE TABLE IF NOT EXISTS warnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            reason TEXT,
+            author_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Table pour les tickets
+        '''
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id TEXT,
+            owner_id INTEGER,
+            channel_id INTEGER,
+            status TEXT DEFAULT 'open',
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP,
+            closed_by INTEGER,
+            close_reason TEXT
+        )
+        ''',
+        # Table pour les rôles configurés
+        '''
+        CREATE TABLE IF NOT EXISTS role_config (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            role_id INTEGER,
+            role_name TEXT,
+            description TEXT,
+            emoji TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(role_id)
+        )
+        ''',
+        # Table pour la configuration du serveur
+        '''
+        CREATE TABLE IF NOT EXISTS guild_config (
+            id INTEGER PRIMARY KEY DEFAULT 1,
+            embed_color INTEGER DEFAULT 2827571,
+            rules_channel_id INTEGER,
+            rules_message_id INTEGER,
+            verified_role_id INTEGER,
+            default_role_id INTEGER,
+            ticket_category_id INTEGER,
+            ticket_create_channel_id INTEGER,
+            ticket_log_channel_id INTEGER,
+            mc_server_ip TEXT,
+            mc_server_port INTEGER DEFAULT 25565,
+            mc_status_channel_id INTEGER,
+            mc_notification_role_id INTEGER,
+            roles_channel_id INTEGER,
+            config_data TEXT, -- JSON pour configurations supplémentaires
+            CHECK (id = 1)
+        )
+        ''',
+        # Insérer la configuration par défaut si elle n'existe pas
+        '''
+        INSERT OR IGNORE INTO guild_config (id) VALUES (1)
+        ''',
+        # Table pour l'historique des messages (par heure)
+        '''
+        CREATE TABLE IF NOT EXISTS message_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            hour_timestamp TEXT, -- Format: YYYY-MM-DD HH:00
+            message_count INTEGER DEFAULT 0,
+            UNIQUE(user_id, hour_timestamp)
+        )
+        ''',
+        # Table pour les jeux joués
+        '''
+        CREATE TABLE IF NOT EXISTS games_played (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            game_name TEXT,
+            play_time INTEGER DEFAULT 0, -- en minutes
+            last_played TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, game_name)
+        )
+        ''',
+        # Registre des migrations des anciens fichiers JSON déjà appliquées
+        '''
+        CREATE TABLE IF NOT EXISTS migration_ledger (
+            name TEXT PRIMARY KEY,
+            source_checksum TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (2, "index des requêtes fréquentes", [
+        # Avertissements d'un membre, du plus récent au plus ancien
+        '''
+        CREATE INDEX IF NOT EXISTS idx_warnings_user_created
+        ON warnings (user_id, created_at)
+        ''',
+        # Historique des messages du serveur sur une plage de dates
+        '''
+        CREATE INDEX IF NOT EXISTS idx_message_history_hour
+        ON message_history (hour_timestamp)
+        ''',
+    ]),
+    (3, "historique d'activité agrégé", [
+        # Séries temporelles : uniquement les deltas non nuls, agrégés par heure puis jour puis semaine
+        '''
+        CREATE TABLE IF NOT EXISTS activity_history (
+            metric TEXT NOT NULL, -- 'messages' ou 'voice' (minutes)
+            user_id INTEGER NOT NULL,
+            resolution TEXT NOT NULL, -- 'hour', 'day' ou 'week'
+            bucket TEXT NOT NULL, -- Début de la période, format: YYYY-MM-DD HH:00
+            value INTEGER DEFAULT 0,
+            PRIMARY KEY (metric, resolution, bucket, user_id)
+        ) WITHOUT ROWID
+        ''',
+        # Historique d'un membre sur une plage de dates
+        '''
+        CREATE INDEX IF NOT EXISTS idx_activity_history_user
+        ON activity_history (metric, user_id, resolution, bucket)
+        ''',
+        # Reprise de l'historique horaire des messages
+        '''
+        INSERT OR IGNORE INTO activity_history (metric, user_id, resolution, bucket, value)
+        SELECT 'messages', user_id, 'hour', hour_timestamp, message_count
+        FROM message_history
+        WHERE user_id IS NOT NULL AND hour_timestamp IS NOT NULL AND message_count > 0
+        ''',
+        '''
+        DROP TABLE IF EXISTS message_history
+        ''',
+    ]),
+    (4, "index couvrant de l'historique par membre", [
+        # Membre en tête et valeur incluse : SQLite le préfère à la clé primaire sans indication ni ANALYZE,
+        # tandis que les requêtes sans membre (serveur entier, agrégation) gardent la clé primaire
+        '''
+        DROP INDEX IF EXISTS idx_activity_history_user
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_activity_history_user
+        ON activity_history (user_id, metric, resolution, bucket, value)
+        ''',
+    ]),
+]
+
+GUILD_SCHEMA_VERSION = GUILD_SCHEMA_STEPS[-1][0]
+
+# Requêtes des chemins chauds et index qu'elles doivent utiliser (vérifiées par check_query_plans)
+HOT_QUERIES: Dict[str, Tuple[str, tuple, str]] = {
+    'warnings_by_user': (
+        'SELECT reason, author_id, created_at FROM warnings WHERE user_id = ? ORDER BY created_at DESC',
+        (0,), 'idx_warnings_user_created'
+    ),
+    'warnings_count': (
+        'SELECT COUNT(*) FROM warnings WHERE user_id = ?',
+        (0,), 'idx_warnings_user_created'
+    ),
+    'activity_history_range': (
+        "SELECT SUM(value) FROM activity_history "
+        "WHERE metric = ? AND resolution IN ('hour', 'day', 'week') AND bucket >= ?",
+        ('', ''), 'PRIMARY KEY'
+    ),
+    'activity_history_user_range': (
+        "SELECT SUM(value) FROM activity_history "
+        "WHERE metric = ? AND user_id = ? AND resolution IN ('hour', 'day', 'week') AND bucket >= ?",
+        ('', 0, ''), 'idx_activity_history_user'
+    ),
+    'activity_history_rollup': (
+        "SELECT user_id, SUM(value) FROM activity_history "
+        "WHERE metric = ? AND resolution = 'hour' AND bucket < ? GROUP BY user_id",
+        ('', ''), 'PRIMARY KEY'
+    ),
+    'user_stats_by_user': (
+        'SELECT messages, voice_time, last_online FROM user_stats WHERE user_id = ?',
+        (0,), 'sqlite_autoindex_user_stats_1'
+    ),
+}
+
+
+async def upgrade_guild_schema(db) -> Tuple[int, int]:
+    """Applique les étapes manquantes ; une DB déjà à jour ne coûte qu'une lecture de pragma"""
+    cursor = await db.execute("PRAGMA user_version")
+    current = (await cursor.fetchone())[0]
+    if current >= GUILD_SCHEMA_VERSION:
+        return current, current
+
+    await db.execute("BEGIN")
+    for version, description, statements in GUILD_SCHEMA_STEPS:
+        if version <= current:
+            continue
+        for statement in statements:
+            await db.execute(statement)
+        # PRAGMA n'accepte pas de paramètre lié ; la version est un entier interne
+        await db.execute(f"PRAGMA user_version = {version}")
+        logger.debug(f"🧱 Schéma v{version} appliqué ({description})")
+    await db.commit()
+
+    return current, GUILD_SCHEMA_VERSION
+
+
+async def check_query_plans(db) -> Dict[str, bool]:
+    """Vérifie via EXPLAIN QUERY PLAN que chaque requête chaude utilise l'index attendu"""
+    results = {}
+    for name, (query, params, index_name) in HOT_QUERIES.items():
+        cursor = await db.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        details = " | ".join(row[-1] for row in await cursor.fetchall())
+        results[name] = index_name in details
+        if not results[name]:
+            logger.warning(f"⚠️ Requête '{name}' sans l'index {index_name}: {details}")
+    return results
@@ -0,0 +1,183 @@
+"""
+Tampon d'écriture différée pour les statistiques
+Agrège les incréments en mémoire et les écrit par lots dans les DB des serveurs
+"""
+import asyncio
+import datetime
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from .database import db_manager
+
+logger = logging.getLogger('bot')
+
+
+class _UserDelta:
+    """Incréments en attente pour un utilisateur d'un serveur"""
+
+    __slots__ = ('messages', 'voice_time', 'last_online')
+
+    def __init__(self):
+        self.messages = 0
+        self.voice_time = 0
+        self.last_online: Optional[str] = None
+
+
+class StatsBuffer:
+    """Agrège les statistiques (messages, vocal, jeux, historique horaire) avant écriture en DB"""
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._users: Dict[int, Dict[int, _UserDelta]] = defaultdict(dict)
+        # Deltas horaires par serveur : (métrique, user_id, heure) -> valeur
+        self._history: Dict[int, Dict[Tuple[str, int, str], int]] = defaultdict(lambda: defaultdict(int))
+        # Temps de jeu par serveur : (user_id, jeu) -> minutes
+        self._games: Dict[int, Dict[Tuple[int, str], int]] = defaultdict(lambda: defaultdict(int))
+        self._pending = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Compteurs de fonctionnement
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'incréments en attente d'écriture"""
+        return self._pending
+
+    def _user(self, guild_id: int, user_id: int) -> _UserDelta:
+        delta = self._users[guild_id].get(user_id)
+        if delta is None:
+            delta = self._users[guild_id][user_id] = _UserDelta()
+        return delta
+
+    def _touch(self):
+        self._pending += 1
+        if self._pending >= self.max_pending:
+            self.schedule_flush()
+
+    def add_message(self, guild_id: int, user_id: int, when: datetime.datetime = None):
+        """Enregistre un message (compteur utilisateur + historique horaire)"""
+        when = when or datetime.datetime.now()
+        delta = self._user(guild_id, user_id)
+        delta.messages += 1
+        delta.last_online = when.strftime("%Y-%m-%d %H:%M:%S")
+        self._history[guild_id][('messages', user_id, when.strftime("%Y-%m-%d %H:00"))] += 1
+        self._touch()
+
+    def add_voice_time(self, guild_id: int, user_id: int, minutes: int, when: datetime.datetime = None):
+        """Ajoute du temps vocal (en minutes) à un utilisateur (compteur + historique horaire)"""
+        when = when or datetime.datetime.now()
+        self._user(guild_id, user_id).voice_time += minutes
+        self._history[guild_id][('voice', user_id, when.strftime("%Y-%m-%d %H:00"))] += minutes
+        self._touch()
+
+    def add_game_time(self, guild_id: int, user_id: int, game_name: str, minutes: int):
+        """Ajoute du temps de jeu (en minutes) à un utilisateur"""
+        self._games[guild_id][(user_id, game_name)] += minutes
+        self._touch()
+
+    def schedule_flush(self):
+        """Déclenche une écriture en arrière-plan si aucune n'est déjà prévue"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Écrit tous les incréments en attente, une transaction par serveur"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            # Échanger les tampons : les nouveaux événements vont dans des tampons vides
+            users, self._users = self._users, defaultdict(dict)
+            history, self._history = self._history, defaultdict(lambda: defaultdict(int))
+            games, self._games = self._games, defaultdict(lambda: defaultdict(int))
+            self._pending = 0
+
+            written = 0
+            for guild_id in set(users) | set(history) | set(games):
+                guild_users = users.get(guild_id, {})
+                guild_history = history.get(guild_id, {})
+                guild_games = games.get(guild_id, {})
+                try:
+                    written += await self._flush_guild(guild_id, guild_users, guild_history, guild_games)
+                except Exception as e:
+                    logger.error(f"❌ Erreur d'écriture des statistiques du serveur {guild_id}: {str(e)}")
+                    self._restore(guild_id, guild_users, guild_history, guild_games)
+
+            self.flushes += 1
+            self.rows_written += written
+            return written
+
+    async def _flush_guild(self, guild_id: int, users: Dict[int, _UserDelta],
+                           history: Dict[Tuple[str, int, str], int],
+                           games: Dict[Tuple[int, str], int]) -> int:
+        await db_manager.init_guild_database(guild_id)
+        async with db_manager.guild_connection(guild_id) as db:
+            if users:
+                await db.executemany('''
+                    INSERT INTO user_stats (user_id, messages, voice_time, last_online)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        messages = messages + excluded.messages,
+                        voice_time = voice_time + excluded.voice_time,
+                        last_online = COALESCE(excluded.last_online, last_online),
+                        updated_at = CURRENT_TIMESTAMP
+                ''', [
+                    (user_id, delta.messages, delta.voice_time, delta.last_online)
+                    for user_id, delta in users.items()
+                ])
+            if history:
+                await db.executemany('''
+                    INSERT INTO activity_history (metric, user_id, resolution, bucket, value)
+                    VALUES (?, ?, 'hour', ?, ?)
+                    ON CONFLICT(metric, resolution, bucket, user_id) DO UPDATE SET
+                        value = value + excluded.value
+                ''', [
+                    (metric, user_id, hour, count)
+                    for (metric, user_id, hour), count in history.items()
+                ])
+            if games:
+                await db.executemany('''
+                    INSERT INTO games_played (user_id, game_name, play_time, last_played)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id, game_name) DO UPDATE SET
+                        play_time = play_time + excluded.play_time,
+                        last_played = excluded.last_played
+                ''', [
+                    (user_id, game_name, minutes)
+                    for (user_id, game_name), minutes in games.items()
+                ])
+            await db.commit()
+        return len(users) + len(history) + len(games)
+
+    def _restore(self, guild_id: int, users: Dict[int, _UserDelta],
+                 history: Dict[Tuple[str, int, str], int],
+                 games: Dict[Tuple[int, str], int]):
+        """Réinjecte un lot non écrit dans le tampon pour la prochaine tentative"""
+        for user_id, old in users.items():
+            delta = self._user(guild_id, user_id)
+            delta.messages += old.messages
+            delta.voice_time += old.voice_time
+            delta.last_online = delta.last_online or old.last_online
+            self._pending += 1
+        for key, count in history.items():
+            self._history[guild_id][key] += count
+            self._pending += 1
+        for key, minutes in games.items():
+            self._games[guild_id][key] += minutes
+            self._pending += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du tampon"""
+        return {
+            'pending': self._pending,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written
+        }
+
+
+# Instance globale
+stats_buffer = StatsBuffer()
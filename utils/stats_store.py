@@ -0,0 +1,125 @@
+"""
+Statistiques globales (data/stats.json) partagées entre le listener et les commandes
+Le fichier est lu une seule fois ; seul le listener modifie les compteurs et l'écriture passe par ce module
+"""
+import asyncio
+import json
+import logging
+import os
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
+
+logger = logging.getLogger('bot')
+
+
+def default_stats() -> Dict[str, Any]:
+    """Structure complète attendue dans stats.json"""
+    return {
+        'messages': {},
+        'voice_time': {},
+        'last_online': {},
+        'channels': {'text': {}, 'voice': {}},
+        'emojis': {},
+        'reactions': {},
+        'hourly_activity': {str(i): 0 for i in range(24)},
+        'daily_activity': {str(i): 0 for i in range(7)},
+        'games': {},
+        'streaming': {},
+        'message_history': {},
+        'voice_history': {},
+        'commands_used': 0,
+        'last_update': ""
+    }
+
+
+class StatsStore:
+    """Compteurs en mémoire, lectures sans I/O et écriture atomique différée"""
+
+    def __init__(self, path: str = 'data/stats.json'):
+        self.path = path
+        self.data: Dict[str, Any] = default_stats()
+        self.loaded = False
+        self._dirty = False
+        self._save_lock = asyncio.Lock()
+
+        # Compteurs de fonctionnement
+        self.saves = 0
+
+    def load(self) -> Dict[str, Any]:
+        """Charge le fichier au premier appel (les appels suivants renvoient les données en mémoire)"""
+        if self.loaded:
+            return self.data
+
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+                logger.info("📈 Données statistiques chargées")
+        except json.JSONDecodeError:
+            # Conserver le fichier illisible plutôt que de l'écraser à la prochaine sauvegarde
+            logger.error("❌ Erreur de lecture du fichier stats.json (copie conservée en .corrupt)")
+            os.replace(self.path, f"{self.path}.corrupt")
+            self.data = default_stats()
+
+        # Compléter les clés manquantes
+        for key, default_value in default_stats().items():
+            if key not in self.data:
+                self.data[key] = default_value
+            elif key == 'channels':
+                for subkey, subvalue in default_value.items():
+                    self.data[key].setdefault(subkey, subvalue)
+
+        self.loaded = True
+        return self.data
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """Signale une modification à écrire lors de la prochaine sauvegarde"""
+        self._dirty = True
+
+    async def save(self, force: bool = False) -> bool:
+        """Écrit le fichier s'il a changé (sérialisation sur la boucle, écriture disque dans un thread)"""
+        async with self._save_lock:
+            if not (self._dirty or force):
+                return False
+            self._dirty = False
+            # Sérialiser ici : aucun événement ne modifie les compteurs pendant json.dumps
+            payload = json.dumps(self.data, ensure_ascii=False, indent=4)
+            try:
+                await asyncio.to_thread(self._write, payload)
+            except OSError as e:
+                logger.error(f"❌ Erreur lors de l'écriture des statistiques: {str(e)}")
+                self._dirty = True
+                return False
+            self.saves += 1
+            return True
+
+    def _write(self, payload: str):
+        """Écriture atomique : un arrêt brutal ne laisse jamais un fichier tronqué"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(temp_path, self.path)
+
+    # Lectures (commandes) : aucune I/O, vues en lecture seule
+
+    def section(self, key: str) -> Mapping:
+        """Vue en lecture seule d'une section des compteurs (à parcourir sans await intermédiaire)"""
+        return MappingProxyType(self.data.get(key, {}))
+
+    def user_snapshot(self, user_id: str) -> Mapping[str, Any]:
+        """Copie cohérente des compteurs d'un utilisateur"""
+        return MappingProxyType({
+            'messages': self.data['messages'].get(user_id, 0),
+            'voice_time': self.data['voice_time'].get(user_id, 0),
+            'streaming': self.data['streaming'].get(user_id, 0),
+            'last_online': self.data['last_online'].get(user_id),
+        })
+
+
+# Instance globale
+stats_store = StatsStore()
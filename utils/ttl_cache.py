@@ -0,0 +1,98 @@
+"""
+Cache asynchrone borné (LRU + TTL) avec regroupement des chargements simultanés
+Deux demandes identiques en parallèle ne déclenchent qu'un seul appel à la source
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+_MISSING = object()
+
+
+class AsyncTTLCache:
+    """Valeurs récentes en mémoire ; les erreurs de chargement ne sont jamais mises en cache"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600, ttl_for: Callable[[Any], float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Durée de validité propre à chaque valeur (ex. liens signés qui expirent) ; <= 0 : non conservée
+        self.ttl_for = ttl_for
+        # Clé -> (expiration, valeur), de la moins à la plus récemment utilisée
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Chargements en cours, partagés par tous les demandeurs de la même clé
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+
+        # Compteurs de fonctionnement
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        if time.monotonic() >= entry[0]:
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Valeur en cache sans déclencher de chargement"""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        if ttl is None:
+            ttl = self.ttl_for(value) if self.ttl_for else self.ttl
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Valeur en cache, sinon résultat de loader() partagé avec les demandes simultanées"""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # Tâche indépendante : l'annulation d'un demandeur n'interrompt pas les autres
+            task = self._pending[key] = asyncio.ensure_future(loader())
+            task.add_done_callback(lambda done: self._on_loaded(key, done))
+        return await asyncio.shield(task)
+
+    def _on_loaded(self, key: Hashable, task: asyncio.Task):
+        self._pending.pop(key, None)
+        if task.cancelled():
+            return
+        # Lire l'exception la marque comme traitée même si tous les demandeurs ont abandonné
+        if task.exception() is None:
+            self.set(key, task.result())
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Succès, chargements, demandes regroupées et taille du cache"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'cached': len(self._entries)
+        }
@@ -0,0 +1,130 @@
+"""
+Comptage du temps vocal par sessions (début/fin capturés par on_voice_state_update)
+Le travail dépend du nombre de personnes en vocal, pas du nombre de membres des serveurs
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+# (guild_id, user_id)
+SessionKey = Tuple[int, int]
+
+
+def is_counted(state) -> bool:
+    """Un état vocal compte s'il est dans un salon autre que le salon AFK"""
+    return state is not None and state.channel is not None and not state.afk
+
+
+class _Session:
+    """Session vocale ouverte dans un salon"""
+
+    __slots__ = ('channel_id', 'started', 'settled', 'remainder')
+
+    def __init__(self, channel_id: int, now: float, remainder: float = 0.0):
+        self.channel_id = channel_id
+        self.started = now
+        # Instant jusqu'auquel le temps a déjà été crédité
+        self.settled = now
+        # Secondes pas encore converties en minutes (reportées lors d'un changement de salon, arrondies à la fermeture)
+        self.remainder = remainder
+
+
+class VoiceSessionTracker:
+    """Sessions vocales ouvertes par membre ; la mémoire est bornée par les membres en vocal"""
+
+    def __init__(self):
+        self._sessions: Dict[SessionKey, _Session] = {}
+        # Minutes créditées aux sessions fermées, en attente du prochain règlement
+        self._closed: List[Tuple[int, int, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        return key in self._sessions
+
+    def open(self, guild_id: int, user_id: int, channel_id: int, now: float = None):
+        """Ouvre une session (ferme d'abord celle en cours si le membre change de salon)"""
+        now = now if now is not None else time.monotonic()
+        key = (guild_id, user_id)
+        remainder = 0.0
+        previous = self._sessions.get(key)
+        if previous is not None:
+            if previous.channel_id == channel_id:
+                return
+            # Changement de salon : les secondes restantes passent à la nouvelle session
+            del self._sessions[key]
+            self._record(key, previous, self._credit(previous, now))
+            remainder = previous.remainder
+        self._sessions[key] = _Session(channel_id, now, remainder)
+
+    def close(self, guild_id: int, user_id: int, now: float = None):
+        """Ferme une session ; ses minutes seront créditées au prochain règlement"""
+        now = now if now is not None else time.monotonic()
+        key = (guild_id, user_id)
+        session = self._sessions.pop(key, None)
+        if session is None:
+            return
+        minutes = self._credit(session, now)
+        # Fin de session : les secondes restantes sont arrondies à la minute la plus proche
+        if session.remainder >= 30:
+            minutes += 1
+        self._record(key, session, minutes)
+
+    def _record(self, key: SessionKey, session: _Session, minutes: int):
+        if minutes:
+            self._closed.append((key[0], key[1], session.channel_id, minutes))
+
+    def update(self, guild_id: int, user_id: int, before, after, now: float = None):
+        """Applique une transition d'état vocal (arrivée, départ, changement de salon, AFK, sourdine)"""
+        now = now if now is not None else time.monotonic()
+        if is_counted(after):
+            self.open(guild_id, user_id, after.channel.id, now)
+        else:
+            self.close(guild_id, user_id, now)
+
+    def sync_guild(self, guild_id: int, active: Dict[int, int], now: float = None):
+        """Aligne les sessions d'un serveur sur les membres en vocal {user_id: channel_id} (démarrage, reconnexion)"""
+        now = now if now is not None else time.monotonic()
+        for key in [key for key in self._sessions if key[0] == guild_id and key[1] not in active]:
+            self.close(*key, now=now)
+        for user_id, channel_id in active.items():
+            self.open(guild_id, user_id, channel_id, now)
+
+    def close_guild(self, guild_id: int, now: float = None):
+        """Ferme toutes les sessions d'un serveur"""
+        for key in [key for key in self._sessions if key[0] == guild_id]:
+            self.close(*key, now=now)
+
+    def close_all(self, now: float = None):
+        """Ferme toutes les sessions (arrêt du bot)"""
+        for key in list(self._sessions):
+            self.close(*key, now=now)
+
+    @staticmethod
+    def _credit(session: _Session, now: float) -> int:
+        """Convertit le temps écoulé depuis le dernier règlement en minutes entières"""
+        seconds = session.remainder + max(0.0, now - session.settled)
+        session.settled = now
+        minutes, session.remainder = divmod(seconds, 60)
+        return int(minutes)
+
+    def settle(self, now: float = None) -> List[Tuple[int, int, int, int]]:
+        """Crédite le temps des sessions ouvertes et fermées : [(guild_id, user_id, channel_id, minutes)]"""
+        now = now if now is not None else time.monotonic()
+        credited, self._closed = self._closed, []
+        for key, session in self._sessions.items():
+            minutes = self._credit(session, now)
+            if minutes:
+                credited.append((key[0], key[1], session.channel_id, minutes))
+        return credited
+
+    def session_seconds(self, guild_id: int, user_id: int, now: float = None) -> Optional[float]:
+        """Durée de la session en cours d'un membre (None s'il n'est pas en vocal)"""
+        session = self._sessions.get((guild_id, user_id))
+        if session is None:
+            return None
+        return (now if now is not None else time.monotonic()) - session.started
+
+
+# Instance globale
+voice_sessions = VoiceSessionTracker()
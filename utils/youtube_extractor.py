@@ -0,0 +1,266 @@
+"""
+Extraction yt-dlp partagée : une seule extraction par vidéo, dans un pool de threads dédié
+Les liens audio et vidéo sont tirés du même dictionnaire d'informations et gardés en cache
+jusqu'à l'expiration des URL signées
+"""
+import asyncio
+import itertools
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import yt_dlp
+
+from config import Config
+from utils.ttl_cache import AsyncTTLCache
+
+logger = logging.getLogger('bot')
+
+YDL_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "nocheckcertificate": True,
+    "geo_bypass": True,
+    "geo_bypass_country": "FR",
+    "http_headers": {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "fr,fr-FR;q=0.9,en;q=0.8",
+        "Accept-Charset": "ISO-8859-1,utf-8;q=0.7,*;q=0.7",
+    },
+}
+
+_VIDEO_ID = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([A-Za-z0-9_-]{11})")
+
+# Champs volumineux inutiles une fois les liens choisis (gardés hors du cache)
+_HEAVY_FIELDS = ("formats", "requested_formats", "thumbnails", "subtitles",
+                 "automatic_captions", "heatmap", "chapters")
+
+
+def _has_codec(fmt: Dict, codec: str) -> bool:
+    return fmt.get(codec) not in (None, "none")
+
+
+def select_audio_format(info: Dict) -> Dict:
+    """Équivalent de "bestaudio[ext=mp3]/bestaudio/best" (yt-dlp trie les formats du moins bon au meilleur)"""
+    formats = [fmt for fmt in info.get("formats") or [] if fmt.get("url")]
+    audio_only = [fmt for fmt in formats if _has_codec(fmt, "acodec") and not _has_codec(fmt, "vcodec")]
+    for candidates in (
+        [fmt for fmt in audio_only if fmt.get("ext") == "mp3"],
+        audio_only,
+        [fmt for fmt in formats if _has_codec(fmt, "acodec") and _has_codec(fmt, "vcodec")],
+    ):
+        if candidates:
+            return candidates[-1]
+    # Pas de liste de formats (lien direct) : le dictionnaire décrit lui-même le flux
+    return info
+
+
+def select_audio_url(info: Dict) -> Optional[str]:
+    return select_audio_format(info).get("url")
+
+
+def select_video_url(info: Dict) -> Optional[str]:
+    """Équivalent de "best[ext=mp4]/best" : meilleur format contenant l'image et le son"""
+    formats = [
+        fmt for fmt in info.get("formats") or []
+        if fmt.get("url") and _has_codec(fmt, "acodec") and _has_codec(fmt, "vcodec")
+    ]
+    for candidates in ([fmt for fmt in formats if fmt.get("ext") == "mp4"], formats):
+        if candidates:
+            return candidates[-1]["url"]
+    return info.get("url")
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """Identifiant YouTube d'une URL (watch, youtu.be, shorts, embed)"""
+    match = _VIDEO_ID.search(url or "")
+    return match.group(1) if match else None
+
+
+def url_expiry(url: Optional[str]) -> Optional[float]:
+    """Horodatage d'expiration d'une URL signée (paramètre expire des liens googlevideo)"""
+    if not url:
+        return None
+    expire = parse_qs(urlsplit(url).query).get("expire")
+    if expire and expire[0].isdigit():
+        return float(expire[0])
+    return None
+
+
+class VideoInfo:
+    """Métadonnées d'une vidéo et liens directs audio/vidéo issus d'une même extraction"""
+
+    __slots__ = ("video_id", "title", "thumbnail", "duration", "audio_url", "audio_codec",
+                 "video_url", "expires", "info")
+
+    def __init__(self, video_id: str, info: Dict[str, Any]):
+        self.video_id = video_id
+        self.title = info.get("title") or "Vidéo"
+        self.thumbnail = info.get("thumbnail")
+        self.duration = info.get("duration") or 0
+        audio = select_audio_format(info)
+        self.audio_url = audio.get("url")
+        # Codec du flux audio ("opus", "mp4a.40.2"...) : décide si la lecture peut se passer de transcodage
+        self.audio_codec = audio.get("acodec")
+        self.video_url = select_video_url(info)
+        # La première URL qui expire rend l'entrée inutilisable
+        expiries = [e for e in (url_expiry(self.audio_url), url_expiry(self.video_url)) if e]
+        self.expires = min(expiries) if expiries else None
+        self.info = {key: value for key, value in info.items() if key not in _HEAVY_FIELDS}
+
+
+class PlaylistStream:
+    """Entrées d'une playlist lues page par page à la demande (mémoire indépendante de sa longueur)"""
+
+    def __init__(self, extractor: "YouTubeExtractor", ydl, title: str, entries: Iterator[Dict],
+                 page_size: int, requester: str = None):
+        self._extractor = extractor
+        # L'instance yt-dlp reste ouverte : le générateur d'entrées l'utilise pour les pages suivantes
+        self._ydl = ydl
+        self._entries = entries
+        self.title = title
+        self.page_size = page_size
+        self.requester = requester
+        self.fetched = 0
+        self.exhausted = False
+
+    @staticmethod
+    def _take(entries: Iterator[Dict], count: int) -> List[Dict]:
+        return list(itertools.islice(entries, count))
+
+    async def next_page(self) -> List[Dict]:
+        """Entrées suivantes (liste vide quand la playlist est terminée)"""
+        if self.exhausted:
+            return []
+        raw = await self._extractor._run(self._take, self._entries, self.page_size)
+        self.fetched += len(raw)
+        if len(raw) < self.page_size:
+            await self.close()
+        return [entry for entry in raw if entry and (entry.get("url") or entry.get("webpage_url"))]
+
+    async def close(self):
+        """Libère le générateur et l'instance yt-dlp"""
+        if self.exhausted:
+            return
+        self.exhausted = True
+        self._entries = None
+        ydl, self._ydl = self._ydl, None
+        if ydl is not None:
+            await self._extractor._run(ydl.close)
+
+
+class YouTubeExtractor:
+    """Extractions yt-dlp hors de la boucle asyncio avec cache par identifiant de vidéo"""
+
+    def __init__(self, workers: int = 2, cache_size: int = 128, default_ttl: int = 1800,
+                 expiry_margin: int = 300):
+        self.workers = workers
+        self.default_ttl = default_ttl
+        self.expiry_margin = expiry_margin
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cache = AsyncTTLCache(cache_size, default_ttl, ttl_for=self._ttl_for)
+
+        # Temps d'extraction : [nombre, total ms, max ms]
+        self._timings = [0, 0.0, 0.0]
+
+    def _ttl_for(self, video: VideoInfo) -> float:
+        """Validité en cache : jusqu'à l'expiration des liens signés, moins une marge"""
+        if video.expires is None:
+            return self.default_ttl
+        return video.expires - time.time() - self.expiry_margin
+
+    def _ensure_started(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ytdl")
+            logger.info(f"📥 Pool d'extraction YouTube démarré ({self.workers} threads)")
+        return self._executor
+
+    async def _run(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._ensure_started(), func, *args)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._timings[0] += 1
+            self._timings[1] += elapsed
+            self._timings[2] = max(self._timings[2], elapsed)
+
+    @staticmethod
+    def _extract(url: str, options: Dict) -> Dict:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    async def get_video(self, video_id: str) -> VideoInfo:
+        """Informations et liens d'une vidéo (une extraction par vidéo tant que les liens restent valides)"""
+        async def load() -> VideoInfo:
+            info = await self._run(self._extract, f"https://www.youtube.com/watch?v={video_id}", YDL_OPTIONS)
+            return VideoInfo(video_id, info)
+
+        return await self._cache.get_or_load(video_id, load)
+
+    async def resolve(self, url: str) -> VideoInfo:
+        """Informations d'une URL quelconque ; les liens YouTube partagent le cache par identifiant"""
+        video_id = video_id_from_url(url)
+        if video_id:
+            return await self.get_video(video_id)
+
+        async def load() -> VideoInfo:
+            info = await self._run(self._extract, url, YDL_OPTIONS)
+            return VideoInfo(info.get("id") or url, info)
+
+        return await self._cache.get_or_load(url, load)
+
+    @staticmethod
+    def _open_lazy(url: str, options: Dict):
+        """Résultat non traité : les entrées restent un générateur qui charge les pages au fil de l'eau"""
+        ydl = yt_dlp.YoutubeDL(options)
+        try:
+            return ydl, ydl.extract_info(url, download=False, process=False)
+        except Exception:
+            ydl.close()
+            raise
+
+    async def open_playlist(self, url: str, page_size: int = 10, requester: str = None) -> PlaylistStream:
+        """Ouvre une playlist sans lire ses entrées (lues ensuite par pages avec next_page)"""
+        options = {**YDL_OPTIONS, "extract_flat": "in_playlist", "lazy_playlist": True}
+        ydl, info = await self._run(self._open_lazy, url, options)
+        info = info or {}
+        return PlaylistStream(
+            self, ydl, info.get("title") or "Playlist inconnue",
+            iter(info.get("entries") or []), page_size, requester
+        )
+
+    async def search(self, query: str, count: int) -> List[Dict]:
+        """Recherche YouTube (entrées à plat, sans extraction de chaque vidéo)"""
+        options = {**YDL_OPTIONS, "extract_flat": True, "default_search": "ytsearch"}
+        results = await self._run(self._extract, f"ytsearch{count}:{query}", options)
+        return [entry for entry in (results or {}).get("entries") or [] if entry]
+
+    def get_stats(self) -> Dict:
+        """Statistiques du cache et temps d'extraction moyen/max"""
+        count, total, worst = self._timings
+        return {
+            **self._cache.get_stats(),
+            'extractions': count,
+            'avg_ms': round(total / count, 1) if count else 0.0,
+            'max_ms': round(worst, 1)
+        }
+
+    def shutdown(self):
+        """Arrête le pool (les extractions en cours se terminent en arrière-plan)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instance globale
+youtube_extractor = YouTubeExtractor(
+    workers=Config.YTDL_WORKERS,
+    cache_size=Config.YTDL_CACHE_SIZE,
+    default_ttl=Config.YTDL_CACHE_TTL,
+)